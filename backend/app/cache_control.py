@@ -0,0 +1,99 @@
+"""ルートごとの HTTP キャッシュ方針（Cache-Control / Vary）を付与するミドルウェア"""
+
+from dataclasses import dataclass
+from typing import Optional
+
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+
+@dataclass(frozen=True)
+class CachePolicy:
+    """1ルート分のキャッシュ方針
+
+    - visibility: "public"（CDN・ブラウザで共有可）/ "private"（本人のブラウザのみ）/ "no-store"
+    - max_age / stale_while_revalidate: 秒数（None なら付けない）
+    - no_cache: True の場合、毎回 ETag で再検証させる（304 で本文を省略できる）
+    - vary_authorization: ユーザーごとに内容が変わる場合は True（Vary: Authorization）
+    """
+
+    visibility: str
+    max_age: Optional[int] = None
+    stale_while_revalidate: Optional[int] = None
+    no_cache: bool = False
+    vary_authorization: bool = False
+
+    def header_value(self) -> str:
+        if self.visibility == "no-store":
+            return "no-store"
+        directives = [self.visibility]
+        if self.no_cache:
+            directives.append("no-cache")
+        if self.max_age is not None:
+            directives.append(f"max-age={self.max_age}")
+        if self.stale_while_revalidate is not None:
+            directives.append(f"stale-while-revalidate={self.stale_while_revalidate}")
+        return ", ".join(directives)
+
+
+NO_STORE = CachePolicy("no-store", vary_authorization=True)
+# 本人のデータ。ブラウザには保存させるが、毎回 ETag で再検証させる
+PRIVATE_REVALIDATE = CachePolicy("private", no_cache=True, vary_authorization=True)
+
+# (メソッド, ルートのパス) → キャッシュ方針
+# NOTE: 表にないルート（書き込み系API・未定義のパスを含む）は DEFAULT_CACHE_POLICY になる
+CACHE_POLICIES: dict[tuple[str, str], CachePolicy] = {
+    # 固定レスポンス。CDN（Vercel エッジ）でも共有してよい
+    ("GET", "/"): CachePolicy("public", max_age=3600, stale_while_revalidate=86400),
+    # ALB のヘルスチェックは常にアプリまで届かせる
+    ("GET", "/health"): CachePolicy("no-store"),
+    ("GET", "/metrics"): CachePolicy("no-store"),
+    # ユーザーごとのデータ（書き込み直後に最新を返す必要があるため再検証必須）
+    ("GET", "/api/users/me"): PRIVATE_REVALIDATE,
+    ("GET", "/api/care_settings/me"): PRIVATE_REVALIDATE,
+    ("GET", "/api/care_logs/today"): PRIVATE_REVALIDATE,
+    ("GET", "/api/care_logs/by_date"): PRIVATE_REVALIDATE,
+    ("GET", "/api/care_logs/list"): PRIVATE_REVALIDATE,
+    ("GET", "/api/care_logs/range"): PRIVATE_REVALIDATE,
+    ("GET", "/api/reflection_notes"): PRIVATE_REVALIDATE,
+    ("GET", "/api/dashboard"): PRIVATE_REVALIDATE,
+}
+DEFAULT_CACHE_POLICY = NO_STORE
+
+
+def resolve_cache_policy(method: str, route_path: Optional[str]) -> CachePolicy:
+    """メソッドとルートのパスから方針を引く（HEAD は GET と同じ扱い）"""
+    if method == "HEAD":
+        method = "GET"
+    return CACHE_POLICIES.get((method, route_path or ""), DEFAULT_CACHE_POLICY)
+
+
+class CacheControlMiddleware:
+    """レスポンスに Cache-Control / Vary を付けるASGIミドルウェア
+
+    - ルーティング後の scope["route"] からルートのパスを引くため、パスパラメータを含むルートも1行で指定できる
+    - ルーター側で Cache-Control を設定済みの場合は上書きしない
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        async def send_with_policy(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                route = scope.get("route")
+                policy = resolve_cache_policy(
+                    scope["method"], getattr(route, "path", None)
+                )
+                headers = MutableHeaders(scope=message)
+                if "cache-control" not in headers:
+                    headers["Cache-Control"] = policy.header_value()
+                if policy.vary_authorization:
+                    headers.add_vary_header("Authorization")
+            await send(message)
+
+        await self.app(scope, receive, send_with_policy)
@@ -1,13 +1,21 @@
 """Firebase authentication dependencies for FastAPI application."""
 
+import asyncio
 import json
 import os
+from dataclasses import dataclass, field
+from typing import Optional
 
 import firebase_admin
 from dotenv import load_dotenv
-from fastapi import HTTPException, status, Request
+from fastapi import HTTPException, status, Request, Depends
 from firebase_admin import credentials, auth
 
+from app.db import prisma_client
+from app.services.firebase_auth import AsyncFirebaseTokenVerifier
+from app.services.identity_cache import get_cached_identity, set_cached_identity
+from app.services.token_cache import VerifiedTokenCache
+
 load_dotenv()
 
 # deploy時に環境変数を読み込むための設定
@@ -30,8 +38,23 @@ except ValueError as exc:
         cred = credentials.Certificate(firebase_cred_dict)
         firebase_admin.initialize_app(cred)
 
+# 検証済みIDトークンのキャッシュ設定
+# FIREBASE_TOKEN_CACHE_MAX_AGE:
+#   0   → トークンの exp まで信頼する（失効は exp まで反映されない）
+#   正数 → キャッシュ寿命をその秒数に制限する（失効を早めに反映したい場合）
+TOKEN_CACHE_MAX_AGE = float(os.getenv("FIREBASE_TOKEN_CACHE_MAX_AGE", "300"))
+token_cache = VerifiedTokenCache(
+    max_size=int(os.getenv("FIREBASE_TOKEN_CACHE_SIZE", "1024")),
+    max_age=TOKEN_CACHE_MAX_AGE if TOKEN_CACHE_MAX_AGE > 0 else None,
+)
+
+# 非同期のトークン検証器（署名鍵はメモリ保持し、lifespan で更新タスクを起動する）
+token_verifier = AsyncFirebaseTokenVerifier(
+    project_id=firebase_admin.get_app().project_id
+)
 
-def verify_firebase_token(request: Request) -> str:
+
+async def verify_firebase_token(request: Request) -> str:
     """Firebase IDトークンを検証して、UID（ユーザーID）を返す関数.
 
     Args:
@@ -55,13 +78,135 @@ def verify_firebase_token(request: Request) -> str:
     # "Bearer " の後のトークン部分を取得
     id_token = auth_header.split(" ")[1]
 
+    # 同じトークンで検証済みならRSA署名の検証をスキップする
+    cached_token = token_cache.get(id_token)
+    if cached_token is not None:
+        return cached_token["uid"]
+
     try:
-        # Firebase Admin SDK を使って　IDトークンを検証
-        decoded_token = auth.verify_id_token(id_token)
+        if os.getenv("FIREBASE_AUTH_EMULATOR_HOST"):
+            # エミュレーターのトークンは署名なしのためSDKで検証する
+            decoded_token = await asyncio.to_thread(auth.verify_id_token, id_token)
+        else:
+            # メモリ上の公開鍵でIDトークンを検証（イベントループをブロックしない）
+            decoded_token = await token_verifier.verify(id_token)
         uid = decoded_token["uid"]
+        token_cache.set(id_token, decoded_token)
         return uid
         # トークンの検証に失敗した場合は401エラーを返す
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED, detail=f"Invalid token: {e}"
         ) from e
+
+
+# users と care_settings を1回の結合クエリで解決する
+# care_setting_id は最初（id最小）のお世話設定、care_setting_ids はユーザーの全お世話設定
+RESOLVE_IDENTITY_SQL = """
+SELECT
+    u."id" AS "user_id",
+    u."current_plan",
+    MIN(cs."id") AS "care_setting_id",
+    COALESCE(
+        ARRAY_AGG(cs."id" ORDER BY cs."id") FILTER (WHERE cs."id" IS NOT NULL),
+        '{}'
+    ) AS "care_setting_ids"
+FROM "users" u
+LEFT JOIN "care_settings" cs ON cs."user_id" = u."id"
+WHERE u."firebase_uid" = $1
+GROUP BY u."id"
+"""
+
+
+@dataclass
+class RequestIdentity:
+    """リクエスト単位で解決したログインユーザーの識別情報"""
+
+    firebase_uid: str
+    user_id: str
+    current_plan: Optional[str]
+    # 画面で扱うお世話設定（最初に登録したもの）
+    care_setting_id: Optional[int]
+    # ユーザーが持つ全お世話設定のID（所有者チェックに使う）
+    care_setting_ids: list[int] = field(default_factory=list)
+
+    def owns_care_setting(self, care_setting_id: Optional[int]) -> bool:
+        """care_setting_id がこのユーザーのお世話設定か"""
+        if care_setting_id is None:
+            return False
+        return (
+            care_setting_id == self.care_setting_id
+            or care_setting_id in self.care_setting_ids
+        )
+
+
+async def get_request_identity(
+    request: Request,
+    firebase_uid: str = Depends(verify_firebase_token),
+) -> Optional[RequestIdentity]:
+    """users と care_settings を1回の結合クエリで解決し、リクエスト内でメモ化する.
+
+    各ルーターで繰り返していた users.find_unique → care_settings.find_first の
+    2往復を1往復（RESOLVE_IDENTITY_SQL）にまとめる。通常はRedisの identity キャッシュ（GET 1回）で解決し、
+    ミスした場合のみDBを参照する。ユーザー未登録時のエラー内容はルーターごとに
+    異なるため、ここでは例外を投げずに None を返す。
+
+    Args:
+        request: FastAPI Request object（request.state にメモ化する）
+        firebase_uid: verify_firebase_token で検証済みのFirebase UID
+
+    Returns:
+        Optional[RequestIdentity]: ユーザーが存在しない場合はNone
+
+    Raises:
+        HTTPException: DBアクセスに失敗した場合
+    """
+    # 同一リクエスト内で解決済みなら再利用する
+    if hasattr(request.state, "identity"):
+        return request.state.identity
+
+    # ワーカー間で共有しているRedisキャッシュを確認
+    # （バージョン番号はDBを読む前に取得し、読み込み中の書き込みで古い値を保存しないようにする）
+    cached, version = await get_cached_identity(firebase_uid)
+    if cached is not None:
+        identity = RequestIdentity(
+            firebase_uid=firebase_uid,
+            user_id=cached["user_id"],
+            current_plan=cached["current_plan"],
+            care_setting_id=cached["care_setting_id"],
+            care_setting_ids=cached["care_setting_ids"],
+        )
+        request.state.identity = identity
+        return identity
+
+    try:
+        # ユーザーとお世話設定を1クエリで取得
+        row = await prisma_client.query_first(RESOLVE_IDENTITY_SQL, firebase_uid)
+    except Exception as e:
+        print(f"[dependencies] identity解決エラー: {type(e).__name__}: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="ユーザー情報取得時にエラーが発生しました",
+        ) from e
+
+    identity = None
+    if row:
+        identity = RequestIdentity(
+            firebase_uid=firebase_uid,
+            user_id=row["user_id"],
+            current_plan=row["current_plan"],
+            care_setting_id=row["care_setting_id"],
+            care_setting_ids=list(row["care_setting_ids"] or []),
+        )
+        # 未登録ユーザーは直後に登録される可能性があるためキャッシュしない
+        await set_cached_identity(
+            firebase_uid,
+            version,
+            identity.user_id,
+            identity.current_plan,
+            identity.care_setting_id,
+            identity.care_setting_ids,
+        )
+
+    request.state.identity = identity
+    return identity
@@ -10,17 +10,6 @@ from fastapi.middleware.cors import CORSMiddleware
 from fastapi import FastAPI
 from dotenv import load_dotenv
 
-
-# fastapi-cache2
-from fastapi_cache import FastAPICache
-from fastapi_cache.backends.redis import RedisBackend
-
-# NOTE: キャッシュ機能の検証が完了したら削除または専用ルーターに移動する
-# from fastapi_cache.decorator import cache
-
-# Redis をimport
-import redis.asyncio as redis
-
 # FastAPI Exporterを使ってメトリクス収集のためimport
 from prometheus_fastapi_instrumentator import Instrumentator
 
@@ -33,32 +22,82 @@ from app.routers.user import user_router
 from app.routers.care_logs import care_logs_router
 from app.routers.care_settings import care_settings_router
 from app.routers.reflection_notes import reflection_notes_router
-from app.routers.message_logs import message_logs_router
+from app.routers.message_logs import (
+    DOG_KNOWLEDGE_CATEGORIES,
+    generate_pool_message,
+    message_logs_router,
+)
 from app.routers.payment import payment_router
-from app.routers.webhook_events import webhook_events_router
+from app.routers.webhook_events import (
+    process_claimed_webhook_events,
+    webhook_events_router,
+)
+from app.routers.dashboard import dashboard_router
+from app.routers.cache_admin import cache_admin_router
 
 
 # Prisma Client を使うための import
 from app.db import prisma_client
 
+# Firebase IDトークン検証器（署名鍵のバックグラウンド更新用）
+from app.dependencies import token_verifier
+
+# identity キャッシュなどから共有する Redis クライアント
+from app.redis_client import create_redis_client, set_redis_client
+
+# ルートキャッシュの L1 を全ワーカーで揃えるための無効化通知の購読
+from app.services.route_cache import invalidation_listener
+
+# プレミアムプラン向けメッセージの事前生成
+from app.services.message_pool import message_pool
+
+# 犬のひとこと生成で共有する OpenAI クライアント
+from app.services.openai_client import create_openai_client, set_openai_client
+
+# 保存済みの Webhook イベントを処理するワーカー
+from app.services.webhook_worker import webhook_worker
+
+# ルートごとの Cache-Control / Vary
+from app.cache_control import CacheControlMiddleware
+
 
 # Prisma Client の lifespan context manager（FastAPI v0.95以降の推奨）
 @asynccontextmanager
 async def lifespan(_: FastAPI):
     """起動時と終了時の処理をまとめて管理"""
-    # Redis接続
-    # NOTE: Redisはローカル環境（localhost:6379）を想定しているため、Docker環境では別途設定が必要
-    # redis_client = redis.Redis(host="localhost", port=6379, decode_responses=True)
-    # docker環境でのRedis接続を考慮
-    redis_client = redis.Redis(host="redis", port=6379, decode_responses=True)
-
-    # FastAPICacheを先に初期化
-    FastAPICache.init(RedisBackend(redis_client), prefix="fastapi-cache")
+    # Redis接続（接続先・プールサイズ・タイムアウトは REDIS_* 環境変数で設定。既定は docker の redis:6379）
+    # NOTE: ローカル環境で動かす場合は REDIS_HOST=localhost を指定する
+    redis_client = create_redis_client()
+    # identity キャッシュなど他モジュールからも同じクライアントを使う
+    set_redis_client(redis_client)
+    # 他ワーカーでの書き込みによる無効化をプロセス内キャッシュに反映する
+    invalidation_listener.start(redis_client)
+    # OpenAI クライアント（接続を使い回すため1つだけ作る。OPENAI_API_KEY 未設定なら None）
+    openai_client = create_openai_client()
+    set_openai_client(openai_client)
+    # プレミアムプランの犬のひとことを事前に生成し、減ったら補充する
+    if openai_client is not None:
+        message_pool.start(DOG_KNOWLEDGE_CATEGORIES, generate=generate_pool_message)
+
+    # Firebaseの署名鍵を先読みし、期限前に更新するバックグラウンドタスクを開始
+    await token_verifier.start()
 
     # Prisma起動
     await prisma_client.connect()  # 起動時の処理
+    # Webhook で受信したイベントをバックグラウンドで処理する（WEBHOOK_WORKERS=0 で無効）
+    webhook_worker.start(process_claimed_webhook_events)
     yield
+    await webhook_worker.stop()
     await prisma_client.disconnect()  # 終了時の処理
+    await token_verifier.stop()
+    await invalidation_listener.stop()
+    await message_pool.stop()
+    set_openai_client(None)
+    if openai_client is not None:
+        await openai_client.close()
+    # 接続プールごと閉じる
+    set_redis_client(None)
+    await redis_client.aclose(close_connection_pool=True)
 
 
 # lifespanを使ったFastAPIインスタンス
@@ -77,6 +116,9 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# HTTPキャッシュ方針の設定（方針の一覧は app/cache_control.py の CACHE_POLICIES）
+app.add_middleware(CacheControlMiddleware)
+
 # ルーターを登録
 app.include_router(user_router)
 app.include_router(care_logs_router)
@@ -85,6 +127,8 @@ app.include_router(reflection_notes_router)
 app.include_router(message_logs_router)
 app.include_router(payment_router)
 app.include_router(webhook_events_router)
+app.include_router(dashboard_router)
+app.include_router(cache_admin_router)
 
 
 # ルートパス
@@ -0,0 +1,181 @@
+"""Redis接続の共有設定（main.lifespan で生成したクライアントを各モジュールで再利用する）"""
+
+import os
+import time
+from typing import Callable, Optional
+
+import redis.asyncio as redis
+from redis.asyncio.client import Pipeline
+from redis.asyncio.retry import Retry
+from redis.backoff import ExponentialBackoff
+from redis.exceptions import ConnectionError as RedisConnectionError
+from redis.exceptions import TimeoutError as RedisTimeoutError
+
+# 接続設定（Redis が遅いときにリクエスト全体を待たせないよう、タイムアウトは短くする）
+REDIS_HOST = os.getenv("REDIS_HOST", "redis")
+REDIS_PORT = int(os.getenv("REDIS_PORT", "6379"))
+REDIS_MAX_CONNECTIONS = int(os.getenv("REDIS_MAX_CONNECTIONS", "50"))
+# 空き接続を待つ上限（秒）
+REDIS_POOL_TIMEOUT = float(os.getenv("REDIS_POOL_TIMEOUT", "0.1"))
+REDIS_SOCKET_TIMEOUT = float(os.getenv("REDIS_SOCKET_TIMEOUT", "0.25"))
+REDIS_SOCKET_CONNECT_TIMEOUT = float(os.getenv("REDIS_SOCKET_CONNECT_TIMEOUT", "0.5"))
+REDIS_RETRIES = int(os.getenv("REDIS_RETRIES", "1"))
+# サーキットブレーカー: 連続で何回失敗したら遮断するか・何秒後に再試行するか
+REDIS_BREAKER_FAILURE_THRESHOLD = int(os.getenv("REDIS_BREAKER_FAILURE_THRESHOLD", "5"))
+REDIS_BREAKER_RESET_TIMEOUT = float(os.getenv("REDIS_BREAKER_RESET_TIMEOUT", "10"))
+
+# Redis が遅い・落ちていると判断する例外
+REDIS_DEGRADED_ERRORS = (RedisConnectionError, RedisTimeoutError)
+
+
+class CircuitOpenError(RedisConnectionError):
+    """サーキットブレーカーが遮断中のため Redis に送らなかったことを示す例外
+
+    ConnectionError のサブクラスのため、既存の except RedisError でDBにフォールバックする
+    """
+
+
+class CircuitBreaker:
+    """Redis の障害時に呼び出しを遮断し、一定時間後に自動で再試行するサーキットブレーカー
+
+    - closed: 通常どおり呼び出す。連続失敗が閾値に達したら open にする
+    - open: reset_timeout の間は呼び出さない（キャッシュを使わずDBから読む）
+    - half_open: reset_timeout 経過後の試行。成功すれば closed、失敗すれば再び open
+    """
+
+    def __init__(
+        self,
+        failure_threshold: int = 5,
+        reset_timeout: float = 10.0,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._clock = clock
+        self.state = "closed"
+        self._failures = 0
+        self._opened_at = 0.0
+
+    def allow(self) -> bool:
+        """呼び出してよいか（open で reset_timeout を過ぎていれば half_open にする）"""
+        if self.state == "open":
+            if self._clock() - self._opened_at < self.reset_timeout:
+                return False
+            self.state = "half_open"
+            print("[redis] サーキットブレーカー: 再試行します（half_open）")
+        return True
+
+    def record_success(self) -> None:
+        if self.state != "closed":
+            print("[redis] サーキットブレーカー: 復旧しました（closed）")
+        self.state = "closed"
+        self._failures = 0
+
+    def record_failure(self) -> None:
+        self._failures += 1
+        if self.state == "half_open" or self._failures >= self.failure_threshold:
+            if self.state != "open":
+                print(
+                    "[redis] サーキットブレーカー: 遮断しました（open）"
+                    f" {self.reset_timeout}秒間はキャッシュを使いません"
+                )
+            self.state = "open"
+            self._opened_at = self._clock()
+
+
+class GuardedPipeline(Pipeline):
+    """execute() の成否をサーキットブレーカーに記録するパイプライン"""
+
+    def __init__(self, *args, breaker: CircuitBreaker, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.breaker = breaker
+
+    async def execute(self, raise_on_error: bool = True):
+        if not self.breaker.allow():
+            await self.reset()
+            raise CircuitOpenError("Redis circuit breaker is open")
+        try:
+            result = await super().execute(raise_on_error)
+        except REDIS_DEGRADED_ERRORS:
+            self.breaker.record_failure()
+            raise
+        self.breaker.record_success()
+        return result
+
+
+class GuardedRedis(redis.Redis):
+    """コマンドの成否をサーキットブレーカーに記録する Redis クライアント
+
+    unguarded は同じ接続プールを使い、ブレーカーを通さないクライアント
+    """
+
+    def __init__(self, *args, breaker: CircuitBreaker, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.breaker = breaker
+        self.unguarded = redis.Redis(connection_pool=self.connection_pool)
+
+    async def execute_command(self, *args, **options):
+        if not self.breaker.allow():
+            raise CircuitOpenError("Redis circuit breaker is open")
+        try:
+            result = await super().execute_command(*args, **options)
+        except REDIS_DEGRADED_ERRORS:
+            self.breaker.record_failure()
+            raise
+        self.breaker.record_success()
+        return result
+
+    def pipeline(self, transaction: bool = True, shard_hint: Optional[str] = None):
+        return GuardedPipeline(
+            self.connection_pool,
+            self.response_callbacks,
+            transaction,
+            shard_hint,
+            breaker=self.breaker,
+        )
+
+
+def create_redis_client() -> GuardedRedis:
+    """環境変数の設定で接続プールとクライアントを作る（main.lifespan から呼び出す）"""
+    pool = redis.BlockingConnectionPool(
+        host=REDIS_HOST,
+        port=REDIS_PORT,
+        max_connections=REDIS_MAX_CONNECTIONS,
+        timeout=REDIS_POOL_TIMEOUT,
+        socket_timeout=REDIS_SOCKET_TIMEOUT,
+        socket_connect_timeout=REDIS_SOCKET_CONNECT_TIMEOUT,
+        retry=Retry(ExponentialBackoff(cap=0.1, base=0.01), REDIS_RETRIES),
+        retry_on_timeout=True,
+        health_check_interval=30,
+        decode_responses=True,
+    )
+    breaker = CircuitBreaker(
+        failure_threshold=REDIS_BREAKER_FAILURE_THRESHOLD,
+        reset_timeout=REDIS_BREAKER_RESET_TIMEOUT,
+    )
+    return GuardedRedis(connection_pool=pool, breaker=breaker)
+
+
+# main.lifespan で初期化される（テストなど lifespan を通らない場合は None のまま）
+_redis_client: Optional[redis.Redis] = None
+
+
+def set_redis_client(client: Optional[redis.Redis]) -> None:
+    """lifespan で生成した Redis クライアントを登録する"""
+    global _redis_client  # pylint: disable=global-statement
+    _redis_client = client
+
+
+def get_redis_client(force: bool = False) -> Optional[redis.Redis]:
+    """登録済みの Redis クライアントを返す（未初期化なら None）
+
+    サーキットブレーカーが遮断中は None を返し、呼び出し側はキャッシュを使わずDBから読む。
+    キャッシュの無効化など取りこぼすと古い値が残る書き込みは force=True で常に送る
+    """
+    if not isinstance(_redis_client, GuardedRedis):
+        return _redis_client
+    if force:
+        return _redis_client.unguarded
+    if not _redis_client.breaker.allow():
+        return None
+    return _redis_client
@@ -0,0 +1,58 @@
+"""キャッシュ管理（cache_admin）APIルーターの定義"""
+
+# 標準ライブラリ
+import os
+from typing import Optional
+
+# サードパーティライブラリ
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from redis.exceptions import RedisError
+
+# ローカルアプリケーション
+from app.dependencies import verify_firebase_token
+from app.schemas.cache_admin import CacheKeysResponse
+from app.services.route_cache import top_keys_by_size
+
+cache_admin_router = APIRouter(prefix="/api/admin/cache", tags=["cache_admin"])
+
+# 管理用APIを使えるユーザー（カンマ区切りの Firebase UID。未設定なら誰も使えない）
+ADMIN_FIREBASE_UIDS = {
+    uid.strip()
+    for uid in os.getenv("ADMIN_FIREBASE_UIDS", "").split(",")
+    if uid.strip()
+}
+
+
+async def require_admin(firebase_uid: str = Depends(verify_firebase_token)) -> str:
+    """管理者として登録された Firebase UID のみ通す"""
+    if firebase_uid not in ADMIN_FIREBASE_UIDS:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Forbidden")
+    return firebase_uid
+
+
+# GET /api/admin/cache/keys のルーター
+@cache_admin_router.get(
+    "/keys",
+    response_model=CacheKeysResponse,
+    status_code=status.HTTP_200_OK,
+)
+async def get_cache_keys(
+    limit: int = Query(20, ge=1, le=200),
+    namespace: Optional[str] = Query(None),
+    _: str = Depends(require_admin),
+):
+    """
+    サイズの大きいキャッシュキーを一覧するAPI
+
+    TTL の調整や、キャッシュ対象のルートを増やすかどうかの判断に使う。
+    ヒット率・読み込み時間は /metrics の route_cache_* を参照する
+    """
+    try:
+        keys = await top_keys_by_size(limit=limit, namespace=namespace)
+    except RedisError as e:
+        print(f"[cache_admin] キャッシュキーの取得に失敗しました: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Cache is unavailable",
+        ) from e
+    return {"keys": keys}
@@ -1,11 +1,14 @@
 """お世話記録（care_logs）APIルーターの定義"""
 
 # 標準ライブラリ
-from datetime import datetime
-from typing import Any
+import base64
+import json
+from datetime import date, datetime, time, timezone
+from typing import Any, Optional
 
 # サードパーティライブラリ
 from fastapi import APIRouter, HTTPException, status, Query, Depends
+from pydantic import ValidationError
 
 # ローカルアプリケーション
 from app.db import prisma_client
@@ -14,15 +17,174 @@ from app.schemas.care_logs import (
     CareLogCreateRequest,
     CareLogUpdateRequest,
     CareLogTodayResponse,
+    CareLogDateRange,
+    CareLogRangeResponse,
+    CareLogBatchRequest,
+    CareLogBatchResponse,
+    CareLogListResponse,
+    CARE_LOG_LIST_FIELDS,
+    DEFAULT_LIST_FIELDS,
+    MAX_LIST_LIMIT,
+    parse_care_log_date,
 )
-from app.dependencies import verify_firebase_token
+from app.dependencies import RequestIdentity, get_request_identity
+from app.services.route_cache import cached_route, care_setting_tag, invalidate_tags
 
-# NOTE: キャッシュ機能は使用していません
+# NOTE: キャッシュは GET /today のみ（書き込み系APIで care_setting タグごと無効化する）
 # 理由: お世話記録は即時性が重要で、リアルタイムでの正確な情報提供が必要なため
 
 care_logs_router = APIRouter(prefix="/api/care_logs", tags=["care_logs"])
 
 
+def to_db_date(value: date) -> datetime:
+    """date を care_logs.date（DATE 列）に渡す値に変換する
+
+    Prisma の DateTime 型は datetime しか受け付けないため、UTC 0時の datetime にする
+    """
+    return datetime.combine(value, time.min, tzinfo=timezone.utc)
+
+
+def build_upsert_care_logs_sql(row_count: int) -> str:
+    """care_logs を1文でマージ保存するSQLを組み立てる
+
+    (care_setting_id, date) のユニーク制約を使った INSERT ... ON CONFLICT DO UPDATE。
+    送られなかった項目（NULL）は既存の値を残す。
+    1行あたりのパラメータは care_upsert_params() の並びと対応する
+    """
+    values = ",\n    ".join(
+        f"(${n + 1}, ${n + 2}::date, ${n + 3}::boolean, ${n + 4}::boolean, "
+        f"${n + 5}::boolean, ${n + 6}::integer)"
+        for n in range(0, row_count * 6, 6)
+    )
+    return f"""
+INSERT INTO "care_logs"
+    ("care_setting_id", "date", "fed_morning", "fed_night",
+     "walk_result", "walk_total_distance_m")
+VALUES
+    {values}
+ON CONFLICT ("care_setting_id", "date") DO UPDATE SET
+    "fed_morning" = COALESCE(EXCLUDED."fed_morning", "care_logs"."fed_morning"),
+    "fed_night" = COALESCE(EXCLUDED."fed_night", "care_logs"."fed_night"),
+    "walk_result" = COALESCE(EXCLUDED."walk_result", "care_logs"."walk_result"),
+    "walk_total_distance_m" = COALESCE(
+        EXCLUDED."walk_total_distance_m", "care_logs"."walk_total_distance_m"
+    )
+RETURNING "id", "care_setting_id", "date", "fed_morning", "fed_night",
+    "walk_result", "walk_total_distance_m", "created_at"
+"""
+
+
+def care_upsert_params(
+    care_setting_id: int, log_date: date, fields: CareLogUpdateRequest
+) -> tuple[Any, ...]:
+    """build_upsert_care_logs_sql() の1行分のパラメータを返す"""
+    return (
+        care_setting_id,
+        log_date.isoformat(),
+        fields.fed_morning,
+        fields.fed_night,
+        fields.walk_result,
+        fields.walk_total_distance_m,
+    )
+
+
+UPSERT_CARE_LOG_SQL = build_upsert_care_logs_sql(1)
+
+
+async def find_care_log_by_date(care_setting_id: int, log_date: date):
+    """指定日の care_log を取得する（なければ None）"""
+    where_clause: Any = {
+        "care_setting_id": care_setting_id,
+        "date": to_db_date(log_date),
+    }
+    return await prisma_client.care_logs.find_first(where=where_clause)
+
+
+def to_today_response(care_log) -> CareLogTodayResponse:
+    """care_log を今日・指定日の記録レスポンスに変換する（記録がなければ未実施扱い）"""
+    if not care_log:
+        return CareLogTodayResponse(
+            care_log_id=None,
+            fed_morning=False,
+            fed_night=False,
+            walked=False,
+        )
+    return CareLogTodayResponse(
+        care_log_id=care_log.id,
+        fed_morning=care_log.fed_morning or False,
+        fed_night=care_log.fed_night or False,
+        walked=care_log.walk_result or False,
+    )
+
+
+def encode_list_cursor(log_date: date, care_log_id: int) -> str:
+    """一覧の続きを取得するためのカーソル（最後の行の (date, id)）を作る"""
+    payload = json.dumps({"date": log_date.isoformat(), "id": care_log_id})
+    return base64.urlsafe_b64encode(payload.encode("utf-8")).decode("ascii")
+
+
+def decode_list_cursor(cursor: str) -> tuple[date, int]:
+    """カーソルを (date, id) に戻す（不正な値は ValueError）"""
+    try:
+        payload = json.loads(base64.urlsafe_b64decode(cursor.encode("ascii")))
+        return date.fromisoformat(payload["date"]), int(payload["id"])
+    except (ValueError, KeyError, TypeError) as e:
+        raise ValueError("cursor の形式が不正です") from e
+
+
+def parse_list_fields(fields: Optional[str]) -> tuple[str, ...]:
+    """fields=（カンマ区切り）を検証し、取得する列名のタプルを返す"""
+    selected = tuple(
+        dict.fromkeys(f.strip() for f in (fields or "").split(",") if f.strip())
+    )
+    if not selected:
+        return DEFAULT_LIST_FIELDS
+    unknown = [f for f in selected if f not in CARE_LOG_LIST_FIELDS]
+    if unknown:
+        raise ValueError(f"不正な fields です: {','.join(unknown)}")
+    return selected
+
+
+def build_care_logs_list_query(
+    care_setting_id: int,
+    selected_fields: tuple[str, ...],
+    date_from: Optional[date] = None,
+    date_to: Optional[date] = None,
+    after: Optional[tuple[date, int]] = None,
+    limit: Optional[int] = None,
+) -> tuple[str, list[Any]]:
+    """GET /list のSQLとパラメータを組み立てる
+
+    (date, id) の昇順で読み、after（カーソル）より後の行だけを返す。
+    limit 指定時は続きがあるかを判定するため1件多く読む
+    """
+    # カーソル作成のため date / id は常に読む（列名は許可リストから組み立てる）
+    columns = ", ".join(
+        f'"{column}"' for column in dict.fromkeys(("id", "date") + selected_fields)
+    )
+    conditions = ['"care_setting_id" = $1']
+    params: list[Any] = [care_setting_id]
+    if date_from:
+        params.append(date_from.isoformat())
+        conditions.append(f'"date" >= ${len(params)}::date')
+    if date_to:
+        params.append(date_to.isoformat())
+        conditions.append(f'"date" <= ${len(params)}::date')
+    if after:
+        params.extend([after[0].isoformat(), after[1]])
+        conditions.append(
+            f'("date", "id") > (${len(params) - 1}::date, ${len(params)}::integer)'
+        )
+    query = (
+        f'SELECT {columns} FROM "care_logs" WHERE {" AND ".join(conditions)} '
+        'ORDER BY "date" ASC, "id" ASC'
+    )
+    if limit:
+        params.append(limit + 1)
+        query += f" LIMIT ${len(params)}"
+    return query, params
+
+
 @care_logs_router.patch(
     "/{care_log_id}",
     response_model=CareLogResponse,
@@ -31,7 +193,7 @@ care_logs_router = APIRouter(prefix="/api/care_logs", tags=["care_logs"])
 async def update_care_log(
     care_log_id: int,
     request: CareLogUpdateRequest,
-    firebase_uid: str = Depends(verify_firebase_token),
+    identity: RequestIdentity | None = Depends(get_request_identity),
 ):
     """
     お世話記録の更新API（fed_morning / fed_night / walk_result の部分更新）
@@ -39,10 +201,14 @@ async def update_care_log(
     try:
         print(f"[care_logs] PATCH受信: care_log_id={care_log_id}, request={request}")
 
-        # care_log_id と firebase_uid が紐づくかチェック（不正なIDで他人のログ更新を防ぐ）
+        if not identity or identity.care_setting_id is None:
+            print(f"[care_logs] care_log not found or not authorized: {care_log_id}")
+            raise HTTPException(status_code=404, detail="Care log not found")
+
+        # care_log_id と本人の care_setting が紐づくかチェック（他人のログ更新を防ぐ）
         where_clause: Any = {
             "id": care_log_id,
-            "care_setting": {"user": {"firebase_uid": firebase_uid}},
+            "care_setting_id": identity.care_setting_id,
         }
         existing_log = await prisma_client.care_logs.find_first(where=where_clause)
 
@@ -62,6 +228,7 @@ async def update_care_log(
         )
 
         print(f"[care_logs] 更新成功: {updated_log.id if updated_log else 'Unknown'}")
+        await invalidate_tags(care_setting_tag(identity.care_setting_id))
         return updated_log
 
     except HTTPException:
@@ -74,6 +241,128 @@ async def update_care_log(
         ) from e
 
 
+# PUT /api/care_logs/{date} のルーター
+@care_logs_router.put(
+    "/{log_date}",
+    response_model=CareLogResponse,
+    status_code=status.HTTP_200_OK,
+)
+async def upsert_care_log(
+    log_date: date,
+    request: CareLogUpdateRequest,
+    identity: RequestIdentity | None = Depends(get_request_identity),
+):
+    """
+    指定日のお世話記録を作成または更新するAPI（送られた項目だけをマージ）
+
+    POST → 400 → PATCH → GET today の流れを1リクエスト・1クエリにまとめたもの。
+    INSERT ... ON CONFLICT DO UPDATE で保存するため、同時に送られても重複行はできない
+    """
+    try:
+        if not identity:
+            raise HTTPException(status_code=401, detail="ユーザーが存在しません")
+        print(
+            f"[care_logs] PUT受信: firebase_uid={identity.firebase_uid}, "
+            f"date={log_date}, request={request}"
+        )
+
+        if identity.care_setting_id is None:
+            raise HTTPException(status_code=404, detail="Care setting not found")
+
+        merged_log = await prisma_client.query_first(
+            UPSERT_CARE_LOG_SQL,
+            *care_upsert_params(identity.care_setting_id, log_date, request),
+        )
+
+        print(f"[care_logs] PUT保存成功: {merged_log['id']}")
+        await invalidate_tags(care_setting_tag(identity.care_setting_id))
+        return merged_log
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        print(f"[care_logs] PUT エラー詳細: {type(e).__name__}: {e}")
+        raise HTTPException(
+            status_code=500, detail="お世話記録の保存中にエラーが発生しました"
+        ) from e
+
+
+# POST /api/care_logs/batch のルーター（オフライン中に溜まった操作の一括同期用）
+@care_logs_router.post(
+    "/batch",
+    response_model=CareLogBatchResponse,
+    status_code=status.HTTP_200_OK,
+)
+async def sync_care_logs_batch(
+    request: CareLogBatchRequest,
+    identity: RequestIdentity | None = Depends(get_request_identity),
+):
+    """
+    複数日の差分（{date, fields}）をまとめて保存し、項目ごとの結果を返すAPI
+
+    - 同じ日付の差分は送られた順にマージ（後の値を優先）してから保存する
+    - 全件を1文の INSERT ... ON CONFLICT DO UPDATE で保存するため、
+      途中で失敗した場合はどの日付も保存されない
+    """
+    try:
+        if not identity:
+            raise HTTPException(status_code=401, detail="ユーザーが存在しません")
+        print(
+            f"[care_logs] POST batch受信: firebase_uid={identity.firebase_uid}, "
+            f"件数={len(request.items)}"
+        )
+
+        if identity.care_setting_id is None:
+            raise HTTPException(status_code=404, detail="Care setting not found")
+
+        # 同じ日付を1行にまとめないと ON CONFLICT が同じ行を2回更新しようとして失敗する
+        merged: dict[date, CareLogUpdateRequest] = {}
+        for item in request.items:
+            current = merged.get(item.date)
+            if current is None:
+                merged[item.date] = item.fields
+            else:
+                merged[item.date] = current.model_copy(
+                    update=item.fields.model_dump(exclude_none=True)
+                )
+
+        params: list[Any] = []
+        for log_date, fields in merged.items():
+            params.extend(
+                care_upsert_params(identity.care_setting_id, log_date, fields)
+            )
+        saved_logs = await prisma_client.query_raw(
+            build_upsert_care_logs_sql(len(merged)), *params
+        )
+
+        # RETURNING の順序は保証されないため日付で引き当てる
+        saved_by_date = {
+            care_log.date: care_log
+            for care_log in map(CareLogResponse.model_validate, saved_logs)
+        }
+        results = [
+            {
+                "index": index,
+                "date": item.date,
+                "status": "applied",
+                "care_log": saved_by_date[item.date],
+            }
+            for index, item in enumerate(request.items)
+        ]
+
+        print(f"[care_logs] POST batch保存成功: {len(saved_logs)}日分")
+        await invalidate_tags(care_setting_tag(identity.care_setting_id))
+        return {"results": results}
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        print(f"[care_logs] POST batch エラー詳細: {type(e).__name__}: {e}")
+        raise HTTPException(
+            status_code=500, detail="お世話記録の一括保存中にエラーが発生しました"
+        ) from e
+
+
 # POST /api/care_logs のルーター
 @care_logs_router.post(
     "",
@@ -81,34 +370,30 @@ async def update_care_log(
     status_code=status.HTTP_201_CREATED,
 )
 async def create_care_log(
-    request: CareLogCreateRequest, firebase_uid: str = Depends(verify_firebase_token)
+    request: CareLogCreateRequest,
+    identity: RequestIdentity | None = Depends(get_request_identity),
 ):
     """
     お世話記録の新規作成API
     ※ 通常は1日1件。重複記録は不可（エラー返却）
     """
     try:
-        print(f"[care_logs] POST受信: firebase_uid={firebase_uid}, request={request}")
-
-        # UID → users.id を取得
-        user = await prisma_client.users.find_unique(
-            where={"firebase_uid": firebase_uid}
-        )
-        if not user:
+        # UID → users.id / care_setting は依存関係で解決済み
+        if not identity:
             raise HTTPException(status_code=401, detail="ユーザーが存在しません")
-
-        # 対象ユーザーの care_setting を取得
-        where_clause_setting: Any = {"user_id": user.id}
-        care_setting = await prisma_client.care_settings.find_first(
-            where=where_clause_setting
+        print(
+            f"[care_logs] POST受信: firebase_uid={identity.firebase_uid}, "
+            f"request={request}"
         )
-        if not care_setting:
+
+        # 対象ユーザーの care_setting を確認
+        if identity.care_setting_id is None:
             raise HTTPException(status_code=404, detail="Care setting not found")
 
         # 同じ日付の記録がすでにあるかチェック
         where_clause_existing: Any = {
-            "care_setting_id": care_setting.id,
-            "date": request.date,
+            "care_setting_id": identity.care_setting_id,
+            "date": to_db_date(request.date),
         }
         existing_log = await prisma_client.care_logs.find_first(
             where=where_clause_existing
@@ -122,16 +407,11 @@ async def create_care_log(
             )
 
         # 新規作成
-        print(f"[care_logs] POST受信: firebase_uid={firebase_uid}, request={request}")
         print(f"[care_logs] 新規記録作成: request={request}, date={request.date}")
-        dt = datetime.fromisoformat(request.date)
-        print(f"[care_logs] 日付変換成功: {dt}")
-        formatted_date = dt.strftime("%Y-%m-%d")
-        print(f"[care_logs] フォーマット済み日付: {formatted_date}")
         new_log = await prisma_client.care_logs.create(
             data={
-                "care_setting_id": care_setting.id,
-                "date": formatted_date,  # そのまま文字列で保存
+                "care_setting_id": identity.care_setting_id,
+                "date": to_db_date(request.date),  # DATE 型で保存
                 "fed_morning": request.fed_morning,
                 "fed_night": request.fed_night,
                 "walk_result": request.walk_result,
@@ -140,6 +420,7 @@ async def create_care_log(
         )
 
         print(f"[care_logs] 新規記録作成成功: {new_log.id}")
+        await invalidate_tags(care_setting_tag(identity.care_setting_id))
         return new_log
 
     except HTTPException:
@@ -157,10 +438,16 @@ async def create_care_log(
     response_model=CareLogTodayResponse,
     status_code=status.HTTP_200_OK,
 )
+@cached_route(
+    "care_logs_today",
+    expire=60,  # ミッション画面のポーリング対策（書き込み時は即時無効化）
+    tags=lambda care_setting_id, **_: [care_setting_tag(care_setting_id)],
+    etag=True,  # 変化がなければ 304 を返す
+)
 async def get_today_care_log(
     care_setting_id: int = Query(...),
-    date: str = Query(...),
-    firebase_uid: str = Depends(verify_firebase_token),
+    log_date: date = Query(..., alias="date"),
+    identity: RequestIdentity | None = Depends(get_request_identity),
 ):
     """
     指定日付文字列（例: "2025-07-01"）のお世話記録と散歩タスク完了状況を取得するAPI
@@ -168,45 +455,23 @@ async def get_today_care_log(
     try:
         print(
             f"[care_logs] GET today受信: "
-            f"care_setting_id={care_setting_id}, firebase_uid={firebase_uid}"
+            f"care_setting_id={care_setting_id}, "
+            f"firebase_uid={identity.firebase_uid if identity else None}"
         )
-        print(f"[care_logs] 検索日付: {date}")
+        print(f"[care_logs] 検索日付: {log_date}")
 
-        # care_setting_id が本人のものか確認
-        where_clause_auth: Any = {
-            "id": care_setting_id,
-            "user": {"firebase_uid": firebase_uid},
-        }
-        care_setting = await prisma_client.care_settings.find_first(
-            where=where_clause_auth
-        )
-        if not care_setting:
+        # care_setting_id が本人のものか確認（解決済みのidentityと照合する）
+        if not identity or not identity.owns_care_setting(care_setting_id):
             raise HTTPException(status_code=403, detail="不正な care_setting_id です")
 
         # 今日の care_log を取得
-        where_clause_today: Any = {
-            "care_setting_id": care_setting_id,
-            "date": date,
-        }
-        care_log = await prisma_client.care_logs.find_first(where=where_clause_today)
+        care_log = await find_care_log_by_date(care_setting_id, log_date)
 
         if not care_log:
             print("[care_logs] 今日の記録なし、デフォルト値で返却")
-            return CareLogTodayResponse(
-                care_log_id=None,
-                fed_morning=False,
-                fed_night=False,
-                walked=False,
-            )
-        print(
-            f"[care_logs] 今日の記録取得成功: {care_log.id if care_log else 'Unknown'}"
-        )
-        return CareLogTodayResponse(
-            care_log_id=care_log.id if care_log else None,
-            fed_morning=care_log.fed_morning or False,
-            fed_night=care_log.fed_night or False,
-            walked=care_log.walk_result or False,
-        )
+        else:
+            print(f"[care_logs] 今日の記録取得成功: {care_log.id}")
+        return to_today_response(care_log)
 
     except HTTPException:
         raise
@@ -230,8 +495,8 @@ async def get_today_care_log(
 # 直接影響するため、リアルタイムでの正確な情報が重要
 async def get_care_log_by_date(
     care_setting_id: int = Query(...),
-    date: str = Query(...),
-    firebase_uid: str = Depends(verify_firebase_token),
+    log_date: date = Query(..., alias="date"),
+    identity: RequestIdentity | None = Depends(get_request_identity),
 ):
     """
     指定日付文字列（例: "2025-07-01"）のお世話記録を取得するAPI
@@ -240,42 +505,18 @@ async def get_care_log_by_date(
     try:
         print(
             f"[care_logs] GET by_date受信: "
-            f"care_setting_id={care_setting_id}, firebase_uid={firebase_uid}"
+            f"care_setting_id={care_setting_id}, "
+            f"firebase_uid={identity.firebase_uid if identity else None}"
         )
-        print(f"[care_logs] 検索日付: {date}")
+        print(f"[care_logs] 検索日付: {log_date}")
 
-        # care_setting_id が本人のものか確認
-        where_clause_auth_by_date: Any = {
-            "id": care_setting_id,
-            "user": {"firebase_uid": firebase_uid},
-        }
-        care_setting = await prisma_client.care_settings.find_first(
-            where=where_clause_auth_by_date
-        )
-        if not care_setting:
+        # care_setting_id が本人のものか確認（解決済みのidentityと照合する）
+        if not identity or not identity.owns_care_setting(care_setting_id):
             raise HTTPException(status_code=403, detail="不正な care_setting_id です")
 
         # 該当日の care_log を取得
-        where_clause_by_date: Any = {
-            "care_setting_id": care_setting_id,
-            "date": date,
-        }
-        care_log = await prisma_client.care_logs.find_first(where=where_clause_by_date)
-
-        if not care_log:
-            return CareLogTodayResponse(
-                care_log_id=None,
-                fed_morning=False,
-                fed_night=False,
-                walked=False,
-            )
-
-        return CareLogTodayResponse(
-            care_log_id=care_log.id if care_log else None,
-            fed_morning=care_log.fed_morning or False,
-            fed_night=care_log.fed_night or False,
-            walked=care_log.walk_result or False,
-        )
+        care_log = await find_care_log_by_date(care_setting_id, log_date)
+        return to_today_response(care_log)
     except HTTPException:
         raise
     except Exception as e:
@@ -286,9 +527,10 @@ async def get_care_log_by_date(
         ) from e
 
 
-# GET /api/care_logs/list のルーター（特定care_setting_idの全care_logs取得用）
+# GET /api/care_logs/list のルーター（特定care_setting_idのcare_logs取得用）
 @care_logs_router.get(
     "/list",
+    response_model=CareLogListResponse,
     status_code=status.HTTP_200_OK,
 )
 # NOTE: このエンドポイントにはキャッシュを適用しない
@@ -297,52 +539,69 @@ async def get_care_log_by_date(
 # キャッシュがあると最新のcare_logs情報が反映されず、反省文の判定に影響する
 async def get_care_logs_list(
     care_setting_id: int = Query(...),
-    firebase_uid: str = Depends(verify_firebase_token),
+    date_from: Optional[date] = Query(None, alias="from"),
+    date_to: Optional[date] = Query(None, alias="to"),
+    cursor: Optional[str] = Query(None),
+    limit: Optional[int] = Query(None, ge=1, le=MAX_LIST_LIMIT),
+    fields: Optional[str] = Query(None),
+    identity: RequestIdentity | None = Depends(get_request_identity),
 ):
     """
-    特定care_setting_idの全care_logsを取得するAPI
+    特定care_setting_idのcare_logsを日付の昇順で取得するAPI
+
+    - from / to: 日付範囲で絞り込む（どちらも含む）
+    - limit / cursor: (date, id) のキーセットページング。続きがある場合は next_cursor を返す
+      （limit 未指定時は従来どおり全件）
+    - fields: 取得する列（カンマ区切り）。指定した列だけをDBから読む
+      （未指定時は id, date, walk_result, care_setting_id）
 
     主な用途：
     - 管理者画面での反省文機能（admin/reflections）
     """
 
     try:
-        print(f"[care_logs] GET list受信: care_setting_id={care_setting_id}")
-
-        # care_setting_id が本人のものか確認
-        where_clause_auth_list: Any = {
-            "id": care_setting_id,
-            "user": {"firebase_uid": firebase_uid},
-        }
-        care_setting = await prisma_client.care_settings.find_first(
-            where=where_clause_auth_list
+        print(
+            f"[care_logs] GET list受信: care_setting_id={care_setting_id}, "
+            f"from={date_from}, to={date_to}, cursor={cursor}, limit={limit}, "
+            f"fields={fields}"
         )
-        if not care_setting:
+
+        try:
+            selected_fields = parse_list_fields(fields)
+            after = decode_list_cursor(cursor) if cursor else None
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e)) from e
+        if date_from and date_to and date_from > date_to:
+            raise HTTPException(
+                status_code=400, detail="from は to 以前の日付を指定してください"
+            )
+
+        # care_setting_id が本人のものか確認（解決済みのidentityと照合する）
+        if not identity or not identity.owns_care_setting(care_setting_id):
             raise HTTPException(status_code=403, detail="不正な care_setting_id です")
 
-        # 全care_logsを取得
-        where_clause_list: Any = {"care_setting_id": care_setting_id}
-        care_logs = await prisma_client.care_logs.find_many(
-            where=where_clause_list,
-            order={"date": "asc"},
+        query, params = build_care_logs_list_query(
+            care_setting_id, selected_fields, date_from, date_to, after, limit
         )
+        rows = await prisma_client.query_raw(query, *params)
+
+        next_cursor = None
+        if limit and len(rows) > limit:
+            rows = rows[:limit]
+            last = rows[-1]
+            next_cursor = encode_list_cursor(
+                parse_care_log_date(last["date"]), last["id"]
+            )
 
-        print(f"[care_logs] 取得したcare_logs数: {len(care_logs)}")
+        print(f"[care_logs] 取得したcare_logs数: {len(rows)}")
 
-        # 必要な情報のみ返却
+        # 指定された列のみ返却（date は "YYYY-MM-DD"）
         result = []
-        for log in care_logs:
-            if log and log.id is not None:  # Type safety check
-                result.append(
-                    {
-                        "id": log.id,
-                        "date": log.date,
-                        "walk_result": log.walk_result,
-                        "care_setting_id": log.care_setting_id,
-                    }
-                )
+        for row in rows:
+            row["date"] = parse_care_log_date(row["date"]).isoformat()
+            result.append({field: row[field] for field in selected_fields})
 
-        return {"care_logs": result}
+        return {"care_logs": result, "next_cursor": next_cursor}
 
     except HTTPException:
         raise
@@ -352,3 +611,66 @@ async def get_care_logs_list(
             status_code=500,
             detail="care_logs一覧取得中にエラーが発生しました",
         ) from e
+
+
+# GET /api/care_logs/range のルーター（日付範囲のcare_logs取得用）
+@care_logs_router.get(
+    "/range",
+    response_model=CareLogRangeResponse,
+    status_code=status.HTTP_200_OK,
+)
+# NOTE: このエンドポイントにはキャッシュを適用しない（/list と同じ理由）
+async def get_care_logs_by_range(
+    care_setting_id: int = Query(...),
+    date_from: date = Query(..., alias="from"),
+    date_to: date = Query(..., alias="to"),
+    identity: RequestIdentity | None = Depends(get_request_identity),
+):
+    """
+    指定した日付範囲（from / to を含む）のお世話記録を日付の昇順で取得するAPI
+
+    (care_setting_id, date) のユニークインデックスの範囲検索になるため、
+    記録期間が長くても対象期間の行だけを読む
+    """
+
+    try:
+        print(
+            f"[care_logs] GET range受信: care_setting_id={care_setting_id}, "
+            f"from={date_from}, to={date_to}"
+        )
+
+        try:
+            date_range = CareLogDateRange.model_validate(
+                {"from": date_from, "to": date_to}
+            )
+        except ValidationError as e:
+            message = e.errors()[0]["msg"].removeprefix("Value error, ")
+            raise HTTPException(status_code=400, detail=message) from e
+
+        # care_setting_id が本人のものか確認（解決済みのidentityと照合する）
+        if not identity or not identity.owns_care_setting(care_setting_id):
+            raise HTTPException(status_code=403, detail="不正な care_setting_id です")
+
+        where_clause_range: Any = {
+            "care_setting_id": care_setting_id,
+            "date": {
+                "gte": to_db_date(date_range.date_from),
+                "lte": to_db_date(date_range.date_to),
+            },
+        }
+        care_logs = await prisma_client.care_logs.find_many(
+            where=where_clause_range,
+            order={"date": "asc"},
+        )
+
+        print(f"[care_logs] 取得したcare_logs数: {len(care_logs)}")
+        return {"care_logs": care_logs}
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        print(f"[care_logs] GET range エラー詳細: {type(e).__name__}: {e}")
+        raise HTTPException(
+            status_code=500,
+            detail="指定期間の記録取得中にエラーが発生しました",
+        ) from e
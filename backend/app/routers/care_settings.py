@@ -17,14 +17,66 @@ from app.schemas.care_settings import (
     VerifyPinResponse,
 )
 
-from app.dependencies import verify_firebase_token
+from app.dependencies import RequestIdentity, get_request_identity
+from app.services.identity_cache import invalidate_identity
+from app.services.route_cache import bump_versions, cached_route, user_tag
 
-# NOTE: キャッシュ機能は使用していません
+# NOTE: キャッシュは GET /me のみ（本人の firebase_uid 単位、設定の書き込みでバージョンを進める）
 # 理由: ユーザー個人の設定情報は即時性とセキュリティが重要なため
 
 care_settings_router = APIRouter(prefix="/api/care_settings", tags=["care_settings"])
 
 
+async def load_care_setting(identity: RequestIdentity):
+    """
+    identity に紐づくお世話設定レコードを主キーで取得する
+    （identity はIDのみを持つ。未登録の場合はNone）
+    """
+    if identity.care_setting_id is None:
+        return None
+    return await prisma_client.care_settings.find_unique(
+        where={"id": identity.care_setting_id}
+    )
+
+
+def to_me_response(care_setting) -> CareSettingMeResponse:
+    """
+    お世話設定レコードを GET /api/care_settings/me のレスポンス形式に変換する
+    （GET /api/dashboard からも使う）
+    """
+    return CareSettingMeResponse(
+        id=care_setting.id or 0,
+        parent_name=care_setting.parent_name or "",
+        child_name=care_setting.child_name or "",
+        dog_name=care_setting.dog_name or "",
+        care_start_date=(
+            care_setting.care_start_date.date()
+            if care_setting.care_start_date
+            else datetime.now().date()
+        ),
+        care_end_date=(
+            care_setting.care_end_date.date()
+            if care_setting.care_end_date
+            else datetime.now().date()
+        ),
+        morning_meal_time=(
+            care_setting.morning_meal_time.time()
+            if care_setting.morning_meal_time
+            else datetime.now().time()
+        ),
+        night_meal_time=(
+            care_setting.night_meal_time.time()
+            if care_setting.night_meal_time
+            else datetime.now().time()
+        ),
+        walk_time=(
+            care_setting.walk_time.time()
+            if care_setting.walk_time
+            else datetime.now().time()
+        ),
+    )
+
+
 # POST/api/care_settingsのルーター
 @care_settings_router.post(
     "",
@@ -33,23 +85,20 @@ care_settings_router = APIRouter(prefix="/api/care_settings", tags=["care_settin
 )
 async def create_care_setting(
     request: CareSettingCreateRequest,
-    firebase_uid: str = Depends(verify_firebase_token),
+    identity: RequestIdentity | None = Depends(get_request_identity),
 ):
     """
     お世話設定の新規作成API
     """
     try:
-        # Firebase UIDからユーザー取得
-        user = await prisma_client.users.find_unique(
-            where={"firebase_uid": firebase_uid}
-        )
-        if not user:
+        # Firebase UIDからユーザー取得（依存関係で解決済み）
+        if not identity:
             raise HTTPException(status_code=404, detail="User not found")
 
         # ケア設定を作成
         care_setting = await prisma_client.care_settings.create(
             data={
-                "user_id": user.id,
+                "user_id": identity.user_id,
                 "parent_name": request.parent_name,
                 "child_name": request.child_name,
                 "dog_name": request.dog_name,
@@ -69,6 +118,10 @@ async def create_care_setting(
             }
         )
 
+        # care_setting_id が変わるため identity キャッシュを破棄し、/me のバージョンを進める
+        await invalidate_identity(identity.firebase_uid)
+        await bump_versions(user_tag(identity.firebase_uid))
+
         return CareSettingCreateResponse(
             id=care_setting.id or 0,
             user_id=care_setting.user_id or "",
@@ -120,67 +173,39 @@ async def create_care_setting(
     response_model=CareSettingMeResponse,
     status_code=status.HTTP_200_OK,
 )
-# NOTE: このエンドポイントにはキャッシュを適用しない
+# NOTE: キャッシュは本人の firebase_uid 単位で分け、キーにユーザーごとのバージョン番号を含める
+# （設定を書き込むAPIは必ず bump_versions(user_tag(firebase_uid)) を呼ぶこと）
 # 理由：
 # 1. ユーザー個人の設定情報のためリアルタイムでの取得が重要
 # 2. 設定変更後すぐに最新情報が必要（feeding times, walk times等）
-# 3. セキュリティ上、個人情報のキャッシュは避ける
+# 3. セキュリティ上、他ユーザーとキーを共有しない
 # 4. care_logs作成時の基準となる重要な情報のため正確性が必須
-async def get_my_care_setting(firebase_uid: str = Depends(verify_firebase_token)):
+@cached_route(
+    "care_settings_me",
+    expire=3600,  # 書き込み時はバージョンで切り替わるため長めにする
+    versions=lambda identity, **_: [user_tag(identity.firebase_uid)],
+    etag=True,  # 変化がなければ 304 を返す
+)
+async def get_my_care_setting(
+    identity: RequestIdentity | None = Depends(get_request_identity),
+):
     """
     ログインユーザーのケア設定取得API
     """
 
     try:
-        print(" firebase_uid:", firebase_uid)
-        # Firebase UID からユーザー取得
-        user = await prisma_client.users.find_unique(
-            where={"firebase_uid": firebase_uid}
-        )
-        if not user:
+        # Firebase UID からユーザー・ケア設定を解決済み
+        if not identity:
             raise HTTPException(status_code=404, detail="User not found")
+        print(" firebase_uid:", identity.firebase_uid)
 
-        # 該当ユーザーのケア設定を取得
-        care_setting = await prisma_client.care_settings.find_first(
-            where={"user_id": user.id}
-        )
-
+        care_setting = await load_care_setting(identity)
         print(" care_setting:", care_setting)
 
         if not care_setting:
             raise HTTPException(status_code=404, detail="Care setting not found")
 
-        return CareSettingMeResponse(
-            id=care_setting.id or 0,
-            parent_name=care_setting.parent_name or "",
-            child_name=care_setting.child_name or "",
-            dog_name=care_setting.dog_name or "",
-            care_start_date=(
-                care_setting.care_start_date.date()
-                if care_setting.care_start_date
-                else datetime.now().date()
-            ),
-            care_end_date=(
-                care_setting.care_end_date.date()
-                if care_setting.care_end_date
-                else datetime.now().date()
-            ),
-            morning_meal_time=(
-                care_setting.morning_meal_time.time()
-                if care_setting.morning_meal_time
-                else datetime.now().time()
-            ),
-            night_meal_time=(
-                care_setting.night_meal_time.time()
-                if care_setting.night_meal_time
-                else datetime.now().time()
-            ),
-            walk_time=(
-                care_setting.walk_time.time()
-                if care_setting.walk_time
-                else datetime.now().time()
-            ),
-        )
+        return to_me_response(care_setting)
 
     except HTTPException:
         raise
@@ -198,21 +223,16 @@ async def get_my_care_setting(firebase_uid: str = Depends(verify_firebase_token)
 )
 async def verify_care_setting_pin(
     request: VerifyPinRequest,
-    firebase_uid: str = Depends(verify_firebase_token),
+    identity: RequestIdentity | None = Depends(get_request_identity),
 ):
     """
     管理者PINの新規登録API
     """
     try:
-        user = await prisma_client.users.find_unique(
-            where={"firebase_uid": firebase_uid}
-        )
-        if not user:
+        if not identity:
             raise HTTPException(status_code=404, detail="User not found")
 
-        care_setting = await prisma_client.care_settings.find_first(
-            where={"user_id": user.id}
-        )
+        care_setting = await load_care_setting(identity)
         if not care_setting:
             return VerifyPinResponse(verified=False)
 
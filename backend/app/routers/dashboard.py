@@ -0,0 +1,84 @@
+"""ダッシュボード（dashboard）APIルーターの定義"""
+
+# 標準ライブラリ
+import asyncio
+from datetime import date, datetime, timedelta, timezone
+from typing import Optional
+
+# サードパーティライブラリ
+from fastapi import APIRouter, HTTPException, status, Query, Depends
+
+# ローカルアプリケーション
+from app.dependencies import RequestIdentity, get_request_identity
+from app.routers.care_logs import find_care_log_by_date, to_today_response
+from app.routers.care_settings import load_care_setting, to_me_response
+from app.routers.message_logs import generate_dog_message
+from app.schemas.dashboard import DashboardResponse
+
+# NOTE: キャッシュ機能は使用していません
+# 理由: お世話記録（care_logs）と同じく即時性が重要なため
+
+dashboard_router = APIRouter(prefix="/api/dashboard", tags=["dashboard"])
+
+# フロントエンドと同じく日本時間（UTC+9）で「今日」を決める
+JST = timezone(timedelta(hours=9))
+
+
+# GET /api/dashboard のルーター
+@dashboard_router.get(
+    "",
+    response_model=DashboardResponse,
+    status_code=status.HTTP_200_OK,
+)
+async def get_dashboard(
+    date_param: Optional[date] = Query(None, alias="date"),
+    identity: RequestIdentity | None = Depends(get_request_identity),
+):
+    """
+    ダッシュボードの初期表示に必要な情報をまとめて取得するAPI
+
+    /api/care_settings/me・/api/care_logs/today・/api/care_logs/by_date（昨日）・
+    /api/message_logs/generate を1リクエストにまとめたもの。
+    identity は1回だけ解決し、各データは asyncio.gather で並行に取得する。
+    date 未指定時は日本時間の今日を使う
+    """
+    try:
+        # Firebase UID からユーザー・ケア設定を解決済み
+        if not identity:
+            raise HTTPException(status_code=404, detail="User not found")
+        if identity.care_setting_id is None:
+            raise HTTPException(status_code=404, detail="Care setting not found")
+
+        today = date_param or datetime.now(JST).date()
+        yesterday = today - timedelta(days=1)
+        print(
+            f"[dashboard] GET受信: firebase_uid={identity.firebase_uid}, "
+            f"care_setting_id={identity.care_setting_id}, date={today}"
+        )
+
+        care_setting, today_log, yesterday_log, message = await asyncio.gather(
+            load_care_setting(identity),
+            find_care_log_by_date(identity.care_setting_id, today),
+            find_care_log_by_date(identity.care_setting_id, yesterday),
+            generate_dog_message(identity),
+        )
+
+        if not care_setting:
+            raise HTTPException(status_code=404, detail="Care setting not found")
+
+        return DashboardResponse(
+            date=today,
+            care_setting=to_me_response(care_setting),
+            today=to_today_response(today_log),
+            yesterday=to_today_response(yesterday_log),
+            message=message,
+        )
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        print(f"[dashboard] GET エラー詳細: {type(e).__name__}: {e}")
+        raise HTTPException(
+            status_code=500,
+            detail="ダッシュボード情報の取得中にエラーが発生しました",
+        ) from e
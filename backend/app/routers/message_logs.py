@@ -3,70 +3,123 @@
 無料プランは固定メッセージ、プレミアムはOpenAIで生成。
 """
 
+import asyncio
 import os
 import random
+from typing import Optional
 from fastapi import APIRouter, HTTPException, Depends
 from fastapi.responses import JSONResponse
-from app.db import prisma_client
-from app.dependencies import verify_firebase_token
-from openai import OpenAI, OpenAIError
+from app.dependencies import RequestIdentity, get_request_identity
+from app.services.message_pool import message_pool
+from app.services.openai_client import get_openai_client, openai_semaphore
+from openai import OpenAIError
 
 message_logs_router = APIRouter(prefix="/api/message_logs", tags=["message_logs"])
 # 無料プランの固定メッセージ
 FREE_PLAN_MESSAGES = ["わん！", "おなかすいたわん！", "おさんぽいくわん！"]
+# プレミアムプランで話すお世話知識のカテゴリ（システムプロンプトの番号）
+DOG_KNOWLEDGE_CATEGORIES = {
+    1: "犬の習性",
+    2: "犬の迷惑なところ",
+    3: "躾しないといけないこと",
+    4: "犬の病気、医学知識",
+}
+# リクエスト内で OpenAI の応答を待つ上限（秒）。超えたら固定メッセージを返す
+OPENAI_MESSAGE_DEADLINE = float(os.getenv("OPENAI_MESSAGE_DEADLINE", "3"))
+
+
+async def request_openai_message(category: int) -> str:
+    """
+    OpenAI APIを呼び出して、指定カテゴリのメッセージを生成する
+
+    Args:
+        category (int): DOG_KNOWLEDGE_CATEGORIES の番号
 
+    Returns:
+        str: 生成されたメッセージ
 
-def get_openai_message() -> str:
+    Raises:
+        OpenAIError: API呼び出しに失敗した場合
+        ValueError: APIキーが未設定、または応答が空の場合
+    """
+    # lifespan で作成した、接続を使い回すクライアント
+    client = get_openai_client()
+    if client is None:
+        raise ValueError("OPENAI_API_KEY が設定されていません")
+
+    response = await client.chat.completions.create(
+        model="gpt-4o-mini",
+        messages=[
+            {
+                "role": "system",
+                "content": (
+                    "あなたは犬のキャラクターです。8歳の子どもに話しかけるようにお世話知識を一言で話して。"
+                    "漢字使用禁止です。"
+                    "「犬は」という主語を使わないでください。"
+                    "飼う前に必ず知っておいて欲しい教育豆知識を教えて下さい。"
+                    "1犬の習性"
+                    "2犬の迷惑なところ"
+                    "3躾しないといけないこと"
+                    "4犬の病気、医学知識"
+                    f"今回は「{category}」番のことを1つだけ話してほしいです。"
+                    "条件"
+                    "お散歩以外の豆知識を順番に出してください。"
+                    "ひらがな厳守"
+                    "語尾には「〜だわん」「〜するわん」など犬っぽい言い方を必ずつけてください。"
+                    "20文字以内の一文で答えてください。"
+                    "「犬は」と冒頭につけないでください。"
+                ),
+            },
+        ],
+        max_tokens=30,
+        temperature=0.8,
+    )
+
+    message = response.choices[0].message.content
+    if message:
+        return message.strip()
+
+    raise ValueError("OpenAIからの応答が空です")
+
+
+async def generate_pool_message(category: int) -> str:
+    """
+    メッセージプールの補充用に1件生成する（失敗時は例外を投げる）
+
+    リクエストからの呼び出しと同じ同時実行数の上限を使い、空きが出るまで待つ
+    """
+    async with openai_semaphore:
+        return await request_openai_message(category)
+
+
+async def get_openai_message(category: Optional[int] = None) -> str:
     """
     OpenAI APIを呼び出してメッセージを生成する
 
+    同時実行数の上限に達している場合や、OPENAI_MESSAGE_DEADLINE 秒以内に
+    応答がない場合は、待たずに固定メッセージを返す
+
+    Args:
+        category (Optional[int]): カテゴリの番号（未指定ならランダム）
+
     Returns:
-        str: 生成されたメッセージ
+        str: 生成されたメッセージ（失敗した場合は固定メッセージ）
     """
-    try:
-
-        api_key = os.getenv("OPENAI_API_KEY")
-        if not api_key:
-            raise ValueError("OPENAI_API_KEY が設定されていません")
-
-        # クライアントを明示的に初期化
-        client = OpenAI(api_key=api_key)
-
-        response = client.chat.completions.create(
-            model="gpt-4o-mini",
-            messages=[
-                {
-                    "role": "system",
-                    "content": (
-                        "あなたは犬のキャラクターです。8歳の子どもに話しかけるようにお世話知識を一言で話して。"
-                        "漢字使用禁止です。"
-                        "「犬は」という主語を使わないでください。"
-                        "飼う前に必ず知っておいて欲しい教育豆知識を教えて下さい。"
-                        "1犬の習性"
-                        "2犬の迷惑なところ"
-                        "3躾しないといけないこと"
-                        "4犬の病気、医学知識"
-                        "今回は「{step}」番のことを1つだけ話してほしいです。"
-                        "条件"
-                        "お散歩以外の豆知識を順番に出してください。"
-                        "ひらがな厳守"
-                        "語尾には「〜だわん」「〜するわん」など犬っぽい言い方を必ずつけてください。"
-                        "20文字以内の一文で答えてください。"
-                        "「犬は」と冒頭につけないでください。"
-                    ),
-                },
-            ],
-            max_tokens=30,
-            temperature=0.8,
-            timeout=10,
-        )
-
-        message = response.choices[0].message.content
-        if message:
-            return message.strip()
+    if openai_semaphore.locked():
+        print("OpenAI API 同時実行数の上限に達したため固定メッセージを返します")
+        return random.choice(FREE_PLAN_MESSAGES)
 
-        raise ValueError("OpenAIからの応答が空です")
+    try:
+        if category is None:
+            category = random.choice(list(DOG_KNOWLEDGE_CATEGORIES))
+        async with openai_semaphore:
+            return await asyncio.wait_for(
+                request_openai_message(category), timeout=OPENAI_MESSAGE_DEADLINE
+            )
 
+    except asyncio.TimeoutError:
+        print(f"OpenAI API タイムアウト: {OPENAI_MESSAGE_DEADLINE}秒")
+        return random.choice(FREE_PLAN_MESSAGES)
     except OpenAIError as openai_error:
         print(f"OpenAI API エラー: {openai_error}")
         # エラーが発生した場合は固定メッセージを返す
@@ -76,9 +129,26 @@ def get_openai_message() -> str:
         return random.choice(FREE_PLAN_MESSAGES)
 
 
+async def generate_dog_message(identity: RequestIdentity) -> str:
+    """
+    プランに応じて犬のひとことを返す（GET /api/dashboard からも使う）
+
+    プレミアムプランは message_pool の生成済みメッセージを使う
+    """
+    if identity.current_plan == "premium":
+        # 事前に生成したメッセージがあれば OpenAI の応答を待たずに返す
+        message = await message_pool.pop()
+        if message:
+            return message
+        # プールが空の場合（起動直後・Redis障害時など）はその場でOpenAI APIを使用
+        return await get_openai_message()
+    # 無料プランの場合は固定メッセージからランダム選択
+    return random.choice(FREE_PLAN_MESSAGES)
+
+
 @message_logs_router.post("/generate")
 async def generate_message_log(
-    firebase_uid: str = Depends(verify_firebase_token),
+    identity: RequestIdentity | None = Depends(get_request_identity),
 ) -> JSONResponse:
     """
     犬のひとことを生成して保存し、返すAPI
@@ -86,7 +156,7 @@ async def generate_message_log(
     プレミアムプラン対応：OpenAIで生成。
 
     Args:
-        firebase_uid (str): Firebase認証UID
+        identity (RequestIdentity | None): リクエスト単位で解決済みのユーザー情報
 
     Returns:
         JSONResponse: 生成されたメッセージ
@@ -95,22 +165,13 @@ async def generate_message_log(
         HTTPException: ユーザーが見つからない場合
     """
     try:
-        # firebase_uidからusersテーブルのuserを特定
-        user = await prisma_client.users.find_unique(
-            where={"firebase_uid": firebase_uid}
-        )
-
-        if not user:
+        # firebase_uidから解決済みのユーザー情報を確認
+        if not identity:
             raise HTTPException(
                 status_code=400, detail="指定されたFirebase UIDのユーザーが存在しません"
             )
 
-        if user.current_plan == "premium":
-            # プレミアムプランの場合はOpenAI APIを使用
-            message = get_openai_message()
-        else:
-            # 無料プランの場合は固定メッセージからランダム選択
-            message = random.choice(FREE_PLAN_MESSAGES)
+        message = await generate_dog_message(identity)
 
         return JSONResponse(content={"message": message})
 
@@ -6,8 +6,11 @@ from fastapi.responses import JSONResponse
 
 
 # token追加
-from app.dependencies import verify_firebase_token
-from app.db import prisma_client
+from app.dependencies import (
+    RequestIdentity,
+    get_request_identity,
+    verify_firebase_token,
+)
 
 payment_router = APIRouter(prefix="/api/payments", tags=["payments"])
 
@@ -17,6 +20,7 @@ payment_router = APIRouter(prefix="/api/payments", tags=["payments"])
 @payment_router.post("/create-checkout-session")
 async def create_checkout_session(
     firebase_uid: str = Depends(verify_firebase_token),  # ← サーバー側で安全に取得
+    identity: RequestIdentity | None = Depends(get_request_identity),
 ):
     """
     フロントが呼ぶ「Checkoutセッション作成API」
@@ -25,13 +29,8 @@ async def create_checkout_session(
     try:
         print(f"[INFO] サーバーで取り出したFirebase UID: {firebase_uid}")
 
-        # ユーザー情報をDBから取得
-        user = await prisma_client.users.find_unique(
-            where={"firebase_uid": firebase_uid}
-        )
-
         # 既にプレミアムプランなら弾く
-        if user and user.current_plan == "premium":
+        if identity and identity.current_plan == "premium":
             raise HTTPException(
                 status_code=400,
                 detail="すでにプレミアムプランです。再度の購入は不要です。",
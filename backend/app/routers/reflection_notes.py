@@ -1,6 +1,5 @@
 """反省文のAPIルーター定義"""
 
-import os
 from typing import List
 from fastapi import APIRouter, HTTPException, status, Depends
 from app.db import prisma_client
@@ -10,24 +9,10 @@ from app.schemas.reflection_notes import (
     ReflectionNoteUpdateRequest,
 )
 
-from app.dependencies import verify_firebase_token
+from app.dependencies import RequestIdentity, get_request_identity
 
 # キャッシュ機能のimport
-from fastapi_cache import FastAPICache
-from fastapi_cache.decorator import cache
-
-# テスト環境ではキャッシュを無効化
-ENABLE_CACHE = os.getenv("ENABLE_CACHE", "true").lower() == "true"
-
-# キャッシュデコレータのヘルパー関数
-def cache_if_enabled(**cache_kwargs):
-    """キャッシュが有効な場合のみデコレータを適用"""
-    def decorator(func):
-        if ENABLE_CACHE:
-            return cache(**cache_kwargs)(func)
-        else:
-            return func
-    return decorator
+from app.services.route_cache import cached_route, care_setting_tag, invalidate_tags
 
 # 反省文用のAPIルーターを作成
 reflection_notes_router = APIRouter(
@@ -43,42 +28,31 @@ reflection_notes_router = APIRouter(
 )
 async def create_reflection_note(
     note: ReflectionNoteCreate,
-    firebase_uid: str = Depends(verify_firebase_token),
+    identity: RequestIdentity | None = Depends(get_request_identity),
 ):
     """
     反省文の新規登録API（子ども）
     """
     print("POST 受信:", note)
     try:
-        # Firebase UID からユーザー取得
-        user = await prisma_client.users.find_unique(
-            where={"firebase_uid": firebase_uid}
-        )
-        if not user:
+        # Firebase UID からユーザー・care_setting_id を解決済み
+        if not identity:
             raise HTTPException(status_code=404, detail="ユーザーが見つかりません")
-
-        # care_setting_id を取得
-        care_setting = await prisma_client.care_settings.find_first(
-            where={"user_id": user.id}
-        )
-        if not care_setting:
+        if identity.care_setting_id is None:
             raise HTTPException(status_code=404, detail="お世話設定が見つかりません")
 
         # DBに新規レコード作成
         result = await prisma_client.reflection_notes.create(
             data={
-                "care_setting_id": care_setting.id,
+                "care_setting_id": identity.care_setting_id,
                 "content": note.content,
                 "approved_by_parent": False,
             }
         )
         print("作成結果:", result)
 
-        # 反省文作成後、該当ユーザーのキャッシュを即座に無効化
-        if ENABLE_CACHE:
-            cache_key = f"reflection_notes:{firebase_uid}"
-            await FastAPICache.clear(cache_key)
-            print(f"キャッシュクリア完了: {cache_key}")
+        # 反省文作成後、該当お世話設定のキャッシュを即座に無効化
+        await invalidate_tags(care_setting_tag(identity.care_setting_id))
 
         return result
 
@@ -96,37 +70,35 @@ async def create_reflection_note(
     "",  # エンドポイントURL
     response_model=List[ReflectionNoteResponse],
 )
-@cache_if_enabled(
+@cached_route(
+    "reflection_notes",
     expire=60,  # 1分間のキャッシュ
-    key_builder=lambda func, *args, **kwargs: f"reflection_notes:{kwargs.get('firebase_uid', 'unknown')}",
+    tags=lambda identity, **_: [care_setting_tag(identity.care_setting_id)],
+    etag=True,  # 変化がなければ 304 を返す
 )
-async def get_reflection_notes(firebase_uid: str = Depends(verify_firebase_token)):
+async def get_reflection_notes(
+    identity: RequestIdentity | None = Depends(get_request_identity),
+):
     """
     反省文一覧取得API（保護者用）
 
     キャッシュ設定:
     - TTL: 60秒（1分間）
-    - キー: reflection_notes:{firebase_uid}
+    - キー: route_cache:reflection_notes:{firebase_uid}:{パラメータのハッシュ}
+    - タグ: care_setting:{care_setting_id}（POST/PATCH で無効化）
+    - ETag: If-None-Match が一致すれば 304 Not Modified を返す
     - 理由: 反省文は読み取り頻度が高く、書き込み頻度は低いため
     """
     try:
-        # Firebase UID からユーザー取得
-        user = await prisma_client.users.find_unique(
-            where={"firebase_uid": firebase_uid}
-        )
-        if not user:
+        # Firebase UID からユーザー・care_setting_id を解決済み
+        if not identity:
             raise HTTPException(status_code=404, detail="ユーザーが見つかりません")
-        # care_setting_id を取得
-        care_setting = await prisma_client.care_settings.find_first(
-            where={"user_id": user.id}
-        )
-        if not care_setting:
+        if identity.care_setting_id is None:
             raise HTTPException(status_code=404, detail="お世話設定が見つかりません")
-        # care_setting_id に紐づく反省文を取得
-        print("care_setting_id:", care_setting.id)
+        print("care_setting_id:", identity.care_setting_id)
         # care_setting_id に紐づく反省文を取得
         results = await prisma_client.reflection_notes.find_many(
-            where={"care_setting_id": care_setting.id},
+            where={"care_setting_id": identity.care_setting_id},
             order={"created_at": "desc"},
         )
 
@@ -149,26 +121,19 @@ async def get_reflection_notes(firebase_uid: str = Depends(verify_firebase_token
 async def update_reflection_note(
     note_id: int,
     request: ReflectionNoteUpdateRequest,
-    firebase_uid: str = Depends(verify_firebase_token),
+    identity: RequestIdentity | None = Depends(get_request_identity),
 ):
     """
     反省文の承認状態を更新（保護者が承認）
     """
     try:
-        user = await prisma_client.users.find_unique(
-            where={"firebase_uid": firebase_uid}
-        )
-        if not user:
+        if not identity:
             raise HTTPException(status_code=404, detail="ユーザーが見つかりません")
-
-        care_setting = await prisma_client.care_settings.find_first(
-            where={"user_id": user.id}
-        )
-        if not care_setting:
+        if identity.care_setting_id is None:
             raise HTTPException(status_code=404, detail="お世話設定が見つかりません")
 
         note = await prisma_client.reflection_notes.find_unique(where={"id": note_id})
-        if not note or note.care_setting_id != care_setting.id:
+        if not note or not identity.owns_care_setting(note.care_setting_id):
             raise HTTPException(
                 status_code=403, detail="この反省文にアクセスする権限がありません"
             )
@@ -178,11 +143,8 @@ async def update_reflection_note(
             data={"approved_by_parent": request.approved_by_parent},
         )
 
-        # 反省文更新後、該当ユーザーのキャッシュを即座に無効化
-        if ENABLE_CACHE:
-            cache_key = f"reflection_notes:{firebase_uid}"
-            await FastAPICache.clear(cache_key)
-            print(f"キャッシュクリア完了: {cache_key}")
+        # 反省文更新後、該当お世話設定のキャッシュを即座に無効化
+        await invalidate_tags(care_setting_tag(note.care_setting_id))
 
         return updated
 
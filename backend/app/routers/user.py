@@ -1,6 +1,8 @@
 from fastapi import APIRouter, HTTPException, Depends, status
 from app.db import prisma_client
 from app.dependencies import verify_firebase_token
+from app.services.identity_cache import invalidate_identity
+from app.services.route_cache import bump_versions, cached_route, user_tag
 from app.schemas.user import (
     UserCreateRequest,
     UserCreateResponse,
@@ -38,6 +40,10 @@ async def create_users(user_data: UserCreateRequest):
                 "is_verified": user_data.is_verified,
             }
         )
+
+        # 同じ firebase_uid の古い identity キャッシュを破棄し、/me のバージョンを進める
+        await invalidate_identity(user_data.firebase_uid)
+        await bump_versions(user_tag(user_data.firebase_uid))
         return new_user
 
     except HTTPException:
@@ -54,6 +60,12 @@ async def create_users(user_data: UserCreateRequest):
     "/me",
     response_model=UserMeResponse,
 )
+# キーにユーザーごとのバージョン番号を含め、プラン変更（Webhook）・ユーザー登録時に進める
+@cached_route(
+    "users_me",
+    expire=3600,  # 書き込み時はバージョンで切り替わるため長めにする
+    versions=lambda firebase_uid, **_: [user_tag(firebase_uid)],
+)
 async def get_my_user(firebase_uid: str = Depends(verify_firebase_token)):
     # verify_firebase_token 関数が Authorization: Bearer <Firebase_ID_Token> を解析して UID を返すようにする
     """
@@ -1,15 +1,33 @@
 from app.db import prisma_client
-from fastapi import APIRouter, Request, HTTPException
-from fastapi.responses import JSONResponse
+from app.services.identity_cache import invalidate_identity
+from app.services.route_cache import bump_versions, user_tag
+from app.services.webhook_handlers import (
+    apply_webhook_chunks,
+    get_webhook_handler,
+    handled_event_types,
+    prepare_webhook_chunks,
+    register_webhook_handler,
+)
+from app.services.webhook_worker import webhook_worker
+from fastapi import APIRouter, Request, HTTPException, Query
+from fastapi.responses import JSONResponse, StreamingResponse
 import json
+import os
 
 webhook_events_router = APIRouter(prefix="/api/webhook_events", tags=["webhook_events"])
 
+# POST /api/webhook_events/process で1トランザクションにまとめる件数と、同時に適用するチャンク数
+WEBHOOK_PROCESS_CHUNK_SIZE = int(os.getenv("WEBHOOK_PROCESS_CHUNK_SIZE", "50"))
+WEBHOOK_PROCESS_CONCURRENCY = int(os.getenv("WEBHOOK_PROCESS_CONCURRENCY", "4"))
+
 
 @webhook_events_router.post("/")
 async def stripe_webhook(request: Request):
     """
     StripeのWebhookイベントを受け取るエンドポイント
+
+    保存だけ行ってすぐに200を返す（Stripeのタイムアウトによる再送を防ぐため）。
+    処理は webhook_worker がバックグラウンドで行う
     """
     try:
         # ここにStripeのWebhookイベント処理ロジックを実装
@@ -38,26 +56,36 @@ async def stripe_webhook(request: Request):
         payment_status = data_object.get("status")
 
         # webhook_eventsテーブルに保存
-        saved_event = await prisma_client.webhook_events.create(
-            data={
-                "id": event_id,
-                "event_type": event_type,
-                "stripe_session_id": stripe_session_id,  # CheckoutセッションID
-                "stripe_payment_intent_id": payment_intent_id,
-                "customer_email": customer_email,
-                "amount": amount,
-                "currency": currency,
-                "payment_status": payment_status,
-                "payload": json.dumps(event),  # Webhookイベントの全体を保存
-                "processed": False,  # 未処理フラグ
-                "firebase_uid": firebase_uid,  # Firebase UIDを保存
-            }
+        # Stripe は同じイベントを再送するため、保存済みの id は例外にせず何もしない
+        # （ON CONFLICT DO NOTHING。戻り値は保存した件数）
+        inserted = await prisma_client.webhook_events.create_many(
+            data=[
+                {
+                    "id": event_id,
+                    "event_type": event_type,
+                    "stripe_session_id": stripe_session_id,  # CheckoutセッションID
+                    "stripe_payment_intent_id": payment_intent_id,
+                    "customer_email": customer_email,
+                    "amount": amount,
+                    "currency": currency,
+                    "payment_status": payment_status,
+                    "payload": json.dumps(event),  # Webhookイベントの全体を保存
+                    "processed": False,  # 未処理フラグ
+                    "firebase_uid": firebase_uid,  # Firebase UIDを保存
+                }
+            ],
+            skip_duplicates=True,
         )
+        if not inserted:
+            print(f"[INFO] 受信済みのWebhookイベントのためスキップ: {event_id}")
+            return JSONResponse(
+                {"message": "Webhook eventは受信済みです"},
+                status_code=200,
+            )
 
-        # 受信直後に即処理を呼ぶ
-        if event_type == "checkout.session.completed":
-            # checkout.session.completed イベントの場合、即座に処理を開始
-            await process_webhook_event(saved_event)
+        # 処理が登録されている種類なら待機中のワーカーを起こす（処理の完了は待たない）
+        if get_webhook_handler(event_type) is not None:
+            webhook_worker.notify()
 
         return JSONResponse(
             {"message": "Webhook eventを保存しました"},
@@ -71,93 +99,145 @@ async def stripe_webhook(request: Request):
         raise HTTPException(status_code=500, detail="Webhook processing failed") from e
 
 
-# 条件に合う未処理のWebhookイベントを処理してpaymentテーブルに送る関数
-async def process_webhook_event(event):
-    """
-    未処理のWebhookイベントを処理してpaymentテーブルに送る関数
-    """
-    print(f"[INFO] 自動処理開始: {event.id}")
-    try:
-        # payloadを復元する(文字列ならjson.loads、dictならそのまま)
-        if isinstance(event.payload, dict):
-            payload = event.payload
-        else:
-            payload = json.loads(event.payload)
-        data_object = payload.get("data", {}).get("object", {})
+# checkout.session.completed の処理で payload から取り出す項目
+CHECKOUT_SESSION_FIELDS = (
+    "id",
+    "payment_intent",
+    "amount_total",
+    "currency",
+    "payment_status",
+)
 
-        # 必要な情報を取り出す
-        stripe_session_id = data_object.get("id")
-        if not stripe_session_id:
-            print(f"[WARN] session_idが取れないのでスキップ: {event.id}")
-            return
 
-        payment_intent_id = data_object.get("payment_intent")
-        amount = data_object.get("amount_total")
-        currency = data_object.get("currency")
-        payment_status = data_object.get("payment_status")
+# checkoutセッションを適用するユーザーをまとめて取得する関数
+async def load_checkout_users(items):
+    """
+    ユーザーをイベントごとに探さず、firebase_uid IN (...) の1クエリでまとめて取得する
 
+    見つかったイベントだけを、fieldsに"user_id"を加えて返す
+    """
+    targets = []
+    for event, fields in items:
         # webhook_eventsテーブルからeventを取って、event.firebase_uidを取り出す
-        firebase_uid = event.firebase_uid
-        if not firebase_uid:
+        if not event.firebase_uid:
             print(f"[WARN] Firebase UIDが見つからないのでスキップ: {event.id}")
-            return
-
-        # ユーザーをfirebase_uidで探す
-        user_record = await prisma_client.users.find_unique(
-            where={"firebase_uid": firebase_uid}
-        )
-        if not user_record:
+            continue
+        targets.append((event, fields))
+    if not targets:
+        return []
+
+    firebase_uids = list({event.firebase_uid for event, _ in targets})
+    users = await prisma_client.users.find_many(
+        where={"firebase_uid": {"in": firebase_uids}}
+    )
+    user_ids = {user.firebase_uid: user.id for user in users}
+
+    prepared = []
+    for event, fields in targets:
+        user_id = user_ids.get(event.firebase_uid)
+        if user_id is None:
             print(
-                f"[WARN] Firebase UIDに対応するユーザーが見つからないのでスキップ: {firebase_uid}"
+                f"[WARN] Firebase UIDに対応するユーザーが見つからないのでスキップ: {event.firebase_uid}"
             )
-            return
-
-        user_id = user_record.id  # ユーザーIDを取得
-
-        # paymentテーブルにINSERT
-        await prisma_client.payment.create(
-            data={
-                "user_id": user_id,  # 本当はFirebaseUIDからマッピングする
-                "firebase_uid": event.firebase_uid,  # webhook_eventsテーブルに入ってるfirebase_uidカラムの値
-                "stripe_session_id": stripe_session_id,
-                "stripe_payment_intent_id": payment_intent_id,
-                "amount": amount,
-                "currency": currency,
-                "status": payment_status,
-            }
-        )
+            continue
+        prepared.append((event, {**fields, "user_id": user_id}))
+    return prepared
+
+
+# 支払いの登録からイベントを処理済みにするまでを1トランザクションで行う関数
+@register_webhook_handler(
+    "checkout.session.completed",
+    fields=CHECKOUT_SESSION_FIELDS,
+    required=("id",),
+    prepare=load_checkout_users,
+)
+async def apply_checkout_sessions(items):
+    """
+    payment登録・ユーザープランの更新・webhook_eventsの処理済み更新を1トランザクションで行う
 
+    items は load_checkout_users() が返した (event, fields) のリスト。件数によらず3つの書き込みにまとめ、
+    batch_ で1往復で送って1回でコミットする。途中で失敗した場合はすべてロールバックされるため、
+    プレミアムに更新されたのにイベントが未処理のまま、といった状態は残らない
+    （失敗したイベントはそのまま再処理できる）
+    """
+    async with prisma_client.batch_() as batcher:
+        # 同じセッションを適用済みの場合は何もしない（stripe_session_id のユニーク制約で ON CONFLICT DO NOTHING）
+        batcher.payment.create_many(
+            data=[
+                {
+                    "user_id": fields["user_id"],  # 本当はFirebaseUIDからマッピングする
+                    "firebase_uid": event.firebase_uid,  # webhook_eventsテーブルに入ってるfirebase_uidカラムの値
+                    "stripe_session_id": fields["id"],
+                    "stripe_payment_intent_id": fields["payment_intent"],
+                    "amount": fields["amount_total"],
+                    "currency": fields["currency"],
+                    "status": fields["payment_status"],
+                }
+                for event, fields in items
+            ],
+            skip_duplicates=True,
+        )
         # ユーザープランをpremiumに更新
-        await prisma_client.users.update(
-            where={"id": user_id},
+        batcher.users.update_many(
+            where={"id": {"in": list({fields["user_id"] for _, fields in items})}},
             data={"current_plan": "premium"},  # ユーザープランをプレミアムに更新
         )
-
         # 処理が完了したら、webhook_events.processedをTrueに更新
-        await prisma_client.webhook_events.update(
-            where={"id": event.id}, data={"processed": True}
+        batcher.webhook_events.update_many(
+            where={"id": {"in": [event.id for event, _ in items]}},
+            data={"processed": True},
         )
 
-    except HTTPException:
-        raise
+    # プラン変更を即座に反映するため identity キャッシュを破棄し、/me のバージョンを進める
+    # NOTE: コミット前に破棄すると、その間の読み込みで古いプランが再びキャッシュされ得るため後で行う
+    firebase_uids = list(dict.fromkeys(event.firebase_uid for event, _ in items))
+    for firebase_uid in firebase_uids:
+        await invalidate_identity(firebase_uid)
+    await bump_versions(*(user_tag(firebase_uid) for firebase_uid in firebase_uids))
+
+
+# webhook_workerが取得したWebhookイベントを処理する関数（取得したバッチごとに呼ばれる）
+async def process_claimed_webhook_events(events):
+    """
+    取得済みのWebhookイベントを、種類ごとに登録された処理でまとめて適用する関数
+
+    /process と同じく、種類ごとに必要なデータをまとめて取得し、
+    WEBHOOK_PROCESS_CHUNK_SIZE 件ずつ1トランザクションで適用する
+    """
+    print(f"[INFO] 自動処理開始: {len(events)}件")
+    try:
+        chunks, _ = await prepare_webhook_chunks(
+            events, chunk_size=WEBHOOK_PROCESS_CHUNK_SIZE
+        )
+        # 失敗したチャンクのerror_messageの記録は apply_webhook_chunks() が行う
+        async for _ in apply_webhook_chunks(
+            chunks, concurrency=WEBHOOK_PROCESS_CONCURRENCY
+        ):
+            pass
+
     except Exception as e:
         print(f"[ERROR] Webhookイベントの処理に失敗しました: {e}")
         # エラー内容をwebhook_eventsテーブルに保存
-        await prisma_client.webhook_events.update(
-            where={"id": event.id}, data={"error_message": str(e)}
+        await prisma_client.webhook_events.update_many(
+            where={"id": {"in": [event.id for event in events]}},
+            data={"error_message": str(e)},
         )
 
 
 # 手動操作によるWebhookイベント処理エンドポイント
 @webhook_events_router.post("/process")
-async def process_webhook_events():
+async def process_webhook_events(stream: bool = Query(False)):
     """
     未処理のWebhookイベントを処理してpaymentテーブルに送るエンドポイント
+
+    障害後に溜まった大量のイベントをまとめて処理するため、種類ごとに必要なデータをまとめて取得し、
+    WEBHOOK_PROCESS_CHUNK_SIZE 件ずつ1トランザクションで並行して適用する。
+    stream=true の場合は、チャンクが終わるたびに進捗を1行のJSON（NDJSON）で返す
     """
     try:
-        # 未処理のcheckout.session.completed のWebhookイベントを取得
+        # 処理が登録されている種類の未処理Webhookイベントを取得
         events = await prisma_client.webhook_events.find_many(
-            where={"processed": False, "event_type": "checkout.session.completed"}
+            where={"processed": False, "event_type": {"in": handled_event_types()}}
         )
 
         # もし0件なら早期リターン
@@ -167,75 +247,46 @@ async def process_webhook_events():
                 status_code=200,
             )
 
-        # 1件ずつループ処理を行う
-        for event in events:
-            # イベントの処理ロジックを実装
-            print(f"[INFO] 処理中のWebhookイベント: {event.id}")
-
-            # payloadを復元する(文字列ならjson.loads、dictならそのまま)
-            if isinstance(event.payload, dict):
-                payload = event.payload
-            else:
-                payload = json.loads(event.payload)
-            data_object = payload.get("data", {}).get("object", {})
-
-            # 必要な情報を取り出す
-            stripe_session_id = data_object.get("id")
-
-            if not stripe_session_id:
-                print(f"[WARN] session_idが取れないのでスキップ: {event.id}")
-                continue
-
-            payment_intent_id = data_object.get("payment_intent")
-            amount = data_object.get("amount_total")
-            currency = data_object.get("currency")
-            payment_status = data_object.get("payment_status")
-
-            # webhook_eventsテーブルからeventを取って、event.firebase_uidを取り出す
-            firebase_uid = event.firebase_uid
-            if not firebase_uid:
-                print(f"[WARN] Firebase UIDが見つからないのでスキップ: {event.id}")
-                continue
-
-            # firebase_uidでusersテーブルからユーザーを取得
-            user_record = await prisma_client.users.find_unique(
-                where={"firebase_uid": firebase_uid}
-            )
-            if not user_record:
-                print(
-                    f"[WARN] Firebase UIDに対応するユーザーが見つからないのでスキップ: {firebase_uid}"
-                )
-                continue
-
-            user_id = user_record.id  # ユーザーIDを取得
-
-            # paymentテーブルにINSERT
-            await prisma_client.payment.create(
-                data={
-                    "user_id": user_id,  # 本当はFirebaseUIDからマッピングする
-                    "firebase_uid": event.firebase_uid,  # webhook_eventsテーブルに入ってるfirebase_uidカラムの値
-                    "stripe_session_id": stripe_session_id,
-                    "stripe_payment_intent_id": payment_intent_id,
-                    "amount": amount,
-                    "currency": currency,
-                    "status": payment_status,
-                }
+        print(f"[INFO] 未処理のWebhookイベント: {len(events)}件")
+        chunks, skipped = await prepare_webhook_chunks(
+            events, chunk_size=WEBHOOK_PROCESS_CHUNK_SIZE
+        )
+        progress = {
+            "total": len(events),
+            "processed": 0,
+            "failed": 0,
+            "skipped": skipped,
+        }
+
+        if stream:
+
+            async def stream_progress():
+                async for processed, failed in apply_webhook_chunks(
+                    chunks, concurrency=WEBHOOK_PROCESS_CONCURRENCY
+                ):
+                    progress["processed"] += processed
+                    progress["failed"] += failed
+                    yield json.dumps(progress) + "\n"
+
+            return StreamingResponse(
+                stream_progress(), media_type="application/x-ndjson"
             )
 
-            # ユーザープランをpremiumに更新
-            await prisma_client.users.update(
-                where={"id": user_id},
-                data={"current_plan": "premium"},  # ユーザープランをプレミアムに更新
-            )
+        async for processed, failed in apply_webhook_chunks(
+            chunks, concurrency=WEBHOOK_PROCESS_CONCURRENCY
+        ):
+            progress["processed"] += processed
+            progress["failed"] += failed
 
-            # 処理が完了したら、DBのprocessedをTrueに更新
-            await prisma_client.webhook_events.update(
-                where={"id": event.id}, data={"processed": True}
+        if progress["failed"]:
+            raise HTTPException(
+                status_code=500, detail="Webhook event processing failed"
             )
 
         return JSONResponse(
             {
-                "message": f"{len(events)} 件のイベントを処理してpaymentテーブルに保存しました"
+                "message": f"{len(events)} 件のイベントを処理してpaymentテーブルに保存しました",
+                **progress,
             },
             status_code=200,
         )
@@ -0,0 +1,20 @@
+"""キャッシュ管理（cache_admin）用のPydanticスキーマ定義"""
+
+# サードパーティライブラリ
+from pydantic import BaseModel
+
+
+class CacheKeySize(BaseModel):
+    """キャッシュキー1件分のサイズ"""
+
+    key: str
+    namespace: str  # cached_route() に渡した名前空間
+    bytes: int  # シリアライズ後のサイズ
+    ttl: int  # 残りの有効期限（秒）
+
+
+# GET /api/admin/cache/keys のレスポンスモデル
+class CacheKeysResponse(BaseModel):
+    """サイズの大きいキャッシュキーの一覧"""
+
+    keys: list[CacheKeySize]
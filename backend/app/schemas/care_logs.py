@@ -2,10 +2,43 @@
 
 # 標準ライブラリ
 from datetime import datetime, date
-from typing import Optional
+from typing import Any, Optional
 
 # サードパーティライブラリ
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, field_validator, model_validator
+
+# 1回の範囲取得で指定できる最大日数（1年分）
+MAX_DATE_RANGE_DAYS = 366
+# 1回の一括同期で受け付ける最大件数
+MAX_BATCH_ITEMS = 100
+# GET /api/care_logs/list の1ページの最大件数
+MAX_LIST_LIMIT = 500
+# GET /api/care_logs/list の fields= で指定できる列（未指定時は DEFAULT_LIST_FIELDS）
+CARE_LOG_LIST_FIELDS = (
+    "id",
+    "care_setting_id",
+    "date",
+    "fed_morning",
+    "fed_night",
+    "walk_result",
+    "walk_total_distance_m",
+    "created_at",
+)
+DEFAULT_LIST_FIELDS = ("id", "date", "walk_result", "care_setting_id")
+
+
+def parse_care_log_date(value: Any) -> Any:
+    """日付文字列・datetime を date に揃える
+
+    - "2025-07-01" のほか、従来どおり "2025-07-01T00:00:00" 形式も受け付ける
+    - DBから返る DATE 列は Prisma では datetime（UTC 0時）になるため日付部分だけを使う
+    - 生SQL（query_raw）の結果は文字列で返るため、同じく date に変換する
+    """
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, str):
+        return datetime.fromisoformat(value.replace("Z", "+00:00")).date()
+    return value
 
 
 # /api/care_logs のレスポンスモデル
@@ -14,13 +47,15 @@ class CareLogResponse(BaseModel):
 
     id: int
     care_setting_id: int
-    date: str  # Prismaスキーマに合わせてstrに変更
+    date: date  # DB側は DATE 型（レスポンスは "YYYY-MM-DD"）
     fed_morning: Optional[bool]
     fed_night: Optional[bool]
     walk_result: Optional[bool]  # 追加
     walk_total_distance_m: Optional[int]  # 追加
     created_at: datetime
 
+    _parse_date = field_validator("date", mode="before")(parse_care_log_date)
+
     class Config:
         """Pydantic設定クラス（ORMモデル対応）"""
 
@@ -31,12 +66,14 @@ class CareLogResponse(BaseModel):
 class CareLogCreateRequest(BaseModel):
     """お世話記録の新規作成用リクエストモデル"""
 
-    date: str  # フロントエンドからはstr形式で受信
+    date: date  # フロントエンドからは "YYYY-MM-DD" 形式で受信
     fed_morning: Optional[bool] = None  # 散歩のみの場合は任意項目
     fed_night: Optional[bool] = None  # 散歩のみの場合は任意項目
     walk_result: Optional[bool] = None  # 散歩結果（boolean）
     walk_total_distance_m: Optional[int] = None  # 散歩距離（メートル）
 
+    _parse_date = field_validator("date", mode="before")(parse_care_log_date)
+
 
 # PATCH /api/care_logs/:id のリクエストモデル
 class CareLogUpdateRequest(BaseModel):
@@ -56,3 +93,69 @@ class CareLogTodayResponse(BaseModel):
     fed_morning: bool
     fed_night: bool
     walked: bool
+
+
+# GET /api/care_logs/range のクエリ（日付範囲）
+class CareLogDateRange(BaseModel):
+    """お世話記録の日付範囲指定（from / to はどちらも含む）"""
+
+    date_from: date = Field(alias="from")
+    date_to: date = Field(alias="to")
+
+    @model_validator(mode="after")
+    def check_range(self) -> "CareLogDateRange":
+        """from <= to かつ最大日数以内であることを確認する"""
+        if self.date_from > self.date_to:
+            raise ValueError("from は to 以前の日付を指定してください")
+        if (self.date_to - self.date_from).days >= MAX_DATE_RANGE_DAYS:
+            raise ValueError(f"日付範囲は最大{MAX_DATE_RANGE_DAYS}日までです")
+        return self
+
+
+# GET /api/care_logs/range のレスポンスモデル
+class CareLogRangeResponse(BaseModel):
+    """日付範囲のお世話記録一覧レスポンス"""
+
+    care_logs: list[CareLogResponse]
+
+
+# POST /api/care_logs/batch の1件分
+class CareLogBatchItem(BaseModel):
+    """一括同期の1件分（対象日と更新する項目）"""
+
+    date: date
+    fields: CareLogUpdateRequest
+
+    _parse_date = field_validator("date", mode="before")(parse_care_log_date)
+
+
+# POST /api/care_logs/batch のリクエストモデル
+class CareLogBatchRequest(BaseModel):
+    """お世話記録の一括同期用リクエストモデル（送られた順に適用）"""
+
+    items: list[CareLogBatchItem] = Field(min_length=1, max_length=MAX_BATCH_ITEMS)
+
+
+# POST /api/care_logs/batch の1件分の結果
+class CareLogBatchItemResult(BaseModel):
+    """一括同期の1件分の結果（index はリクエストの items の位置）"""
+
+    index: int
+    date: date
+    status: str
+    care_log: CareLogResponse
+
+
+# POST /api/care_logs/batch のレスポンスモデル
+class CareLogBatchResponse(BaseModel):
+    """お世話記録の一括同期レスポンス"""
+
+    results: list[CareLogBatchItemResult]
+
+
+# GET /api/care_logs/list のレスポンスモデル
+class CareLogListResponse(BaseModel):
+    """お世話記録一覧レスポンス（各要素は fields= で指定した列のみ）"""
+
+    care_logs: list[dict[str, Any]]
+    next_cursor: Optional[str] = None
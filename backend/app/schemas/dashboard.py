@@ -0,0 +1,22 @@
+"""ダッシュボード（dashboard）用のPydanticスキーマ定義"""
+
+# 標準ライブラリ
+from datetime import date
+
+# サードパーティライブラリ
+from pydantic import BaseModel
+
+# ローカルアプリケーション
+from app.schemas.care_logs import CareLogTodayResponse
+from app.schemas.care_settings import CareSettingMeResponse
+
+
+# GET /api/dashboard のレスポンスモデル
+class DashboardResponse(BaseModel):
+    """ダッシュボード表示に必要な情報をまとめたレスポンスモデル"""
+
+    date: date  # 「今日」として扱った日付（日本時間）
+    care_setting: CareSettingMeResponse
+    today: CareLogTodayResponse
+    yesterday: CareLogTodayResponse
+    message: str  # 犬のひとこと
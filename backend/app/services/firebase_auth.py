@@ -0,0 +1,197 @@
+# verify_firebase_token から使う非同期のFirebase IDトークン検証サービス
+
+import asyncio
+import base64
+import json
+import re
+import time
+from typing import Any, Optional
+
+import httpx
+from google.auth import exceptions as google_auth_exceptions
+from google.auth import jwt as google_jwt
+
+# Firebase IDトークンの署名に使われる公開鍵（x509証明書）の配布URL
+FIREBASE_CERTS_URL = (
+    "https://www.googleapis.com/robot/v1/metadata/x509/"
+    "securetoken@system.gserviceaccount.com"
+)
+FIREBASE_ISSUER_PREFIX = "https://securetoken.google.com/"
+
+# Cache-Control が取れなかった場合の鍵の有効期間（秒）
+DEFAULT_CERTS_MAX_AGE = 3600
+# 有効期限の何秒前に再取得するか
+REFRESH_MARGIN_SECONDS = 300
+# 再取得に失敗したときのリトライ間隔（秒）
+RETRY_INTERVAL_SECONDS = 30
+# 未知の kid による再取得の最小間隔（秒）。未認証のリクエストから何度でも取りに行かせないため
+FORCED_REFRESH_INTERVAL_SECONDS = 60
+
+
+def _parse_max_age(cache_control: Optional[str]) -> int:
+    """Cache-Control ヘッダーから max-age を取り出す"""
+    if cache_control:
+        match = re.search(r"max-age=(\d+)", cache_control)
+        if match:
+            return int(match.group(1))
+    return DEFAULT_CERTS_MAX_AGE
+
+
+def _decode_header(id_token: str) -> dict[str, Any]:
+    """署名検証前にJWTヘッダーだけを取り出す"""
+    try:
+        header_segment = id_token.split(".")[0]
+        padded = header_segment + "=" * (-len(header_segment) % 4)
+        return json.loads(base64.urlsafe_b64decode(padded))
+    except (ValueError, IndexError) as e:
+        raise ValueError("Firebase ID token has a malformed header") from e
+
+
+class AsyncFirebaseTokenVerifier:
+    """イベントループをブロックせずにFirebase IDトークンを検証するクラス
+
+    - 署名鍵はメモリに保持し、バックグラウンドタスクで期限前に更新する
+    - 証明書の取得は httpx.AsyncClient で行い、ワーカースレッドを占有しない
+    - 署名検証（RS256）自体はマイクロ秒単位のため、ループ上でそのまま実行する
+    """
+
+    def __init__(
+        self,
+        project_id: Optional[str],
+        certs_url: str = FIREBASE_CERTS_URL,
+        http_client: Optional[httpx.AsyncClient] = None,
+    ):
+        self.project_id = project_id
+        self.certs_url = certs_url
+        self._http_client = http_client
+        self._certs: dict[str, str] = {}
+        self._expires_at = 0.0
+        # 未知の kid で最後に再取得した時刻（time.monotonic）
+        self._last_forced_refresh: Optional[float] = None
+        self._lock = asyncio.Lock()
+        self._refresh_task: Optional[asyncio.Task] = None
+
+    async def _client(self) -> httpx.AsyncClient:
+        if self._http_client is None:
+            self._http_client = httpx.AsyncClient(timeout=5.0)
+        return self._http_client
+
+    async def refresh_keys(self) -> None:
+        """公開鍵を取得してメモリ上の鍵を差し替える"""
+        client = await self._client()
+        response = await client.get(self.certs_url)
+        response.raise_for_status()
+        self._certs = response.json()
+        max_age = _parse_max_age(response.headers.get("cache-control"))
+        self._expires_at = time.time() + max_age
+
+    async def _ensure_keys(self) -> None:
+        """鍵が未取得・期限切れの場合だけ取得する（同時取得は1回にまとめる）"""
+        if self._certs and time.time() < self._expires_at:
+            return
+        async with self._lock:
+            if self._certs and time.time() < self._expires_at:
+                return
+            await self.refresh_keys()
+
+    def _forced_refresh_allowed(self) -> bool:
+        return (
+            self._last_forced_refresh is None
+            or time.monotonic() - self._last_forced_refresh
+            >= FORCED_REFRESH_INTERVAL_SECONDS
+        )
+
+    async def _refresh_for_unknown_kid(self) -> None:
+        """未知の kid のために鍵を取り直す（FORCED_REFRESH_INTERVAL_SECONDS に1回まで）
+
+        kid は署名検証前のヘッダーの値のため、間隔内は取り直さずにそのまま不正なトークンとして扱う
+        """
+        if not self._forced_refresh_allowed():
+            return
+        async with self._lock:
+            # ロック待ちの間に他のリクエストが取り直していれば何もしない
+            if not self._forced_refresh_allowed():
+                return
+            # 取得に失敗した場合も間隔を空ける
+            self._last_forced_refresh = time.monotonic()
+            await self.refresh_keys()
+
+    async def _refresh_loop(self) -> None:
+        """鍵の有効期限が切れる前に定期的に再取得する"""
+        while True:
+            delay = max(
+                self._expires_at - time.time() - REFRESH_MARGIN_SECONDS,
+                RETRY_INTERVAL_SECONDS,
+            )
+            await asyncio.sleep(delay)
+            try:
+                async with self._lock:
+                    await self.refresh_keys()
+            except (httpx.HTTPError, ValueError) as e:
+                # 失敗しても既存の鍵で検証を続け、次回リトライする
+                print(f"[firebase_auth] 公開鍵の更新に失敗しました: {e}")
+
+    async def start(self) -> None:
+        """鍵を先読みし、バックグラウンド更新タスクを開始する"""
+        try:
+            await self._ensure_keys()
+        except (httpx.HTTPError, ValueError) as e:
+            # 起動時に取れなくても、最初の検証時に再取得する
+            print(f"[firebase_auth] 公開鍵の先読みに失敗しました: {e}")
+        if self._refresh_task is None:
+            self._refresh_task = asyncio.create_task(self._refresh_loop())
+
+    async def stop(self) -> None:
+        """バックグラウンド更新タスクとHTTPクライアントを停止する"""
+        if self._refresh_task is not None:
+            self._refresh_task.cancel()
+            try:
+                await self._refresh_task
+            except asyncio.CancelledError:
+                pass
+            self._refresh_task = None
+        if self._http_client is not None:
+            await self._http_client.aclose()
+            self._http_client = None
+
+    async def verify(self, id_token: str) -> dict[str, Any]:
+        """IDトークンを検証してデコード済みのクレームを返す
+
+        Raises:
+            ValueError: トークンが不正な場合
+        """
+        if not self.project_id:
+            raise ValueError("Firebase project ID is not configured")
+
+        header = _decode_header(id_token)
+        if header.get("alg") != "RS256":
+            raise ValueError(
+                f'Firebase ID token has incorrect algorithm: {header.get("alg")}'
+            )
+        if not header.get("kid"):
+            raise ValueError('Firebase ID token has no "kid" claim')
+
+        await self._ensure_keys()
+        # 鍵のローテーション直後は未知の kid が来るため取り直す（間隔は制限する）
+        if header["kid"] not in self._certs:
+            await self._refresh_for_unknown_kid()
+        if header["kid"] not in self._certs:
+            raise ValueError('Firebase ID token has unknown "kid" claim')
+
+        try:
+            claims = google_jwt.decode(
+                id_token, certs=self._certs, audience=self.project_id
+            )
+        except google_auth_exceptions.GoogleAuthError as e:
+            raise ValueError(str(e)) from e
+
+        expected_issuer = FIREBASE_ISSUER_PREFIX + self.project_id
+        if claims.get("iss") != expected_issuer:
+            raise ValueError('Firebase ID token has incorrect "iss" claim')
+
+        subject = claims.get("sub")
+        if not isinstance(subject, str) or not subject or len(subject) > 128:
+            raise ValueError('Firebase ID token has invalid "sub" claim')
+
+        claims["uid"] = subject
+        return claims
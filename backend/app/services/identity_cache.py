@@ -0,0 +1,98 @@
+# get_request_identity から使う firebase_uid → ユーザー識別情報のRedisキャッシュ
+
+import json
+import os
+from typing import Any, Optional
+
+from redis.exceptions import RedisError
+
+from app.redis_client import get_redis_client
+from app.services.route_cache import has_pending_invalidation, user_tag, version_key
+
+# テスト環境ではキャッシュを無効化
+ENABLE_CACHE = os.getenv("ENABLE_CACHE", "true").lower() == "true"
+# 書き込み時に明示的に無効化するため、TTLは取りこぼし時の保険
+IDENTITY_CACHE_TTL = int(os.getenv("IDENTITY_CACHE_TTL", "600"))
+
+
+def identity_cache_key(firebase_uid: str) -> str:
+    """identity キャッシュのキー"""
+    return f"identity:{firebase_uid}"
+
+
+async def get_cached_identity(
+    firebase_uid: str,
+) -> tuple[Optional[dict[str, Any]], Optional[str]]:
+    """キャッシュ済みの識別情報と、ユーザーの現在のバージョン番号を返す
+
+    識別情報とバージョン番号（route_cache:version:user:{uid}）は MGET 1回で取得し、
+    保存時のバージョンが現在と異なる識別情報はミスとして扱う。
+    バージョン番号は DB を読む前に取得するため、ミス時はこの値を set_cached_identity() に渡す
+
+    Returns:
+        tuple: (識別情報, バージョン番号)。未登録・古い場合は識別情報がNone、
+        Redis障害時・バージョン更新を再送待ちの間は (None, None)
+    """
+    client = get_redis_client()
+    if not ENABLE_CACHE or client is None:
+        return None, None
+    if has_pending_invalidation([user_tag(firebase_uid)]):
+        # Redis 障害で送れていないバージョン更新がある間はキャッシュを使わない
+        return None, None
+    try:
+        cached, version = await client.mget(
+            [identity_cache_key(firebase_uid), version_key(user_tag(firebase_uid))]
+        )
+    except RedisError as e:
+        print(f"[identity_cache] GET失敗（DBにフォールバック）: {e}")
+        return None, None
+    version = version or "0"
+    if cached:
+        value = json.loads(cached)
+        # care_setting_ids を持たない古い形式の値もミスとして扱う
+        if value.get("version") == version and "care_setting_ids" in value:
+            return value, version
+    return None, version
+
+
+async def set_cached_identity(
+    firebase_uid: str,
+    version: Optional[str],
+    user_id: str,
+    current_plan: Optional[str],
+    care_setting_id: Optional[int],
+    care_setting_ids: list[int],
+) -> None:
+    """識別情報をキャッシュする（個人情報は含めずIDとプランのみ）
+
+    version は DB を読む前に get_cached_identity() で取得した値。
+    DB を読んだ後に書き込み（bump_versions）があった場合、invalidate_identity() の後に
+    古いプランを SET しても、バージョンが古いため次の読み込みで使われない
+    """
+    client = get_redis_client()
+    if not ENABLE_CACHE or client is None or version is None:
+        return
+    value = json.dumps(
+        {
+            "user_id": user_id,
+            "current_plan": current_plan,
+            "care_setting_id": care_setting_id,
+            "care_setting_ids": care_setting_ids,
+            "version": version,
+        }
+    )
+    try:
+        await client.set(identity_cache_key(firebase_uid), value, ex=IDENTITY_CACHE_TTL)
+    except RedisError as e:
+        print(f"[identity_cache] SET失敗: {e}")
+
+
+async def invalidate_identity(firebase_uid: Optional[str]) -> None:
+    """ユーザー・プラン・お世話設定の書き込み後に呼び出してキャッシュを破棄する"""
+    client = get_redis_client(force=True)
+    if not ENABLE_CACHE or client is None or not firebase_uid:
+        return
+    try:
+        await client.delete(identity_cache_key(firebase_uid))
+    except RedisError as e:
+        print(f"[identity_cache] DELETE失敗: {e}")
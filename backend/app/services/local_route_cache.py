@@ -0,0 +1,79 @@
+# route_cache から使うプロセス内（L1）キャッシュ
+
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Iterable, Optional
+
+
+class LocalRouteCache:
+    """Redis の手前に置くワーカープロセス単位のLRU+TTLキャッシュ
+
+    - 直前に同じワーカーが返したレスポンスをRedisへの往復なしで返す
+    - 他ワーカーでの書き込みは pub/sub 経由の evict_tags() で破棄する
+      （取りこぼしに備えてTTLは数秒に抑える）
+    - 呼び出しはすべてイベントループ上で行うためロックは持たない
+    """
+
+    def __init__(
+        self,
+        max_size: int = 1024,
+        ttl: float = 5.0,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._clock = clock
+        self._entries: "OrderedDict[str, tuple[float, Any, frozenset[str]]]" = (
+            OrderedDict()
+        )
+        # 無効化のたびに進める世代番号（読み込み中に無効化された値を登録しないため）
+        self.generation = 0
+
+    def get(self, key: str) -> Optional[Any]:
+        """キャッシュ済みの値を返す（期限切れ・未登録ならNone）"""
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+
+        expires_at, value, _ = entry
+        if expires_at <= self._clock():
+            del self._entries[key]
+            return None
+
+        # LRU: 参照されたエントリを末尾に移動
+        self._entries.move_to_end(key)
+        return value
+
+    def set(
+        self,
+        key: str,
+        value: Any,
+        tags: Iterable[str],
+        generation: Optional[int] = None,
+    ) -> None:
+        """値を登録する（generation が古い場合は読み込み中に無効化されたため登録しない）"""
+        if self.max_size <= 0 or self.ttl <= 0:
+            return
+        if generation is not None and generation != self.generation:
+            return
+
+        self._entries[key] = (self._clock() + self.ttl, value, frozenset(tags))
+        self._entries.move_to_end(key)
+        # 上限を超えたら最も古く参照されたエントリから削除
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+    def evict_tags(self, tags: Iterable[str]) -> None:
+        """いずれかのタグが付いたエントリを削除する"""
+        targets = set(tags)
+        self.generation += 1
+        for key in [k for k, (_, _, t) in self._entries.items() if t & targets]:
+            del self._entries[key]
+
+    def clear(self) -> None:
+        """全エントリを削除する（pub/sub が切断され、無効化を取りこぼした可能性がある場合）"""
+        self.generation += 1
+        self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
@@ -0,0 +1,154 @@
+# プレミアムプラン向けの犬のひとことを事前に生成して Redis に貯めておくサービス
+
+import asyncio
+import os
+import random
+from typing import Awaitable, Callable, Iterable, Optional
+
+from redis.exceptions import LockError, RedisError
+
+from app.redis_client import get_redis_client
+
+# カテゴリごとの残りがこの件数を下回ったら補充する
+MESSAGE_POOL_LOW_WATER = int(os.getenv("MESSAGE_POOL_LOW_WATER", "10"))
+# 補充後の件数
+MESSAGE_POOL_TARGET = int(os.getenv("MESSAGE_POOL_TARGET", "30"))
+# 残りを確認する間隔（秒）
+MESSAGE_POOL_REFILL_INTERVAL = float(os.getenv("MESSAGE_POOL_REFILL_INTERVAL", "30"))
+# 補充時に同時に生成する件数（OpenAI のレート制限に掛からないよう小さくする）
+MESSAGE_POOL_REFILL_CONCURRENCY = int(os.getenv("MESSAGE_POOL_REFILL_CONCURRENCY", "2"))
+# 補充を1プロセスに限定するロックの自動解放までの秒数
+MESSAGE_POOL_LOCK_TIMEOUT = 300
+
+
+def pool_key(category: int) -> str:
+    """カテゴリごとの生成済みメッセージ（Redis LIST）のキー"""
+    return f"message_pool:{category}"
+
+
+REFILL_LOCK_KEY = "message_pool:refill_lock"
+
+
+class MessagePool:
+    """生成済みのメッセージをリクエストから取り出し、減ったらバックグラウンドで補充するクラス
+
+    - pop() は Redis から1件取り出すだけで OpenAI を呼ばない（空なら None）
+    - 補充はワーカー間でロックを取った1プロセスだけが行う
+    - 取り出し時に残りが少なければ、次の確認間隔を待たずに補充を始める
+    """
+
+    def __init__(self):
+        self.categories: list[int] = []
+        self._generate: Optional[Callable[[int], Awaitable[str]]] = None
+        self._task: Optional[asyncio.Task] = None
+        self._wake = asyncio.Event()
+
+    async def pop(self) -> Optional[str]:
+        """いずれかのカテゴリから1件取り出す（Redis 未接続・空の場合は None）"""
+        client = get_redis_client()
+        if client is None or not self.categories:
+            return None
+
+        for category in random.sample(self.categories, len(self.categories)):
+            pipe = client.pipeline(transaction=False)
+            pipe.lpop(pool_key(category))
+            pipe.llen(pool_key(category))
+            try:
+                message, remaining = await pipe.execute()
+            except RedisError as e:
+                print(f"[message_pool] 取り出し失敗: {e}")
+                return None
+            if remaining < MESSAGE_POOL_LOW_WATER:
+                self._wake.set()
+            if message:
+                return message
+        return None
+
+    async def _generate_many(self, category: int, count: int) -> list[str]:
+        """count 件を生成する（失敗した分は含めない）"""
+        semaphore = asyncio.Semaphore(MESSAGE_POOL_REFILL_CONCURRENCY)
+
+        async def generate_one() -> Optional[str]:
+            async with semaphore:
+                try:
+                    return await self._generate(category)
+                except Exception as e:  # pylint: disable=broad-exception-caught
+                    print(f"[message_pool] 生成失敗: category={category}: {e}")
+                    return None
+
+        results = await asyncio.gather(*(generate_one() for _ in range(count)))
+        return [message for message in results if message]
+
+    async def refill(self) -> None:
+        """残りが少ないカテゴリを MESSAGE_POOL_TARGET 件まで補充する"""
+        client = get_redis_client()
+        if client is None or self._generate is None:
+            return
+
+        lock = client.lock(REFILL_LOCK_KEY, timeout=MESSAGE_POOL_LOCK_TIMEOUT)
+        try:
+            if not await lock.acquire(blocking=False):
+                # 他のワーカーが補充中
+                return
+        except RedisError as e:
+            print(f"[message_pool] ロック取得失敗: {e}")
+            return
+
+        try:
+            for category in self.categories:
+                remaining = await client.llen(pool_key(category))
+                if remaining >= MESSAGE_POOL_LOW_WATER:
+                    continue
+                messages = await self._generate_many(
+                    category, MESSAGE_POOL_TARGET - remaining
+                )
+                if messages:
+                    await client.rpush(pool_key(category), *messages)
+                print(
+                    f"[message_pool] 補充完了: category={category}, "
+                    f"{remaining} → {remaining + len(messages)}件"
+                )
+        except RedisError as e:
+            print(f"[message_pool] 補充失敗: {e}")
+        finally:
+            try:
+                await lock.release()
+            except (LockError, RedisError) as e:
+                print(f"[message_pool] ロック解放失敗: {e}")
+
+    async def _run(self) -> None:
+        while True:
+            await self.refill()
+            try:
+                await asyncio.wait_for(
+                    self._wake.wait(), timeout=MESSAGE_POOL_REFILL_INTERVAL
+                )
+            except asyncio.TimeoutError:
+                pass
+            self._wake.clear()
+
+    def start(
+        self, categories: Iterable[int], generate: Callable[[int], Awaitable[str]]
+    ) -> None:
+        """補充タスクを開始する（main.lifespan から呼び出す）
+
+        generate はカテゴリを受け取り、生成したメッセージを返す（失敗時は例外を投げる）
+        """
+        self.categories = list(categories)
+        self._generate = generate
+        if self._task is None:
+            self._wake = asyncio.Event()
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """補充タスクを停止する"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+
+message_pool = MessagePool()
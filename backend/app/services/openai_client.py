@@ -0,0 +1,57 @@
+"""OpenAI クライアントの共有設定（main.lifespan で生成したクライアントを各モジュールで再利用する）"""
+
+import asyncio
+import os
+from typing import Optional
+
+import httpx
+from openai import AsyncOpenAI, DefaultAsyncHttpxClient
+
+# 同時に OpenAI へ送るリクエスト数の上限（ワーカーあたり）
+OPENAI_MAX_CONCURRENCY = int(os.getenv("OPENAI_MAX_CONCURRENCY", "8"))
+# 1回の API 呼び出しのタイムアウト（秒）。リクエスト内での待ち時間は呼び出し側で別に制限する
+OPENAI_TIMEOUT = float(os.getenv("OPENAI_TIMEOUT", "10"))
+# keep-alive で使い回す接続の数と保持時間（秒）
+OPENAI_MAX_KEEPALIVE_CONNECTIONS = int(
+    os.getenv("OPENAI_MAX_KEEPALIVE_CONNECTIONS", "8")
+)
+OPENAI_KEEPALIVE_EXPIRY = float(os.getenv("OPENAI_KEEPALIVE_EXPIRY", "60"))
+
+# 実行中の API 呼び出しを OPENAI_MAX_CONCURRENCY 件までに制限する
+openai_semaphore = asyncio.Semaphore(OPENAI_MAX_CONCURRENCY)
+
+
+def create_openai_client() -> Optional[AsyncOpenAI]:
+    """接続を使い回す非同期クライアントを作る（OPENAI_API_KEY 未設定なら None）"""
+    api_key = os.getenv("OPENAI_API_KEY")
+    if not api_key:
+        return None
+    http_client = DefaultAsyncHttpxClient(
+        limits=httpx.Limits(
+            max_connections=OPENAI_MAX_CONCURRENCY,
+            max_keepalive_connections=OPENAI_MAX_KEEPALIVE_CONNECTIONS,
+            keepalive_expiry=OPENAI_KEEPALIVE_EXPIRY,
+        ),
+    )
+    # 再試行すると呼び出し側の待ち時間の上限を超えるため、失敗時は固定メッセージに切り替える
+    return AsyncOpenAI(
+        api_key=api_key,
+        timeout=OPENAI_TIMEOUT,
+        max_retries=0,
+        http_client=http_client,
+    )
+
+
+# main.lifespan で初期化される（テストなど lifespan を通らない場合は None のまま）
+_openai_client: Optional[AsyncOpenAI] = None
+
+
+def set_openai_client(client: Optional[AsyncOpenAI]) -> None:
+    """lifespan で生成した OpenAI クライアントを登録する"""
+    global _openai_client  # pylint: disable=global-statement
+    _openai_client = client
+
+
+def get_openai_client() -> Optional[AsyncOpenAI]:
+    """登録済みの OpenAI クライアントを返す（未初期化なら None）"""
+    return _openai_client
@@ -0,0 +1,641 @@
+# GETルーターの結果をRedisにキャッシュし、タグ単位で無効化するサービス
+
+import asyncio
+import functools
+import hashlib
+import heapq
+import inspect
+import json
+import math
+import os
+import random
+import time
+from typing import Any, Awaitable, Callable, Iterable, Optional
+
+from fastapi import Request, Response
+from fastapi.encoders import jsonable_encoder
+from redis.exceptions import LockError, RedisError, WatchError
+
+from app.redis_client import get_redis_client
+from app.services.local_route_cache import LocalRouteCache
+from app.services.route_cache_metrics import (
+    CACHE_BYPASSES,
+    CACHE_HITS,
+    CACHE_INVALIDATIONS,
+    CACHE_LOAD_SECONDS,
+    CACHE_MISSES,
+    CACHE_VALUE_BYTES,
+    CACHE_VERSION_BUMPS,
+)
+
+# テスト環境ではキャッシュを無効化
+ENABLE_CACHE = os.getenv("ENABLE_CACHE", "true").lower() == "true"
+# タグ→キーの集合を保持する期間（どのルートの expire よりも長くする）
+ROUTE_CACHE_TAG_TTL = 3600
+
+# ユーザーの識別・レスポンス制御に使う引数名（キャッシュキーのパラメータ部分からは除外する）
+SCOPE_PARAMS = ("identity", "firebase_uid")
+IGNORED_PARAMS = SCOPE_PARAMS + ("request", "response")
+
+# 再計算を1プロセスに限定するロックの自動解放までの秒数（ローダーが落ちた場合の保険）
+ROUTE_CACHE_LOCK_TIMEOUT = 10
+# ロックを取れなかったプロセスが他プロセスの保存を待つ上限と間隔（秒）
+ROUTE_CACHE_LOCK_WAIT = 2.0
+ROUTE_CACHE_LOCK_POLL_INTERVAL = 0.05
+# 期限前の確率的な再計算の強さ（大きいほど早めに再計算する。0 で無効）
+ROUTE_CACHE_EARLY_REFRESH_BETA = float(
+    os.getenv("ROUTE_CACHE_EARLY_REFRESH_BETA", "1.0")
+)
+
+# 無効化したタグを全ワーカーに通知する pub/sub チャンネル
+INVALIDATION_CHANNEL = "route_cache:invalidate"
+# pub/sub が切断されたときの再接続間隔（秒）
+INVALIDATION_RETRY_SECONDS = 1.0
+# 通知を1回待つ時間（秒）
+INVALIDATION_POLL_TIMEOUT = 5.0
+# Redis 障害で送れなかった無効化を再送する間隔（秒）
+INVALIDATION_RESEND_SECONDS = 1.0
+
+# サイズ一覧（top_keys_by_size）で1回に走査するキー数の上限
+ROUTE_CACHE_SCAN_MAX = 10000
+# タグ・バージョン・ロックのキー（値のエントリではないためサイズ一覧から除く）
+INTERNAL_KEY_PREFIXES = (
+    "route_cache:tag:",
+    "route_cache:version:",
+    "route_cache:lock:",
+)
+
+# プロセス内（L1）キャッシュ
+# ROUTE_CACHE_L1_TTL:
+#   pub/sub の通知を取りこぼした場合に古い値を返し得る上限（秒）。0 で無効
+local_cache = LocalRouteCache(
+    max_size=int(os.getenv("ROUTE_CACHE_L1_SIZE", "1024")),
+    ttl=float(os.getenv("ROUTE_CACHE_L1_TTL", "5")),
+)
+
+
+def user_tag(firebase_uid: str) -> str:
+    """ユーザー本人の情報（/users/me, /care_settings/me）に付けるタグ"""
+    return f"user:{firebase_uid}"
+
+
+def care_setting_tag(care_setting_id: int) -> str:
+    """お世話設定に紐づくデータ（お世話記録・反省文）に付けるタグ"""
+    return f"care_setting:{care_setting_id}"
+
+
+def tag_key(tag: str) -> str:
+    """タグに属するキャッシュキーの集合（Redis SET）のキー"""
+    return f"route_cache:tag:{tag}"
+
+
+def version_key(name: str) -> str:
+    """バージョン番号（書き込みのたびに INCR するカウンタ）のキー
+
+    bump_versions() のバージョン番号と、invalidate_tags() が進めるタグの世代番号に使う
+    """
+    return f"route_cache:version:{name}"
+
+
+def resolve_scope(kwargs: dict[str, Any]) -> Optional[str]:
+    """ルーターの引数からキャッシュを分けるユーザー（firebase_uid）を取り出す"""
+    identity = kwargs.get("identity")
+    if identity is not None:
+        return identity.firebase_uid
+    if "identity" in kwargs:
+        # ユーザー未登録（identity=None）はキャッシュしない
+        return None
+    return kwargs.get("firebase_uid")
+
+
+def route_cache_key(namespace: str, scope: str, kwargs: dict[str, Any]) -> str:
+    """名前空間・ユーザー・ルートパラメータからキャッシュキーを組み立てる"""
+    params = {k: v for k, v in kwargs.items() if k not in IGNORED_PARAMS}
+    encoded = json.dumps(jsonable_encoder(params), sort_keys=True)
+    digest = hashlib.sha256(encoded.encode("utf-8")).hexdigest()[:16]
+    return f"route_cache:{namespace}:{scope}:{digest}"
+
+
+def namespace_of(key: str) -> str:
+    """キャッシュキーから名前空間を取り出す（メトリクスのラベル用）"""
+    return key.split(":")[1]
+
+
+def lock_key(key: str) -> str:
+    """キャッシュキーを再計算中であることを示すロックのキー"""
+    return f"route_cache:lock:{key.removeprefix('route_cache:')}"
+
+
+async def _get(client, key: str) -> Optional[dict[str, Any]]:
+    """保存済みのエントリ（v: 値, h: ETag, d: 計算時間, e: 期限のUNIX時刻）を返す"""
+    try:
+        cached = await client.get(key)
+    except RedisError as e:
+        print(f"[route_cache] GET失敗（DBにフォールバック）: {e}")
+        return None
+    entry = json.loads(cached) if cached else None
+    # 形式の異なる古いエントリはミス扱いにして上書きする
+    if not isinstance(entry, dict) or not {"v", "h", "d", "e"} <= entry.keys():
+        return None
+    return entry
+
+
+def should_refresh_early(entry: dict[str, Any]) -> bool:
+    """期限切れ前に再計算するかを確率的に決める（XFetch）
+
+    計算に時間がかかるエントリほど、期限に近づくほど再計算されやすくなるため、
+    期限ちょうどに全リクエストがミスして DB に集中することを防ぐ
+    """
+    if ROUTE_CACHE_EARLY_REFRESH_BETA <= 0:
+        return False
+    gap = -entry["d"] * ROUTE_CACHE_EARLY_REFRESH_BETA * math.log(1.0 - random.random())
+    return time.time() + gap >= entry["e"]
+
+
+async def _store(
+    client,
+    key: str,
+    value: Any,
+    expire: int,
+    tags: list[str],
+    generation: Optional[str] = None,
+):
+    """値を保存し、タグの集合にキーを登録する（MULTI/EXEC で1往復で送る）
+
+    タグ付きのエントリは、読み込み前に取得したタグの世代番号（generation）が
+    変わっていない場合だけ保存する。読み込み中に invalidate_tags() が世代番号を進めた場合、
+    書き込み前にDBから読んだ値を無効化の後で保存してしまうことを防ぐ
+    （世代番号は WATCH で監視し、確認から保存までの間に進んだ場合も EXEC が失敗する）
+    """
+    if tags and generation is None:
+        # 世代番号を取得できなかった場合は古い値かどうか判断できないため保存しない
+        return
+    payload = json.dumps(value)
+    pipe = client.pipeline(transaction=True)
+    try:
+        if tags:
+            keys = [version_key(tag) for tag in tags]
+            await pipe.watch(*keys)
+            if _format_version(await pipe.mget(keys)) != generation:
+                print(f"[route_cache] 読み込み中に無効化されたため保存しません: {key}")
+                return
+            pipe.multi()
+        pipe.set(key, payload, ex=expire)
+        for tag in tags:
+            pipe.sadd(tag_key(tag), key)
+            pipe.expire(tag_key(tag), ROUTE_CACHE_TAG_TTL)
+        await pipe.execute()
+    except WatchError:
+        print(f"[route_cache] 読み込み中に無効化されたため保存しません: {key}")
+        return
+    except RedisError as e:
+        print(f"[route_cache] SET失敗: {e}")
+        return
+    finally:
+        await pipe.reset()
+    CACHE_VALUE_BYTES.labels(namespace_of(key)).observe(len(payload.encode("utf-8")))
+
+
+async def _acquire_lock(client, key: str):
+    """再計算用のロックを待たずに取得する（取れなければNone）"""
+    lock = client.lock(lock_key(key), timeout=ROUTE_CACHE_LOCK_TIMEOUT)
+    try:
+        if await lock.acquire(blocking=False):
+            return lock
+    except RedisError as e:
+        print(f"[route_cache] ロック取得失敗（ロックなしで再計算）: {e}")
+    return None
+
+
+async def _release_lock(lock) -> None:
+    try:
+        await lock.release()
+    except (LockError, RedisError) as e:
+        # タイムアウトで解放済みの場合など。次の保存には影響しない
+        print(f"[route_cache] ロック解放失敗: {e}")
+
+
+async def _wait_for_entry(client, key: str) -> Optional[dict[str, Any]]:
+    """他プロセスが再計算した値が保存されるのを待つ"""
+    deadline = time.monotonic() + ROUTE_CACHE_LOCK_WAIT
+    while time.monotonic() < deadline:
+        await asyncio.sleep(ROUTE_CACHE_LOCK_POLL_INTERVAL)
+        entry = await _get(client, key)
+        if entry is not None:
+            return entry
+    return None
+
+
+# 同じキーを読み込み中のタスク（プロセス内のシングルフライト）
+_inflight: dict[str, asyncio.Task] = {}
+
+
+async def _single_flight(key: str, load: Callable[[], Awaitable[Any]]) -> Any:
+    """同じキーの同時ミスを1回の読み込みにまとめる"""
+    task = _inflight.get(key)
+    if task is None:
+        task = asyncio.ensure_future(load())
+        _inflight[key] = task
+        task.add_done_callback(lambda _: _inflight.pop(key, None))
+    # 待っている1リクエストがキャンセルされても、読み込み自体は止めない
+    return await asyncio.shield(task)
+
+
+def _format_version(values: Iterable[Optional[str]]) -> str:
+    """MGET したバージョン番号を1つの文字列にする（未設定は 0）"""
+    return ".".join(value or "0" for value in values)
+
+
+async def _get_version(client, names: Iterable[str]) -> Optional[str]:
+    """バージョン番号を取得してキーに付ける文字列にする（Redis障害時はNone）"""
+    keys = [version_key(name) for name in names]
+    try:
+        values = await client.mget(keys)
+    except RedisError as e:
+        print(f"[route_cache] バージョン取得失敗（キャッシュを使わない）: {e}")
+        return None
+    return _format_version(values)
+
+
+def etag_of(value: Any) -> str:
+    """JSONに変換済みの値から ETag を作る（同じ値なら同じレスポンスになるため弱いETag）"""
+    body = json.dumps(value, sort_keys=True, separators=(",", ":"))
+    return f'W/"{hashlib.sha256(body.encode("utf-8")).hexdigest()[:32]}"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """If-None-Match が ETag と一致するか（弱い比較。複数指定・* にも対応）"""
+    if not if_none_match:
+        return False
+    candidates = [c.strip() for c in if_none_match.split(",")]
+    return "*" in candidates or etag.removeprefix("W/") in [
+        c.removeprefix("W/") for c in candidates
+    ]
+
+
+def _with_request_params(func, wrapper) -> list[str]:
+    """ETag の判定に使う request / response をルーターの引数に追加する
+
+    FastAPI はシグネチャから依存関係を解決するため、ルーター側で宣言していない場合だけ
+    wrapper のシグネチャに足す（戻り値は追加した引数名）
+    """
+    signature = inspect.signature(func)
+    added = []
+    parameters = list(signature.parameters.values())
+    for name, annotation in (("request", Request), ("response", Response)):
+        if name not in signature.parameters:
+            parameters.append(
+                inspect.Parameter(
+                    name, inspect.Parameter.KEYWORD_ONLY, annotation=annotation
+                )
+            )
+            added.append(name)
+    wrapper.__signature__ = signature.replace(parameters=parameters)
+    return added
+
+
+def cached_route(
+    namespace: str,
+    expire: int,
+    tags: Optional[Callable[..., Iterable[str]]] = None,
+    versions: Optional[Callable[..., Iterable[str]]] = None,
+    etag: bool = False,
+):
+    """GETルーターの結果をユーザー・ルートパラメータ単位でキャッシュするデコレータ
+
+    - キーは route_cache:{namespace}:{firebase_uid}:{パラメータのハッシュ}
+    - tags はルーターと同じ引数を受け取り、エントリに付けるタグを返す
+    - versions を指定すると、返したバージョン番号をキーに含める
+      （書き込み側で bump_versions() すると次の読み込みから別のキーになる）
+    - 例外（HTTPException を含む）になった結果はキャッシュしない
+    - 書き込み側では invalidate_tags() でタグごとまとめて破棄する
+      （読み込み中に無効化された場合は、読み込んだ値を保存しない）
+    - ミス時の読み込みはプロセス内で1回、プロセス間では Redis のロックで1回にまとめ、
+      アクセスの多いキーは期限前に確率的に再計算する
+    - etag=True の場合は ETag ヘッダーを付け、If-None-Match が一致すれば 304 を返す
+      （ETag はエントリと一緒に保存するため、ヒット時はシリアライズせずに判定できる。
+      キャッシュを使えない場合は ETag を付けず通常どおり 200 を返す）
+    """
+    if expire > ROUTE_CACHE_TAG_TTL:
+        raise ValueError(f"expire は {ROUTE_CACHE_TAG_TTL} 秒以下にしてください: {expire}")
+
+    def entry_tags(kwargs) -> list[str]:
+        return list(tags(**kwargs)) if tags is not None else []
+
+    def decorator(func):
+        async def load(client, key: str, stale: Optional[dict[str, Any]], kwargs):
+            """ルーターを実行して保存する（戻り値は (ルーターの結果, 保存したエントリ)）"""
+            lock = await _acquire_lock(client, key)
+            if lock is None:
+                # 他プロセスが再計算中。期限内の値があればそれを返す
+                if stale is not None:
+                    return stale["v"], stale
+                entry = await _wait_for_entry(client, key)
+                if entry is not None:
+                    return entry["v"], entry
+            try:
+                # DB を読む前にタグの世代番号を取得しておき、保存時に変わっていないか確認する
+                tags_of_entry = entry_tags(kwargs)
+                generation = (
+                    await _get_version(client, tags_of_entry) if tags_of_entry else None
+                )
+                started = time.monotonic()
+                result = await func(**kwargs)
+                value = jsonable_encoder(result)
+                entry = {
+                    "v": value,
+                    "h": etag_of(value),
+                    "d": time.monotonic() - started,
+                    "e": time.time() + expire,
+                }
+                CACHE_LOAD_SECONDS.labels(namespace).observe(entry["d"])
+                await _store(client, key, entry, expire, tags_of_entry, generation)
+                return result, entry
+            finally:
+                if lock is not None:
+                    await _release_lock(lock)
+
+        async def cached_call(kwargs) -> tuple[Any, Optional[str]]:
+            """キャッシュ経由でルーターを呼び出す（戻り値は (結果, ETag)）"""
+            client = get_redis_client()
+            scope = resolve_scope(kwargs)
+            if not ENABLE_CACHE or client is None or scope is None:
+                CACHE_BYPASSES.labels(namespace).inc()
+                return await func(**kwargs), None
+
+            version_names = list(versions(**kwargs)) if versions is not None else []
+            if has_pending_invalidation(version_names + entry_tags(kwargs)):
+                # 障害で送れていない無効化がある間は、書き込み前のエントリを返さない
+                CACHE_BYPASSES.labels(namespace).inc()
+                return await func(**kwargs), None
+
+            key = route_cache_key(namespace, scope, kwargs)
+            if versions is not None:
+                version = await _get_version(client, version_names)
+                if version is None:
+                    CACHE_BYPASSES.labels(namespace).inc()
+                    return await func(**kwargs), None
+                key = f"{key}:v{version}"
+
+            # 無効化の通知を受け取れる間だけ L1 を使う
+            use_local = invalidation_listener.subscribed
+            generation = local_cache.generation
+            if use_local:
+                cached = local_cache.get(key)
+                if cached is not None:
+                    CACHE_HITS.labels(namespace, "local").inc()
+                    return cached["v"], cached["h"]
+
+            entry = await _get(client, key)
+            if entry is not None and not should_refresh_early(entry):
+                CACHE_HITS.labels(namespace, "redis").inc()
+                if use_local:
+                    local_cache.set(key, entry, entry_tags(kwargs), generation)
+                return entry["v"], entry["h"]
+
+            CACHE_MISSES.labels(namespace).inc()
+            result, entry = await _single_flight(
+                key, lambda: load(client, key, entry, kwargs)
+            )
+            if use_local:
+                local_cache.set(key, entry, entry_tags(kwargs), generation)
+            return result, entry["h"]
+
+        @functools.wraps(func)
+        async def wrapper(**kwargs):
+            request = kwargs.get("request")
+            response = kwargs.get("response")
+            for name in added_params:
+                del kwargs[name]
+
+            result, current_etag = await cached_call(kwargs)
+            # キャッシュを使えなかった場合（Redis 未接続など）は ETag を付けない
+            if not etag or current_etag is None:
+                return result
+
+            if request is not None and etag_matches(
+                request.headers.get("if-none-match"), current_etag
+            ):
+                return Response(status_code=304, headers={"ETag": current_etag})
+            if response is not None:
+                response.headers["ETag"] = current_etag
+            return result
+
+        added_params = _with_request_params(func, wrapper) if etag else []
+        return wrapper
+
+    return decorator
+
+
+# Redis 障害で送れなかった無効化（バージョン番号の INCR・タグの削除）
+# 再送できるまで、該当するキャッシュは自プロセスでは使わない
+_pending_versions: set[str] = set()
+_pending_tags: set[str] = set()
+_resend_task: Optional[asyncio.Task] = None
+
+
+def has_pending_invalidation(names: Iterable[str]) -> bool:
+    """バージョン名・タグのいずれかに、障害で送れていない無効化が残っているか"""
+    return any(name in _pending_versions or name in _pending_tags for name in names)
+
+
+def _defer_invalidation(versions: Iterable[str] = (), tags: Iterable[str] = ()):
+    """送れなかった無効化を記録し、再送タスクを起動する
+
+    破棄できなかったエントリ（/me は1時間、identity は10分）が
+    Redis の復旧後に有効なまま読まれないよう、復旧を待って再送する
+    """
+    global _resend_task  # pylint: disable=global-statement
+    _pending_versions.update(versions)
+    _pending_tags.update(tags)
+    if _resend_task is None or _resend_task.done():
+        _resend_task = asyncio.create_task(_resend_pending_invalidations())
+
+
+async def _resend_pending_invalidations() -> None:
+    while _pending_versions or _pending_tags:
+        await asyncio.sleep(INVALIDATION_RESEND_SECONDS)
+        await flush_pending_invalidations()
+
+
+async def flush_pending_invalidations() -> bool:
+    """障害で送れなかった無効化を再送する（すべて送れたら True）"""
+    client = get_redis_client(force=True)
+    versions, tags = list(_pending_versions), list(_pending_tags)
+    if not versions and not tags:
+        return True
+    if client is None:
+        return False
+    try:
+        await _incr_versions(client, versions)
+        await _delete_tagged(client, tags)
+    except RedisError as e:
+        print(f"[route_cache] 無効化の再送失敗: {e}")
+        return False
+    _pending_versions.difference_update(versions)
+    _pending_tags.difference_update(tags)
+    print(f"[route_cache] 無効化を再送しました: {', '.join(versions + tags)}")
+    return True
+
+
+async def _incr_versions(client, names: list[str]) -> None:
+    """バージョン番号・タグの世代番号を INCR する（1往復で送る）"""
+    if not names:
+        return
+    pipe = client.pipeline(transaction=False)
+    for name in names:
+        pipe.incr(version_key(name))
+    await pipe.execute()
+
+
+async def _delete_tagged(client, tags: list[str]) -> None:
+    """タグの世代番号を進めてからタグに属するキーを削除し、他ワーカーに通知する"""
+    if not tags:
+        return
+    await _incr_versions(client, tags)
+    for tag in tags:
+        keys = await client.smembers(tag_key(tag))
+        await client.delete(*keys, tag_key(tag))
+        for key in keys:
+            CACHE_INVALIDATIONS.labels(namespace_of(key)).inc()
+    await client.publish(INVALIDATION_CHANNEL, json.dumps(tags))
+
+
+async def invalidate_tags(*tags: str) -> None:
+    """タグが付いたキャッシュをまとめて破棄する（書き込み系APIから呼び出す）
+
+    自プロセスの L1 は即座に、他ワーカーの L1 は pub/sub の通知で破棄する。
+    削除の前にタグの世代番号を進め、書き込み前に読み込み中だった値が
+    削除の後に保存されないようにする（_store を参照）。
+    Redis 障害で送れなかった場合は、復旧後に再送する
+    """
+    client = get_redis_client(force=True)
+    if not ENABLE_CACHE or client is None or not tags:
+        return
+    local_cache.evict_tags(tags)
+    try:
+        await _delete_tagged(client, list(tags))
+        print(f"[route_cache] キャッシュクリア完了: {', '.join(tags)}")
+    except RedisError as e:
+        print(f"[route_cache] DELETE失敗（復旧後に再送）: {e}")
+        _defer_invalidation(tags=tags)
+
+
+async def bump_versions(*names: str) -> None:
+    """バージョン番号を進め、古いバージョンのキャッシュを読まれないようにする
+
+    INCR はアトミックなため、同時に書き込みがあっても番号が戻ることはない。
+    古いキーは削除せず expire で消えるのを待つ。
+    Redis 障害で送れなかった場合は、復旧後に再送する
+    """
+    client = get_redis_client(force=True)
+    if not ENABLE_CACHE or client is None or not names:
+        return
+    try:
+        await _incr_versions(client, list(names))
+        print(f"[route_cache] バージョン更新完了: {', '.join(names)}")
+    except RedisError as e:
+        print(f"[route_cache] バージョン更新失敗（復旧後に再送）: {e}")
+        _defer_invalidation(versions=names)
+        return
+    for name in names:
+        CACHE_VERSION_BUMPS.labels(name.split(":")[0]).inc()
+
+
+async def top_keys_by_size(
+    limit: int = 20, namespace: Optional[str] = None
+) -> list[dict[str, Any]]:
+    """保存済みのキャッシュキーをサイズの大きい順に返す（管理用API から呼び出す）
+
+    SCAN で走査するため Redis をブロックしないが、走査するキー数は ROUTE_CACHE_SCAN_MAX までとする。
+    サイズは STRLEN（シリアライズ後のバイト数）で、Redis 内部のオーバーヘッドは含まない
+
+    Raises:
+        RedisError: Redis 未接続・遮断中、または走査に失敗した場合
+    """
+    client = get_redis_client()
+    if client is None:
+        raise RedisError("Redis client is not available")
+
+    match = f"route_cache:{namespace}:*" if namespace else "route_cache:*"
+    keys = []
+    async for key in client.scan_iter(match=match, count=500):
+        if not key.startswith(INTERNAL_KEY_PREFIXES):
+            keys.append(key)
+        if len(keys) >= ROUTE_CACHE_SCAN_MAX:
+            break
+
+    pipe = client.pipeline(transaction=False)
+    for key in keys:
+        pipe.strlen(key)
+        pipe.ttl(key)
+    results = await pipe.execute() if keys else []
+
+    sizes = [
+        {
+            "key": key,
+            "namespace": namespace_of(key),
+            "bytes": results[i * 2],
+            "ttl": results[i * 2 + 1],
+        }
+        for i, key in enumerate(keys)
+    ]
+    # 走査中に期限切れになったキー（STRLEN が 0）は除く
+    return heapq.nlargest(
+        limit, [s for s in sizes if s["bytes"] > 0], key=lambda s: s["bytes"]
+    )
+
+
+class InvalidationListener:
+    """他ワーカーからの無効化通知（pub/sub）を受け取り L1 から破棄するクラス
+
+    - 購読中だけ subscribed を True にし、その間だけ L1 を使わせる
+    - 切断時は通知を取りこぼした可能性があるため L1 を全消去して再接続する
+    """
+
+    def __init__(self, cache: LocalRouteCache, channel: str = INVALIDATION_CHANNEL):
+        self.cache = cache
+        self.channel = channel
+        self.subscribed = False
+        self._task: Optional[asyncio.Task] = None
+
+    async def _listen(self, client) -> None:
+        while True:
+            pubsub = client.pubsub(ignore_subscribe_messages=True)
+            try:
+                await pubsub.subscribe(self.channel)
+                self.cache.clear()
+                self.subscribed = True
+                while True:
+                    # 接続プールの socket_timeout は短いため、待ち時間を明示して受信する
+                    message = await pubsub.get_message(
+                        ignore_subscribe_messages=True,
+                        timeout=INVALIDATION_POLL_TIMEOUT,
+                    )
+                    if message is not None:
+                        self.cache.evict_tags(json.loads(message["data"]))
+            except (RedisError, ValueError) as e:
+                print(f"[route_cache] 無効化通知の購読に失敗しました: {e}")
+            finally:
+                self.subscribed = False
+                self.cache.clear()
+                await pubsub.aclose()
+            await asyncio.sleep(INVALIDATION_RETRY_SECONDS)
+
+    def start(self, client) -> None:
+        """購読タスクを開始する（main.lifespan から呼び出す）"""
+        if ENABLE_CACHE and self._task is None:
+            self._task = asyncio.create_task(self._listen(client))
+
+    async def stop(self) -> None:
+        """購読タスクを停止する"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+
+invalidation_listener = InvalidationListener(local_cache)
@@ -0,0 +1,43 @@
+# route_cache の効果を測るための Prometheus メトリクス
+# NOTE: 既定のレジストリに登録するため、main.py の Instrumentator が公開する /metrics にそのまま出る
+
+from prometheus_client import Counter, Histogram
+
+# namespace はルーターごとに cached_route() へ渡した名前
+CACHE_HITS = Counter(
+    "route_cache_hits_total",
+    "キャッシュから返したリクエスト数（layer: local=プロセス内 / redis）",
+    ["namespace", "layer"],
+)
+CACHE_MISSES = Counter(
+    "route_cache_misses_total",
+    "キャッシュになくルーターを実行したリクエスト数（期限前の再計算を含む）",
+    ["namespace"],
+)
+CACHE_BYPASSES = Counter(
+    "route_cache_bypasses_total",
+    "Redis 未接続・遮断中などでキャッシュを使わなかったリクエスト数",
+    ["namespace"],
+)
+CACHE_LOAD_SECONDS = Histogram(
+    "route_cache_load_seconds",
+    "ミス時にルーターの実行にかかった時間（秒）",
+    ["namespace"],
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0),
+)
+CACHE_VALUE_BYTES = Histogram(
+    "route_cache_value_bytes",
+    "Redis に保存したエントリのサイズ（シリアライズ後のバイト数）",
+    ["namespace"],
+    buckets=(256, 1024, 4096, 16384, 65536, 262144, 1048576),
+)
+CACHE_INVALIDATIONS = Counter(
+    "route_cache_invalidations_total",
+    "invalidate_tags() で削除したキャッシュキーの数",
+    ["namespace"],
+)
+CACHE_VERSION_BUMPS = Counter(
+    "route_cache_version_bumps_total",
+    "bump_versions() で進めたバージョン番号の数（version: user など名前の種類）",
+    ["version"],
+)
@@ -0,0 +1,87 @@
+# verify_firebase_token から使う検証済みIDトークンのキャッシュ
+
+import hashlib
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Optional
+
+
+class VerifiedTokenCache:
+    """検証済みFirebase IDトークンを保持するLRU+TTLキャッシュ
+
+    - キーはトークン文字列のSHA-256ハッシュ（生のトークンはメモリに残さない）
+    - 有効期限はトークンの exp。max_age を指定した場合はその秒数で頭打ちにする
+    - 非同期の verify_firebase_token からイベントループ上で呼ばれる。各メソッドは
+      await を含まず途中で切り替わらないため、ロックは持たない
+      （スレッドから使う場合は呼び出し側で排他すること）
+    """
+
+    def __init__(
+        self,
+        max_size: int = 1024,
+        max_age: Optional[float] = None,
+        clock: Callable[[], float] = time.time,
+    ):
+        self.max_size = max_size
+        self.max_age = max_age
+        self._clock = clock
+        self._entries: "OrderedDict[str, tuple[float, dict[str, Any]]]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def _key(id_token: str) -> str:
+        return hashlib.sha256(id_token.encode("utf-8")).hexdigest()
+
+    def get(self, id_token: str) -> Optional[dict[str, Any]]:
+        """キャッシュ済みのデコード結果を返す（期限切れ・未登録ならNone）"""
+        key = self._key(id_token)
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+
+        expires_at, decoded_token = entry
+        if expires_at <= self._clock():
+            del self._entries[key]
+            self.misses += 1
+            return None
+
+        # LRU: 参照されたエントリを末尾に移動
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return decoded_token
+
+    def set(self, id_token: str, decoded_token: dict[str, Any]) -> None:
+        """検証済みトークンを登録する（exp を持たないトークンはキャッシュしない）"""
+        exp = decoded_token.get("exp")
+        if exp is None:
+            return
+
+        now = self._clock()
+        expires_at = float(exp)
+        if self.max_age is not None:
+            expires_at = min(expires_at, now + self.max_age)
+        if expires_at <= now:
+            return
+
+        key = self._key(id_token)
+        self._entries[key] = (expires_at, decoded_token)
+        self._entries.move_to_end(key)
+        # 上限を超えたら最も古く参照されたエントリから削除
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        """全エントリと統計をリセットする"""
+        self._entries.clear()
+        self.hits = 0
+        self.misses = 0
+
+    def stats(self) -> dict[str, int]:
+        """ヒット数・ミス数・保持件数を返す"""
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "size": len(self._entries),
+        }
@@ -0,0 +1,162 @@
+# Webhook イベントの種類ごとの処理（ハンドラー）を登録して呼び出す仕組み
+# NOTE: webhook_worker（取得したバッチごと）と POST /api/webhook_events/process（未処理すべて）の両方がここを通る
+
+import asyncio
+import json
+from typing import Any, Awaitable, Callable, Iterable, Optional
+
+from app.db import prisma_client
+
+# (event, fields) のリスト。fields は payload の data.object から取り出した値
+WebhookItems = list[tuple[Any, dict[str, Any]]]
+
+
+class WebhookEventHandler:
+    """1種類のイベントの処理
+
+    - fields: payload の data.object から取り出す項目（payload の解析はイベントごとに1回だけ）
+    - required: fields のうち、なければ処理せずスキップする項目
+    - prepare: 対象のイベント全体に対して1回だけ呼ばれ、必要なデータをまとめて取得して
+      処理できるものだけを返す（省略可）
+    - handle: チャンクごとに呼ばれ、1トランザクションで適用する（例外ならチャンク全体を失敗とする）
+    """
+
+    def __init__(
+        self,
+        event_type: str,
+        handle: Callable[[WebhookItems], Awaitable[None]],
+        fields: Iterable[str],
+        required: Iterable[str] = (),
+        prepare: Optional[Callable[[WebhookItems], Awaitable[WebhookItems]]] = None,
+    ):
+        self.event_type = event_type
+        self.handle = handle
+        self.fields = tuple(fields)
+        self.required = tuple(required)
+        self.prepare = prepare
+
+
+_handlers: dict[str, WebhookEventHandler] = {}
+
+
+def register_webhook_handler(
+    event_type: str,
+    fields: Iterable[str],
+    required: Iterable[str] = (),
+    prepare: Optional[Callable[[WebhookItems], Awaitable[WebhookItems]]] = None,
+):
+    """イベントの種類に処理を登録するデコレーター
+
+    例:
+        @register_webhook_handler("charge.refunded", fields=("id", "amount_refunded"))
+        async def apply_refunds(items):
+            ...
+    """
+
+    def decorator(handle: Callable[[WebhookItems], Awaitable[None]]):
+        _handlers[event_type] = WebhookEventHandler(
+            event_type, handle, fields, required, prepare
+        )
+        return handle
+
+    return decorator
+
+
+def get_webhook_handler(event_type: str) -> Optional[WebhookEventHandler]:
+    """登録済みの処理を返す（未登録なら None）"""
+    return _handlers.get(event_type)
+
+
+def handled_event_types() -> list[str]:
+    """処理を登録済みのイベントの種類"""
+    return list(_handlers)
+
+
+def parse_webhook_event(
+    event: Any, handler: WebhookEventHandler
+) -> Optional[dict[str, Any]]:
+    """payload を復元して handler.fields を取り出す（required が欠けていれば None）"""
+    # payloadを復元する(文字列ならjson.loads、dictならそのまま)
+    if isinstance(event.payload, dict):
+        payload = event.payload
+    else:
+        payload = json.loads(event.payload)
+    data_object = payload.get("data", {}).get("object", {})
+
+    fields = {name: data_object.get(name) for name in handler.fields}
+    missing = [name for name in handler.required if not fields.get(name)]
+    if missing:
+        print(f"[WARN] {', '.join(missing)}が取れないのでスキップ: {event.id}")
+        return None
+    return fields
+
+
+async def prepare_webhook_chunks(
+    events: Iterable[Any], chunk_size: int
+) -> tuple[list[tuple[WebhookEventHandler, WebhookItems]], int]:
+    """イベントを種類ごとに解析し、chunk_size 件ずつのチャンクに分ける
+
+    Returns:
+        tuple: (処理, チャンク) のリストとスキップした件数
+    """
+    grouped: dict[str, WebhookItems] = {}
+    skipped = 0
+    for event in events:
+        handler = get_webhook_handler(event.event_type)
+        if handler is None:
+            print(f"[WARN] 処理が登録されていないイベントなのでスキップ: {event.id}")
+            skipped += 1
+            continue
+        fields = parse_webhook_event(event, handler)
+        if fields is None:
+            skipped += 1
+            continue
+        grouped.setdefault(event.event_type, []).append((event, fields))
+
+    chunks = []
+    for event_type, items in grouped.items():
+        handler = _handlers[event_type]
+        if handler.prepare is not None:
+            prepared = await handler.prepare(items)
+            skipped += len(items) - len(prepared)
+            items = prepared
+        chunks.extend(
+            (handler, items[i : i + chunk_size])
+            for i in range(0, len(items), chunk_size)
+        )
+    return chunks, skipped
+
+
+async def apply_webhook_chunks(
+    chunks: list[tuple[WebhookEventHandler, WebhookItems]], concurrency: int
+):
+    """チャンクを concurrency 件ずつ並行して適用し、終わった順に結果を返す
+
+    失敗したチャンクは error_message を記録して残りの処理を続ける
+
+    Yields:
+        tuple[int, int]: (処理した件数, 失敗した件数)
+    """
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def apply_chunk(handler: WebhookEventHandler, items: WebhookItems):
+        async with semaphore:
+            try:
+                await handler.handle(items)
+                return len(items), 0
+            except Exception as e:  # pylint: disable=broad-exception-caught
+                print(f"[ERROR] Webhookイベントの処理に失敗しました: {e}")
+                # エラー内容をwebhook_eventsテーブルに保存
+                try:
+                    await prisma_client.webhook_events.update_many(
+                        where={"id": {"in": [event.id for event, _ in items]}},
+                        data={"error_message": str(e)},
+                    )
+                except Exception as err:  # pylint: disable=broad-exception-caught
+                    print(f"[ERROR] エラー内容の保存に失敗しました: {err}")
+                return 0, len(items)
+
+    for result in asyncio.as_completed(
+        [apply_chunk(handler, items) for handler, items in chunks]
+    ):
+        yield await result
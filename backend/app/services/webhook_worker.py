@@ -0,0 +1,128 @@
+# 保存済みの Webhook イベントをバックグラウンドで処理するワーカー
+
+import asyncio
+import os
+from typing import Any, Awaitable, Callable, Optional
+
+from app.db import prisma_client
+from app.services.webhook_handlers import handled_event_types
+
+# アプリ内で起動するワーカー数（0 にすると起動しない。python -m app.worker で別プロセスとして動かす場合など）
+WEBHOOK_WORKERS = int(os.getenv("WEBHOOK_WORKERS", "2"))
+# 1回に取得するイベント数
+WEBHOOK_WORKER_BATCH_SIZE = int(os.getenv("WEBHOOK_WORKER_BATCH_SIZE", "10"))
+# 未処理イベントがないときに次に確認するまでの秒数（受信時は待たずに起こす）
+WEBHOOK_WORKER_POLL_INTERVAL = float(os.getenv("WEBHOOK_WORKER_POLL_INTERVAL", "5"))
+# 取得したワーカーが落ちた場合に、他のワーカーが取り直せるようになるまでの秒数
+WEBHOOK_CLAIM_LEASE_SECONDS = float(os.getenv("WEBHOOK_CLAIM_LEASE_SECONDS", "300"))
+# 処理に失敗したイベントを取り直す回数の上限
+WEBHOOK_MAX_ATTEMPTS = int(os.getenv("WEBHOOK_MAX_ATTEMPTS", "5"))
+
+# 未処理のイベントを取得済みにする
+# - FOR UPDATE SKIP LOCKED で、他のワーカーが取得中の行は待たずに飛ばす
+# - claimed_at を更新してからコミットするため、ロックを外した後も
+#   リース期間中は他のワーカーに取得されない（同じイベントを二重に処理しない）
+CLAIM_WEBHOOK_EVENTS_SQL = """
+UPDATE "webhook_events"
+SET "claimed_at" = NOW(), "attempts" = "attempts" + 1
+WHERE "id" IN (
+    SELECT "id" FROM "webhook_events"
+    WHERE "processed" = false
+      AND "event_type" = ANY($3::text[])
+      AND "attempts" < $1::integer
+      AND ("claimed_at" IS NULL
+           OR "claimed_at" < NOW() - make_interval(secs => $2::double precision))
+    ORDER BY "received_at" ASC
+    LIMIT $4::integer
+    FOR UPDATE SKIP LOCKED
+)
+RETURNING "id"
+"""
+
+
+async def claim_webhook_events(batch_size: int) -> list[Any]:
+    """処理が登録されている種類の未処理イベントを最大 batch_size 件取得し、他のワーカーから見えなくする"""
+    rows = await prisma_client.query_raw(
+        CLAIM_WEBHOOK_EVENTS_SQL,
+        WEBHOOK_MAX_ATTEMPTS,
+        WEBHOOK_CLAIM_LEASE_SECONDS,
+        handled_event_types(),
+        batch_size,
+    )
+    if not rows:
+        return []
+    return await prisma_client.webhook_events.find_many(
+        where={"id": {"in": [row["id"] for row in rows]}},
+        order={"received_at": "asc"},
+    )
+
+
+class WebhookWorkerPool:
+    """保存済みの Webhook イベントを複数のワーカーで取得して処理するクラス
+
+    - 各ワーカーは claim_webhook_events() でまとめて取得し、取得したリストをそのまま handler に渡す
+      （handler 側で種類ごとにまとめて適用する）
+    - 未処理がなければ WEBHOOK_WORKER_POLL_INTERVAL 秒待つ（notify() で待たずに起こせる）
+    - 別プロセス・別サーバーのワーカーと同時に動かしても同じイベントを二重に処理しない
+    """
+
+    def __init__(self):
+        self._handler: Optional[Callable[[list[Any]], Awaitable[None]]] = None
+        self._tasks: list[asyncio.Task] = []
+        self._wake = asyncio.Event()
+
+    def notify(self) -> None:
+        """新しいイベントを保存したことを待機中のワーカーに知らせる"""
+        self._wake.set()
+
+    async def run_once(self, batch_size: int = WEBHOOK_WORKER_BATCH_SIZE) -> int:
+        """1バッチ分を取得して処理する（戻り値は取得した件数）"""
+        events = await claim_webhook_events(batch_size)
+        if events:
+            try:
+                await self._handler(events)
+            except Exception as e:  # pylint: disable=broad-exception-caught
+                # 失敗したイベントはリース期間後に取り直される
+                print(f"[webhook_worker] {len(events)}件の処理に失敗しました: {e}")
+        return len(events)
+
+    async def _work(self) -> None:
+        while True:
+            try:
+                claimed = await self.run_once()
+            except Exception as e:  # pylint: disable=broad-exception-caught
+                print(f"[webhook_worker] イベントの取得に失敗しました: {e}")
+                claimed = 0
+            if claimed:
+                # 続きがあるかもしれないため待たずに次のバッチを取得する
+                continue
+            try:
+                await asyncio.wait_for(
+                    self._wake.wait(), timeout=WEBHOOK_WORKER_POLL_INTERVAL
+                )
+            except asyncio.TimeoutError:
+                pass
+            self._wake.clear()
+
+    def start(
+        self,
+        handler: Callable[[list[Any]], Awaitable[None]],
+        workers: int = WEBHOOK_WORKERS,
+    ) -> None:
+        """ワーカーを起動する（prisma_client の接続後に呼び出す）"""
+        self._handler = handler
+        if self._tasks or workers <= 0:
+            return
+        self._wake = asyncio.Event()
+        self._tasks = [asyncio.create_task(self._work()) for _ in range(workers)]
+        print(f"[webhook_worker] {workers}件のワーカーを起動しました")
+
+    async def stop(self) -> None:
+        """ワーカーを停止する（処理中のイベントはリース期間後に取り直される）"""
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+
+webhook_worker = WebhookWorkerPool()
@@ -0,0 +1,43 @@
+"""Webhookイベント処理ワーカーのエントリーポイント
+
+APIサーバーとは別プロセスで動かす場合に使う（python -m app.worker）。
+APIサーバー側のワーカーを止める場合は WEBHOOK_WORKERS=0 を指定する
+"""
+
+import asyncio
+import os
+
+from dotenv import load_dotenv
+
+# .envファイルから環境変数を読み込む（依存関係のあるモジュールより先に実行する必要がある）
+load_dotenv()
+
+# NOTE: 以下の import は load_dotenv() の後に配置する必要がある
+# pylint: disable-next=wrong-import-position,wrong-import-order
+from app.db import prisma_client
+from app.redis_client import create_redis_client, set_redis_client
+from app.routers.webhook_events import process_claimed_webhook_events
+from app.services.webhook_worker import webhook_worker
+
+
+async def main() -> None:
+    """ワーカーを起動し、停止されるまで処理を続ける"""
+    # プラン変更時に identity キャッシュなどを破棄するため Redis にも接続する
+    redis_client = create_redis_client()
+    set_redis_client(redis_client)
+    await prisma_client.connect()
+
+    # API サーバー側の WEBHOOK_WORKERS とは別に、このプロセスで動かすワーカー数を指定する
+    workers = int(os.getenv("WEBHOOK_WORKER_CONCURRENCY", "4"))
+    webhook_worker.start(process_claimed_webhook_events, workers=workers)
+    try:
+        await asyncio.Event().wait()
+    finally:
+        await webhook_worker.stop()
+        await prisma_client.disconnect()
+        set_redis_client(None)
+        await redis_client.aclose(close_connection_pool=True)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,31 @@
+/*
+  Warnings:
+
+  - Duplicate rows for the same care_setting_id and date are merged into the row with the smallest id, so that the unique index `care_logs_care_setting_id_date_key` can be built in the next migration.
+  - The indexes are created with CREATE INDEX CONCURRENTLY, one per migration, because PostgreSQL does not allow it inside a transaction block and Prisma runs a multi-statement migration as one.
+
+*/
+-- 同じ日付の重複した記録を最小idの行に統合する
+WITH "merged" AS (
+    SELECT MIN("id") AS "keep_id",
+           BOOL_OR("fed_morning") AS "fed_morning",
+           BOOL_OR("fed_night") AS "fed_night",
+           BOOL_OR("walk_result") AS "walk_result",
+           MAX("walk_total_distance_m") AS "walk_total_distance_m"
+    FROM "care_logs"
+    GROUP BY "care_setting_id", "date"
+    HAVING COUNT(*) > 1
+)
+UPDATE "care_logs" AS "c"
+SET "fed_morning" = "m"."fed_morning",
+    "fed_night" = "m"."fed_night",
+    "walk_result" = "m"."walk_result",
+    "walk_total_distance_m" = "m"."walk_total_distance_m"
+FROM "merged" AS "m"
+WHERE "c"."id" = "m"."keep_id";
+
+DELETE FROM "care_logs" AS "c"
+USING "care_logs" AS "d"
+WHERE "c"."care_setting_id" = "d"."care_setting_id"
+  AND "c"."date" = "d"."date"
+  AND "c"."id" > "d"."id";
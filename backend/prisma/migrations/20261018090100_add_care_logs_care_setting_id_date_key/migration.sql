@@ -0,0 +1,10 @@
+/*
+  Warnings:
+
+  - A unique constraint covering the columns `[care_setting_id,date]` on the table `care_logs` will be added. If rows were duplicated again after 20261018090000_merge_duplicate_care_logs, the build fails; re-run that merge first.
+
+*/
+-- CONCURRENTLY は書き込みを止めずに作成する（トランザクション内では使えないため、この文だけのマイグレーションにする）
+-- 失敗した場合は INVALID なインデックスが残るので、DROP INDEX CONCURRENTLY してから再実行する
+-- CreateIndex
+CREATE UNIQUE INDEX CONCURRENTLY IF NOT EXISTS "care_logs_care_setting_id_date_key" ON "care_logs"("care_setting_id", "date");
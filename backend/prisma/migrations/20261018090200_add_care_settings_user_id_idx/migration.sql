@@ -0,0 +1,4 @@
+-- CONCURRENTLY は書き込みを止めずに作成する（トランザクション内では使えないため、この文だけのマイグレーションにする）
+-- 失敗した場合は INVALID なインデックスが残るので、DROP INDEX CONCURRENTLY してから再実行する
+-- CreateIndex
+CREATE INDEX CONCURRENTLY IF NOT EXISTS "care_settings_user_id_idx" ON "care_settings"("user_id");
@@ -0,0 +1,4 @@
+-- CONCURRENTLY は書き込みを止めずに作成する（トランザクション内では使えないため、この文だけのマイグレーションにする）
+-- 失敗した場合は INVALID なインデックスが残るので、DROP INDEX CONCURRENTLY してから再実行する
+-- CreateIndex
+CREATE INDEX CONCURRENTLY IF NOT EXISTS "reflection_notes_care_setting_id_created_at_idx" ON "reflection_notes"("care_setting_id", "created_at");
@@ -0,0 +1,53 @@
+/*
+  Warnings:
+
+  - The `date` column on the `care_logs` table is converted from TEXT to DATE without rewriting the table under an exclusive lock (expand and contract):
+    1. add a nullable `date_value` DATE column kept in sync by a trigger (this migration)
+    2. backfill existing rows in batches, committing each batch
+    3. merge rows that fall on the same date once truncated (e.g. "2025-07-01" and "2025-07-01T09:00:00Z")
+    4. build the unique index on `date_value` concurrently
+    5. add and validate a NOT NULL check without blocking writes
+    6. swap the columns in one short transaction
+  - Values are "YYYY-MM-DD" strings written by create_care_log; ISO timestamps are truncated to their date part.
+
+*/
+-- 長時間のロック待ちでAPIを止めないよう、ロックが取れなければ失敗させる（再実行可能）
+SET lock_timeout = '5s';
+
+-- AlterTable（NULL 許可・デフォルトなしの列追加はテーブルを書き換えない）
+ALTER TABLE "care_logs" ADD COLUMN "date_value" DATE;
+
+RESET lock_timeout;
+
+-- 移行中に書き込まれた行も date_value を埋める
+CREATE FUNCTION "care_logs_sync_date_value"() RETURNS TRIGGER
+LANGUAGE plpgsql AS $$
+BEGIN
+    NEW."date_value" := substring(NEW."date" from 1 for 10)::DATE;
+    RETURN NEW;
+END;
+$$;
+
+CREATE TRIGGER "care_logs_sync_date_value"
+BEFORE INSERT OR UPDATE OF "date" ON "care_logs"
+FOR EACH ROW EXECUTE FUNCTION "care_logs_sync_date_value"();
+
+-- 既存行の埋め戻し（id の範囲ごとに COMMIT し、行ロックを長く持たない）
+CREATE PROCEDURE "backfill_care_logs_date_value"("batch_size" INTEGER DEFAULT 5000)
+LANGUAGE plpgsql AS $$
+DECLARE
+    "last_id" INTEGER := 0;
+    "max_id" INTEGER;
+BEGIN
+    SELECT COALESCE(MAX("id"), 0) INTO "max_id" FROM "care_logs";
+    WHILE "last_id" < "max_id" LOOP
+        UPDATE "care_logs"
+        SET "date_value" = substring("date" from 1 for 10)::DATE
+        WHERE "id" > "last_id"
+          AND "id" <= "last_id" + "batch_size"
+          AND "date_value" IS NULL;
+        "last_id" := "last_id" + "batch_size";
+        COMMIT;
+    END LOOP;
+END;
+$$;
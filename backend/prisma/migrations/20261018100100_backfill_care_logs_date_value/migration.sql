@@ -0,0 +1,2 @@
+-- バッチごとに COMMIT するため、トランザクションの外で実行できるようこの文だけのマイグレーションにする
+CALL "backfill_care_logs_date_value"();
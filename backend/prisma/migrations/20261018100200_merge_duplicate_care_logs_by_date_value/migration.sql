@@ -0,0 +1,27 @@
+-- 文字列では別の値でも、日付に変換すると同じになる記録を最小idの行に統合する
+-- （例: "2025-07-01" と "2025-07-01T09:00:00Z"。このままでは DATE 型のユニークインデックスを作れない）
+WITH "merged" AS (
+    SELECT MIN("id") AS "keep_id",
+           BOOL_OR("fed_morning") AS "fed_morning",
+           BOOL_OR("fed_night") AS "fed_night",
+           BOOL_OR("walk_result") AS "walk_result",
+           MAX("walk_total_distance_m") AS "walk_total_distance_m"
+    FROM "care_logs"
+    GROUP BY "care_setting_id", "date_value"
+    HAVING COUNT(*) > 1
+)
+UPDATE "care_logs" AS "c"
+SET "fed_morning" = "m"."fed_morning",
+    "fed_night" = "m"."fed_night",
+    "walk_result" = "m"."walk_result",
+    "walk_total_distance_m" = "m"."walk_total_distance_m"
+FROM "merged" AS "m"
+WHERE "c"."id" = "m"."keep_id";
+
+DELETE FROM "care_logs" AS "c"
+USING "care_logs" AS "d"
+WHERE "c"."care_setting_id" = "d"."care_setting_id"
+  AND "c"."date_value" = "d"."date_value"
+  AND "c"."id" > "d"."id";
+
+DROP PROCEDURE "backfill_care_logs_date_value"(INTEGER);
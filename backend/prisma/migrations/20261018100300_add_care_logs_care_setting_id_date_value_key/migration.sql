@@ -0,0 +1,5 @@
+-- CONCURRENTLY は書き込みを止めずに作成する（トランザクション内では使えないため、この文だけのマイグレーションにする）
+-- 失敗した場合は INVALID なインデックスが残るので、DROP INDEX CONCURRENTLY してから再実行する
+-- 重複が再び書き込まれて失敗した場合は 20261018100200 の統合を再実行してから作り直す
+-- CreateIndex
+CREATE UNIQUE INDEX CONCURRENTLY IF NOT EXISTS "care_logs_care_setting_id_date_value_key" ON "care_logs"("care_setting_id", "date_value");
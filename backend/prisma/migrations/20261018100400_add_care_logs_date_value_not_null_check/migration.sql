@@ -0,0 +1,8 @@
+-- 長時間のロック待ちでAPIを止めないよう、ロックが取れなければ失敗させる（再実行可能）
+SET lock_timeout = '5s';
+
+-- NOT VALID なので既存行は検査せず、新しい書き込みだけを検査する
+ALTER TABLE "care_logs"
+    ADD CONSTRAINT "care_logs_date_value_not_null" CHECK ("date_value" IS NOT NULL) NOT VALID;
+
+RESET lock_timeout;
@@ -0,0 +1,2 @@
+-- 既存行の検査は SHARE UPDATE EXCLUSIVE ロックで行うため、読み書きは止めない
+ALTER TABLE "care_logs" VALIDATE CONSTRAINT "care_logs_date_value_not_null";
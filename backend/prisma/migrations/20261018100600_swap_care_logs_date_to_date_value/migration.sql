@@ -0,0 +1,22 @@
+/*
+  Warnings:
+
+  - The TEXT `date` column on the `care_logs` table is dropped and `date_value` is renamed to `date`. Every statement here only changes the catalog, so the exclusive lock is held briefly and the table is not rewritten or scanned.
+
+*/
+-- 長時間のロック待ちでAPIを止めないよう、ロックが取れなければ失敗させる（再実行可能）
+SET lock_timeout = '5s';
+
+DROP TRIGGER "care_logs_sync_date_value" ON "care_logs";
+DROP FUNCTION "care_logs_sync_date_value"();
+
+-- 検証済みの CHECK 制約があるため、SET NOT NULL はテーブルを走査しない
+ALTER TABLE "care_logs" ALTER COLUMN "date_value" SET NOT NULL;
+ALTER TABLE "care_logs" DROP CONSTRAINT "care_logs_date_value_not_null";
+
+-- 旧列のユニークインデックス（care_logs_care_setting_id_date_key）も一緒に削除される
+ALTER TABLE "care_logs" DROP COLUMN "date";
+ALTER TABLE "care_logs" RENAME COLUMN "date_value" TO "date";
+ALTER INDEX "care_logs_care_setting_id_date_value_key" RENAME TO "care_logs_care_setting_id_date_key";
+
+RESET lock_timeout;
@@ -0,0 +1,3 @@
+-- AlterTable
+ALTER TABLE "webhook_events" ADD COLUMN     "attempts" INTEGER NOT NULL DEFAULT 0,
+ADD COLUMN     "claimed_at" TIMESTAMP(3);
@@ -5,26 +5,6 @@ from datetime import datetime
 from app.main import app
 from app.dependencies import verify_firebase_token
 from app.db import prisma_client
-from fastapi_cache import FastAPICache
-from unittest.mock import AsyncMock, MagicMock
-
-
-@pytest.fixture(scope="session", autouse=True)
-def setup_test_db():
-    """セッション単位でのデータベース初期化"""
-    # FastAPICacheを初期化
-    mock_backend = MagicMock()
-    mock_backend.get = AsyncMock(return_value=None)
-    mock_backend.set = AsyncMock()
-    mock_backend.clear = AsyncMock()
-    FastAPICache.init(backend=mock_backend, prefix="test-cache")
-    
-    yield
-    
-    # FastAPICacheクリーンアップ
-    FastAPICache._coder = None
-    FastAPICache._backend = None
-    FastAPICache._prefix = ""
 
 
 @pytest.fixture(scope="function")
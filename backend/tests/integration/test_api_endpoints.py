@@ -1,3 +1,4 @@
+import asyncio
 import pytest
 from httpx import AsyncClient
 from app.main import app
@@ -510,6 +511,132 @@ class TestCareLogsAPI:
                 )
                 assert resp.status_code in [422, 400]
 
+    @pytest.mark.asyncio
+    async def test_care_logs_upsert_concurrent(self, test_db):
+        """PUT /api/care_logs/{date} を同時に送っても1行にマージされることの検証"""
+        unique_firebase_uid = f"test_uid_{uuid.uuid4().hex[:8]}"
+        user = await test_db.users.create(
+            data={
+                "firebase_uid": unique_firebase_uid,
+                "email": f"test_{uuid.uuid4().hex[:8]}@example.com",
+                "current_plan": "free",
+                "is_verified": True,
+            }
+        )
+        care_setting = await test_db.care_settings.create(
+            data={
+                "user_id": user.id,
+                "child_name": "アップサート",
+                "dog_name": "ポチ",
+                "care_clear_status": "active",
+            }
+        )
+
+        app.dependency_overrides[verify_firebase_token] = lambda: user.firebase_uid
+
+        try:
+            async with AsyncClient(app=app, base_url="http://test") as ac:
+                headers = {"Authorization": "Bearer mock_token"}
+
+                # 1. 朝ごはん・夜ごはんを同時に記録（どちらも新規作成になり得る）
+                morning, night = await asyncio.gather(
+                    ac.put(
+                        "/api/care_logs/2024-07-01",
+                        json={"fed_morning": True},
+                        headers=headers,
+                    ),
+                    ac.put(
+                        "/api/care_logs/2024-07-01",
+                        json={"fed_night": True},
+                        headers=headers,
+                    ),
+                )
+                assert morning.status_code == 200
+                assert night.status_code == 200
+
+                # 2. 散歩結果を追記（送っていない項目は保持される）
+                walk = await ac.put(
+                    "/api/care_logs/2024-07-01",
+                    json={"walk_result": True, "walk_total_distance_m": 1200},
+                    headers=headers,
+                )
+                assert walk.status_code == 200
+                merged = walk.json()
+                assert merged["date"] == "2024-07-01"
+                assert merged["fed_morning"] is True
+                assert merged["fed_night"] is True
+                assert merged["walk_result"] is True
+                assert merged["walk_total_distance_m"] == 1200
+
+            logs = await test_db.care_logs.find_many(
+                where={"care_setting_id": care_setting.id}
+            )
+            assert len(logs) == 1
+        finally:
+            app.dependency_overrides[verify_firebase_token] = (
+                lambda: "test_uid_care_001"
+            )
+
+    @pytest.mark.asyncio
+    async def test_care_logs_batch_sync(self, test_db):
+        """POST /api/care_logs/batch で複数日の差分がまとめて保存されることの検証"""
+        unique_firebase_uid = f"test_uid_{uuid.uuid4().hex[:8]}"
+        user = await test_db.users.create(
+            data={
+                "firebase_uid": unique_firebase_uid,
+                "email": f"test_{uuid.uuid4().hex[:8]}@example.com",
+                "current_plan": "free",
+                "is_verified": True,
+            }
+        )
+        care_setting = await test_db.care_settings.create(
+            data={
+                "user_id": user.id,
+                "child_name": "一括同期",
+                "dog_name": "ポチ",
+                "care_clear_status": "active",
+            }
+        )
+
+        app.dependency_overrides[verify_firebase_token] = lambda: user.firebase_uid
+
+        try:
+            async with AsyncClient(app=app, base_url="http://test") as ac:
+                headers = {"Authorization": "Bearer mock_token"}
+
+                # 既存の記録に追記される日と、新規作成される日を混ぜる
+                await ac.put(
+                    "/api/care_logs/2024-07-01",
+                    json={"fed_morning": True},
+                    headers=headers,
+                )
+                batch_data = {
+                    "items": [
+                        {"date": "2024-07-01", "fields": {"fed_night": True}},
+                        {"date": "2024-07-02", "fields": {"fed_morning": True}},
+                        {"date": "2024-07-02", "fields": {"walk_result": True}},
+                    ]
+                }
+                response = await ac.post(
+                    "/api/care_logs/batch", json=batch_data, headers=headers
+                )
+                assert response.status_code == 200
+                results = response.json()["results"]
+                assert len(results) == 3
+                assert results[0]["care_log"]["fed_morning"] is True
+                assert results[0]["care_log"]["fed_night"] is True
+                assert results[2]["care_log"]["fed_morning"] is True
+                assert results[2]["care_log"]["walk_result"] is True
+
+            logs = await test_db.care_logs.find_many(
+                where={"care_setting_id": care_setting.id}
+            )
+            assert len(logs) == 2
+        finally:
+            app.dependency_overrides[verify_firebase_token] = (
+                lambda: "test_uid_care_001"
+            )
+
 
 class TestReflectionNotesAPI:
     """反省文APIの統合テスト"""
@@ -1948,7 +2075,7 @@ class TestWebhookEventsDeepCoverage:
         )
 
         async with AsyncClient(app=app, base_url="http://test") as ac:
-            # 1. checkout.session.completed以外のイベント（process_webhook_eventが呼ばれない）
+            # 1. checkout.session.completed以外のイベント（process_claimed_webhook_eventsが呼ばれない）
             other_event_data = {
                 "id": f"evt_other_{uuid.uuid4().hex[:8]}",
                 "type": "payment_intent.succeeded",  # checkout.session.completed以外
@@ -2058,7 +2185,7 @@ class TestWebhookEventsDeepCoverage:
                 },
             }
 
-            # Webhookイベントを作成（process_webhook_eventが自動実行される）
+            # Webhookイベントを作成（process_claimed_webhook_eventsが自動実行される）
             create_response = await ac.post(
                 "/api/webhook_events/", json=unprocessed_webhook_data
             )
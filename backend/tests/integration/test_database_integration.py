@@ -70,7 +70,7 @@ class TestDatabaseIntegration:
         log1 = await test_db.care_logs.create(
             data={
                 "care_setting_id": care_setting.id,
-                "date": "2024-07-01",
+                "date": datetime(2024, 7, 1, tzinfo=timezone.utc),
                 "fed_morning": True,
                 "walk_result": False,
             }
@@ -79,7 +79,7 @@ class TestDatabaseIntegration:
         log2 = await test_db.care_logs.create(
             data={
                 "care_setting_id": care_setting.id,
-                "date": "2024-07-02",
+                "date": datetime(2024, 7, 2, tzinfo=timezone.utc),
                 "fed_morning": False,
                 "walk_result": True,
                 "walk_total_distance_m": 2000,
@@ -97,7 +97,7 @@ class TestDatabaseIntegration:
 
         # 日付でソートして確認
         logs_by_date = sorted(setting_with_logs.care_logs, key=lambda x: x.date)
-        assert logs_by_date[0].date == "2024-07-01"
+        assert logs_by_date[0].date == datetime(2024, 7, 1, tzinfo=timezone.utc)
         assert logs_by_date[1].walk_total_distance_m == 2000
 
     @pytest.mark.asyncio
@@ -207,7 +207,7 @@ class TestDatabaseIntegration:
         care_log = await test_db.care_logs.create(
             data={
                 "care_setting_id": care_setting.id,
-                "date": "2024-07-01",
+                "date": datetime(2024, 7, 1, tzinfo=timezone.utc),
                 "fed_morning": True,
             }
         )
@@ -335,7 +335,7 @@ class TestDatabaseIntegration:
             await test_db.care_logs.create(
                 data={
                     "care_setting_id": care_setting.id,
-                    "date": f"2024-07-{i+1:02d}",
+                    "date": datetime(2024, 7, i + 1, tzinfo=timezone.utc),
                     "fed_morning": i % 2 == 0,
                     "walk_result": i % 2 == 1,
                 }
@@ -361,4 +361,6 @@ class TestDatabaseIntegration:
         assert len(result.care_settings) == 1
         assert result.care_settings[0].care_logs is not None
         assert len(result.care_settings[0].care_logs) == 2
-        assert result.care_settings[0].care_logs[0].date == "2024-07-03"
+        assert result.care_settings[0].care_logs[0].date == datetime(
+            2024, 7, 3, tzinfo=timezone.utc
+        )
@@ -0,0 +1,167 @@
+import pytest
+from datetime import date, datetime, timezone
+from app.db import prisma_client
+from app.routers.care_logs import (
+    DEFAULT_LIST_FIELDS,
+    build_care_logs_list_query,
+    build_upsert_care_logs_sql,
+)
+from app.services.webhook_handlers import handled_event_types
+from app.services.webhook_worker import (
+    CLAIM_WEBHOOK_EVENTS_SQL,
+    WEBHOOK_CLAIM_LEASE_SECONDS,
+    WEBHOOK_MAX_ATTEMPTS,
+)
+
+# 処理を登録する（handled_event_types() に checkout.session.completed を含める）
+import app.routers.webhook_events  # noqa: F401  pylint: disable=unused-import
+
+
+async def explain(query: str, *params) -> str:
+    """Seq Scan を無効化した状態で EXPLAIN を実行し、実行計画を文字列で返す
+
+    テストデータは少量のため、通常の設定ではプランナーが Seq Scan を選んでしまう。
+    enable_seqscan = off にしてもインデックスが無ければ Seq Scan のままになるため、
+    インデックスで解決できるかどうかを検証できる。
+    ルーターやワーカーが実行するSQL（$1 などのパラメータ付き）はそのまま渡す。
+    """
+    async with prisma_client.tx() as tx:
+        await tx.execute_raw("SET LOCAL enable_seqscan = off")
+        rows = await tx.query_raw(f"EXPLAIN {query}", *params)
+    return "\n".join(row["QUERY PLAN"] for row in rows)
+
+
+@pytest.fixture
+async def seeded_db(test_db):
+    """実行計画の検証用にユーザー・お世話設定・記録を作成する"""
+    user = await test_db.users.create(
+        data={
+            "firebase_uid": "test_plan_uid_001",
+            "email": "plan@example.com",
+            "current_plan": "free",
+            "is_verified": True,
+        }
+    )
+    care_setting = await test_db.care_settings.create(
+        data={
+            "user_id": user.id,
+            "child_name": "プランテスト",
+            "dog_name": "プラン犬",
+            "care_clear_status": "active",
+        }
+    )
+    for i in range(5):
+        await test_db.care_logs.create(
+            data={
+                "care_setting_id": care_setting.id,
+                "date": datetime(2024, 7, i + 1, tzinfo=timezone.utc),
+                "fed_morning": True,
+            }
+        )
+        await test_db.reflection_notes.create(
+            data={
+                "care_setting_id": care_setting.id,
+                "content": f"反省文{i}",
+            }
+        )
+    await test_db.execute_raw("ANALYZE")
+    return {"user": user, "care_setting": care_setting}
+
+
+class TestQueryPlans:
+    """ホットパスのクエリがインデックスで解決されることの回帰テスト"""
+
+    @pytest.mark.asyncio
+    async def test_users_by_firebase_uid(self, seeded_db):
+        """認証時のユーザー解決"""
+        plan = await explain(
+            "SELECT * FROM users WHERE firebase_uid = 'test_plan_uid_001'"
+        )
+        assert "Seq Scan" not in plan
+
+    @pytest.mark.asyncio
+    async def test_care_settings_by_user_id(self, seeded_db):
+        """ユーザーに紐づくお世話設定の取得"""
+        user_id = seeded_db["user"].id
+        plan = await explain(
+            f"SELECT * FROM care_settings WHERE user_id = '{user_id}' "
+            "ORDER BY id ASC LIMIT 1"
+        )
+        assert "Seq Scan" not in plan
+
+    @pytest.mark.asyncio
+    async def test_care_logs_by_care_setting_and_date(self, seeded_db):
+        """日付指定の記録取得"""
+        care_setting_id = seeded_db["care_setting"].id
+        plan = await explain(
+            f"SELECT * FROM care_logs WHERE care_setting_id = {care_setting_id} "
+            "AND date = DATE '2024-07-01' LIMIT 1"
+        )
+        assert "Seq Scan" not in plan
+
+    @pytest.mark.asyncio
+    async def test_care_logs_list_ordered_by_date(self, seeded_db):
+        """記録一覧（GET /list の全件取得。日付の昇順）"""
+        care_setting_id = seeded_db["care_setting"].id
+        query, params = build_care_logs_list_query(care_setting_id, DEFAULT_LIST_FIELDS)
+        plan = await explain(query, *params)
+        assert "Seq Scan" not in plan
+
+    @pytest.mark.asyncio
+    async def test_care_logs_list_keyset_page(self, seeded_db):
+        """記録一覧の2ページ目以降（GET /list の (date, id) キーセットページング）"""
+        care_setting_id = seeded_db["care_setting"].id
+        query, params = build_care_logs_list_query(
+            care_setting_id,
+            DEFAULT_LIST_FIELDS,
+            date_from=date(2024, 7, 1),
+            date_to=date(2024, 7, 31),
+            after=(date(2024, 7, 2), 0),
+            limit=3,
+        )
+        plan = await explain(query, *params)
+        assert "Seq Scan" not in plan
+
+    @pytest.mark.asyncio
+    async def test_care_logs_upsert_uses_unique_index(self, seeded_db):
+        """PUT /{date}・POST /batch のマージ保存（(care_setting_id, date) で衝突を判定）"""
+        care_setting_id = seeded_db["care_setting"].id
+        params = []
+        for day in (1, 6):
+            params += [care_setting_id, f"2024-07-0{day}", True, None, None, None]
+        plan = await explain(build_upsert_care_logs_sql(2), *params)
+        assert "Conflict Arbiter Indexes: care_logs_care_setting_id_date_key" in plan
+
+    @pytest.mark.asyncio
+    async def test_reflection_notes_ordered_by_created_at(self, seeded_db):
+        """反省文一覧（作成日時の降順）"""
+        care_setting_id = seeded_db["care_setting"].id
+        plan = await explain(
+            "SELECT * FROM reflection_notes "
+            f"WHERE care_setting_id = {care_setting_id} ORDER BY created_at DESC"
+        )
+        assert "Seq Scan" not in plan
+        assert "Sort" not in plan
+
+    @pytest.mark.asyncio
+    async def test_claim_webhook_events(self, seeded_db):
+        """ワーカーによる未処理イベントの取得（FOR UPDATE SKIP LOCKED）"""
+        plan = await explain(
+            CLAIM_WEBHOOK_EVENTS_SQL,
+            WEBHOOK_MAX_ATTEMPTS,
+            WEBHOOK_CLAIM_LEASE_SECONDS,
+            handled_event_types(),
+            10,
+        )
+        assert "Seq Scan" not in plan
+        assert "webhook_events_processed_event_type_idx" in plan
+        assert "LockRows" in plan
+
+    @pytest.mark.asyncio
+    async def test_unprocessed_webhook_events(self, seeded_db):
+        """未処理の Webhook イベントの一括取得"""
+        plan = await explain(
+            "SELECT * FROM webhook_events WHERE processed = false "
+            "AND event_type = 'checkout.session.completed'"
+        )
+        assert "Seq Scan" not in plan
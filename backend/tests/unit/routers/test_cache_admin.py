@@ -0,0 +1,80 @@
+# pylint: disable=redefined-outer-name
+# pylint: disable=unused-argument
+
+import pytest
+from fastapi.testclient import TestClient
+from unittest.mock import AsyncMock
+from redis.exceptions import ConnectionError as RedisConnectionError
+from app.main import app
+from app.dependencies import verify_firebase_token
+from app.routers import cache_admin
+
+# FastAPIアプリをTestClientに渡す
+client = TestClient(app)
+
+
+@pytest.fixture
+def mock_admin(monkeypatch):
+    """
+    verify_firebase_token をモックし、管理者の Firebase UID を登録する
+    """
+    monkeypatch.setattr(cache_admin, "ADMIN_FIREBASE_UIDS", {"admin-uid"})
+    app.dependency_overrides[verify_firebase_token] = lambda: "admin-uid"
+    yield
+    app.dependency_overrides.clear()
+
+
+@pytest.fixture
+def mock_top_keys(monkeypatch):
+    """
+    top_keys_by_size をモックする
+    """
+    mock = AsyncMock(
+        return_value=[
+            {
+                "key": "route_cache:reflection_notes:admin-uid:abc",
+                "namespace": "reflection_notes",
+                "bytes": 2048,
+                "ttl": 42,
+            }
+        ]
+    )
+    monkeypatch.setattr(cache_admin, "top_keys_by_size", mock)
+    return mock
+
+
+# ======================
+#  TC-CADMIN-001
+# ======================
+# 正常系（サイズの大きいキーの一覧を返す）
+def test_get_cache_keys_success(mock_admin, mock_top_keys):
+    response = client.get("/api/admin/cache/keys?limit=5&namespace=reflection_notes")
+
+    assert response.status_code == 200
+    assert response.json()["keys"][0]["bytes"] == 2048
+    mock_top_keys.assert_awaited_once_with(limit=5, namespace="reflection_notes")
+
+
+# ======================
+#  TC-CADMIN-002
+# ======================
+# 異常系（管理者以外は 403）
+def test_get_cache_keys_forbidden(mock_admin, mock_top_keys):
+    app.dependency_overrides[verify_firebase_token] = lambda: "other-uid"
+
+    response = client.get("/api/admin/cache/keys")
+
+    assert response.status_code == 403
+    mock_top_keys.assert_not_awaited()
+
+
+# ======================
+#  TC-CADMIN-003
+# ======================
+# 異常系（Redis を使えない場合は 503）
+def test_get_cache_keys_redis_unavailable(mock_admin, mock_top_keys):
+    mock_top_keys.side_effect = RedisConnectionError("down")
+
+    response = client.get("/api/admin/cache/keys")
+
+    assert response.status_code == 503
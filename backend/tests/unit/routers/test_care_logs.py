@@ -1,27 +1,51 @@
 # pylint: disable=redefined-outer-name
+# pylint: disable=unused-argument
 
 import pytest
+from datetime import datetime, timezone
 from fastapi.testclient import TestClient
+from types import SimpleNamespace
 from unittest.mock import AsyncMock
 from app.main import app
-from app.dependencies import verify_firebase_token
+from app.dependencies import (
+    RequestIdentity,
+    get_request_identity,
+    verify_firebase_token,
+)
 
 # FastAPIアプリをTestClientに渡す
 client = TestClient(app)
 
 
+def db_date(year, month, day):
+    """Prismaが DATE 列に返す値（UTC 0時の datetime）を作る"""
+    return datetime(year, month, day, tzinfo=timezone.utc)
+
+
 @pytest.fixture
-def mock_prisma(monkeypatch):
+def mock_identity():
     """
-    prisma_clientをモックする
+    get_request_identityをモックする
+    - identityをNoneにするとユーザー未登録を再現できる
     """
-    mock_client = AsyncMock()
+    holder = SimpleNamespace(
+        identity=RequestIdentity(
+            firebase_uid="test-uid",
+            user_id="1",
+            current_plan="free",
+            care_setting_id=10,
+        )
+    )
+    app.dependency_overrides[get_request_identity] = lambda: holder.identity
+    return holder
 
-    # user.find_unique
-    mock_client.users.find_unique.return_value = AsyncMock(id=1)
 
-    # care_setting.find_first
-    mock_client.care_settings.find_first.return_value = AsyncMock(id=10)
+@pytest.fixture
+def mock_prisma(monkeypatch, mock_identity):
+    """
+    prisma_clientをモックする
+    """
+    mock_client = AsyncMock()
 
     # care_logs.find_first → 既存ログなし
     mock_client.care_logs.find_first.return_value = None
@@ -30,7 +54,7 @@ def mock_prisma(monkeypatch):
     mock_client.care_logs.create.return_value = AsyncMock(
         id=123,
         care_setting_id=10,
-        date="2025-07-01",
+        date=db_date(2025, 7, 1),
         fed_morning=True,
         fed_night=False,
         walk_result=True,
@@ -80,10 +104,13 @@ def test_create_success(mock_prisma):
     assert data["walk_result"] is True
     assert data["walk_total_distance_m"] == 1000
 
-    # prisma_clientの呼び出しを確認
-    mock_prisma.users.find_unique.assert_awaited_once()
-    mock_prisma.care_settings.find_first.assert_awaited()
+    # prisma_clientの呼び出しを確認（users / care_settings は依存関係で解決済み）
+    mock_prisma.users.find_unique.assert_not_awaited()
+    mock_prisma.care_settings.find_first.assert_not_awaited()
     mock_prisma.care_logs.create.assert_awaited_once()
+    # date は DATE 列に合わせて datetime（UTC 0時）で保存する
+    create_data = mock_prisma.care_logs.create.await_args.kwargs["data"]
+    assert create_data["date"] == db_date(2025, 7, 1)
 
 
 # ======================
@@ -117,6 +144,27 @@ def test_create_conflict_error(mock_prisma):
     assert "この日付の記録は既に存在します" in data["detail"]
 
 
+# ======================
+#  TC-LOG-002-2
+# ======================
+# 異常系（ユーザー未登録）
+def test_create_user_not_found_error(mock_prisma, mock_identity):
+    """
+    異常系：Firebase UIDに対応するユーザーが存在しない場合
+    """
+    mock_identity.identity = None
+
+    response = client.post(
+        "/api/care_logs",
+        json={"date": "2025-07-01", "fed_morning": True},
+        headers={"Authorization": "Bearer test-token"},
+    )
+
+    assert response.status_code == 401
+    assert "ユーザーが存在しません" in response.json()["detail"]
+    mock_prisma.care_logs.create.assert_not_awaited()
+
+
 # ======================
 #  TC-LOG-003
 # ======================
@@ -133,7 +181,7 @@ def test_patch_success(mock_prisma):
     mock_prisma.care_logs.update.return_value = AsyncMock(
         id=123,
         care_setting_id=10,
-        date="2025-07-01",
+        date=db_date(2025, 7, 1),
         fed_morning=False,
         fed_night=True,
         walk_result=True,
@@ -199,9 +247,6 @@ def test_get_today_success(mock_prisma):
     """
     正常系：当日のお世話記録が存在する場合
     """
-    # care_settings.find_first → 権限OK
-    mock_prisma.care_settings.find_first.return_value = AsyncMock(id=10)
-
     # care_logs.find_first → 当日ログが存在
     mock_prisma.care_logs.find_first.return_value = AsyncMock(
         id=123, fed_morning=True, fed_night=False, walk_result=True
@@ -229,9 +274,6 @@ def test_get_today_default_response(mock_prisma):
     """
     正常系：当日のお世話記録が存在しない場合
     """
-    # care_settings.find_first → 権限OK
-    mock_prisma.care_settings.find_first.return_value = AsyncMock(id=10)
-
     # care_logs.find_first → 当日ログが存在
     mock_prisma.care_logs.find_first.return_value = None
 
@@ -257,9 +299,7 @@ def test_get_today_forbidden_error(mock_prisma):
     """
     異常系：自分のcare_setting_idでない場合
     """
-    # care_settings.find_first → Noneで権限エラー
-    mock_prisma.care_settings.find_first.return_value = None
-
+    # identityのcare_setting_id(10)と一致しない → 権限エラー
     response = client.get(
         "/api/care_logs/today",
         params={"care_setting_id": 999, "date": "2025-07-01"},
@@ -271,6 +311,27 @@ def test_get_today_forbidden_error(mock_prisma):
     assert "不正な care_setting_id です" in data["detail"]
 
 
+# ======================
+#  TC-LOG-007-2
+# ======================
+# 正常系（2件目以降の自分のお世話設定も参照できる）
+def test_get_today_other_own_care_setting(mock_prisma, mock_identity):
+    """
+    正常系：最初のお世話設定以外でも、本人のものであれば取得できる
+    """
+    mock_identity.identity.care_setting_ids = [10, 11]
+    mock_prisma.care_logs.find_first.return_value = None
+
+    response = client.get(
+        "/api/care_logs/today",
+        params={"care_setting_id": 11, "date": "2025-07-01"},
+        headers={"Authorization": "Bearer test-token"},
+    )
+
+    assert response.status_code == 200
+    assert response.json()["care_log_id"] is None
+
+
 # ======================
 #  TC-LOG-008
 # ======================
@@ -280,9 +341,6 @@ def test_get_by_date_success(mock_prisma):
     """
     正常系：指定日のお世話記録が存在する場合
     """
-    # care_settings.find_first → 権限OK
-    mock_prisma.care_settings.find_first.return_value = AsyncMock(id=10)
-
     # care_logs.find_first → 当日ログが存在
     mock_prisma.care_logs.find_first.return_value = AsyncMock(
         id=123, fed_morning=True, fed_night=False, walk_result=True
@@ -310,9 +368,6 @@ def test_get_by_date_default_response(mock_prisma):
     """
     正常系：指定日のお世話記録が存在しない場合
     """
-    # care_settings.find_first → 権限OK
-    mock_prisma.care_settings.find_first.return_value = AsyncMock(id=10)
-
     # care_logs.find_first → 当日ログが存在
     mock_prisma.care_logs.find_first.return_value = None
 
@@ -338,9 +393,7 @@ def test_get_by_date_forbidden_error(mock_prisma):
     """
     異常系：他人のcare_setting_idを指定した場合
     """
-    # care_settings.find_first → Noneで権限エラー
-    mock_prisma.care_settings.find_first.return_value = None
-
+    # identityのcare_setting_id(10)と一致しない → 権限エラー
     response = client.get(
         "/api/care_logs/by_date",
         params={"care_setting_id": 999, "date": "2025-07-01"},
@@ -361,13 +414,10 @@ def test_get_list_success(mock_prisma):
     """
     正常系：care_logsを一覧取得できる
     """
-    # care_settings.find_first → 権限OK
-    mock_prisma.care_settings.find_first.return_value = AsyncMock(id=10)
-
-    # care_logs.find_many → 一覧が存在
-    mock_prisma.care_logs.find_many.return_value = [
-        AsyncMock(id=1, date="2025-07-01", walk_result=True, care_setting_id=10),
-        AsyncMock(id=2, date="2025-07-02", walk_result=False, care_setting_id=10),
+    # query_raw → 一覧が存在（DATE 列は文字列で返る）
+    mock_prisma.query_raw.return_value = [
+        {"id": 1, "date": "2025-07-01", "walk_result": True, "care_setting_id": 10},
+        {"id": 2, "date": "2025-07-02", "walk_result": False, "care_setting_id": 10},
     ]
 
     response = client.get(
@@ -385,6 +435,9 @@ def test_get_list_success(mock_prisma):
     assert data["care_logs"][0]["date"] == "2025-07-01"
     assert data["care_logs"][0]["walk_result"] is True
     assert data["care_logs"][0]["care_setting_id"] == 10
+    # limit 未指定時は全件（続きなし）
+    assert data["next_cursor"] is None
+    assert "LIMIT" not in mock_prisma.query_raw.await_args.args[0]
 
 
 # ======================
@@ -395,11 +448,8 @@ def test_get_list_empty_response(mock_prisma):
     """
     正常系：care_logsが0件でも200で空リスト
     """
-    # care_settings.find_first → 権限OK
-    mock_prisma.care_settings.find_first.return_value = AsyncMock(id=10)
-
-    # care_logs.find_many → 0件
-    mock_prisma.care_logs.find_many.return_value = []
+    # query_raw → 0件
+    mock_prisma.query_raw.return_value = []
 
     response = client.get(
         "/api/care_logs/list",
@@ -421,9 +471,7 @@ def test_get_list_forbidden_error(mock_prisma):
     """
     異常系：他人のcare_setting_idを指定した場合
     """
-    # care_settings.find_first → Noneで権限エラー
-    mock_prisma.care_settings.find_first.return_value = None
-
+    # identityのcare_setting_id(10)と一致しない → 権限エラー
     response = client.get(
         "/api/care_logs/list",
         params={"care_setting_id": 999},
@@ -433,3 +481,412 @@ def test_get_list_forbidden_error(mock_prisma):
     assert response.status_code == 403
     data = response.json()
     assert "不正な care_setting_id です" in data["detail"]
+
+
+# ======================
+#  TC-LOG-014
+# ======================
+# GET /api/care_logs/range のテストコード
+# 正常系（日付範囲で取得）
+def test_get_range_success(mock_prisma):
+    """
+    正常系：from / to の範囲のcare_logsをDATE列の範囲検索で取得できる
+    """
+    mock_prisma.care_logs.find_many.return_value = [
+        AsyncMock(
+            id=1,
+            care_setting_id=10,
+            date=db_date(2025, 7, 1),
+            fed_morning=True,
+            fed_night=False,
+            walk_result=True,
+            walk_total_distance_m=800,
+            created_at=db_date(2025, 7, 1),
+        ),
+    ]
+
+    response = client.get(
+        "/api/care_logs/range",
+        params={"care_setting_id": 10, "from": "2025-07-01", "to": "2025-07-31"},
+        headers={"Authorization": "Bearer test-token"},
+    )
+
+    assert response.status_code == 200
+    data = response.json()
+    assert len(data["care_logs"]) == 1
+    assert data["care_logs"][0]["date"] == "2025-07-01"
+
+    where = mock_prisma.care_logs.find_many.await_args.kwargs["where"]
+    assert where["date"] == {"gte": db_date(2025, 7, 1), "lte": db_date(2025, 7, 31)}
+
+
+# ======================
+#  TC-LOG-015
+# ======================
+# 異常系（from が to より後）
+def test_get_range_invalid_range_error(mock_prisma):
+    """
+    異常系：from が to より後の日付の場合
+    """
+    response = client.get(
+        "/api/care_logs/range",
+        params={"care_setting_id": 10, "from": "2025-07-31", "to": "2025-07-01"},
+        headers={"Authorization": "Bearer test-token"},
+    )
+
+    assert response.status_code == 400
+    assert "from は to 以前の日付を指定してください" in response.json()["detail"]
+    mock_prisma.care_logs.find_many.assert_not_awaited()
+
+
+# ======================
+#  TC-LOG-016
+# ======================
+# 異常系（他人のcare_setting_idを指定）
+def test_get_range_forbidden_error(mock_prisma):
+    """
+    異常系：他人のcare_setting_idを指定した場合
+    """
+    response = client.get(
+        "/api/care_logs/range",
+        params={"care_setting_id": 999, "from": "2025-07-01", "to": "2025-07-31"},
+        headers={"Authorization": "Bearer test-token"},
+    )
+
+    assert response.status_code == 403
+    assert "不正な care_setting_id です" in response.json()["detail"]
+
+
+# ======================
+#  TC-LOG-017
+# ======================
+# PUT /api/care_logs/{date} のテストコード
+# 正常系（1クエリでマージ保存）
+def test_put_upsert_success(mock_prisma):
+    """
+    正常系：送った項目だけをマージし、保存後の状態を返す
+    """
+    mock_prisma.query_first.return_value = {
+        "id": 123,
+        "care_setting_id": 10,
+        "date": "2025-07-01",
+        "fed_morning": True,
+        "fed_night": True,
+        "walk_result": None,
+        "walk_total_distance_m": None,
+        "created_at": "2025-07-01T09:00:00+00:00",
+    }
+
+    response = client.put(
+        "/api/care_logs/2025-07-01",
+        json={"fed_night": True},
+        headers={"Authorization": "Bearer test-token"},
+    )
+
+    assert response.status_code == 200
+    data = response.json()
+    assert data["id"] == 123
+    assert data["date"] == "2025-07-01"
+    assert data["fed_morning"] is True
+    assert data["fed_night"] is True
+
+    # INSERT ... ON CONFLICT の1クエリだけで保存する
+    mock_prisma.query_first.assert_awaited_once()
+    args = mock_prisma.query_first.await_args.args
+    assert "ON CONFLICT" in args[0]
+    assert args[1:] == (10, "2025-07-01", None, True, None, None)
+    mock_prisma.care_logs.find_first.assert_not_awaited()
+    mock_prisma.care_logs.create.assert_not_awaited()
+    mock_prisma.care_logs.update.assert_not_awaited()
+
+
+# ======================
+#  TC-LOG-018
+# ======================
+# 異常系（ユーザー未登録）
+def test_put_upsert_user_not_found_error(mock_prisma, mock_identity):
+    """
+    異常系：Firebase UIDに対応するユーザーが存在しない場合
+    """
+    mock_identity.identity = None
+
+    response = client.put(
+        "/api/care_logs/2025-07-01",
+        json={"fed_morning": True},
+        headers={"Authorization": "Bearer test-token"},
+    )
+
+    assert response.status_code == 401
+    mock_prisma.query_first.assert_not_awaited()
+
+
+# ======================
+#  TC-LOG-019
+# ======================
+# 異常系（お世話設定が未登録）
+def test_put_upsert_care_setting_not_found_error(mock_prisma, mock_identity):
+    """
+    異常系：お世話設定がまだ作成されていない場合
+    """
+    mock_identity.identity.care_setting_id = None
+
+    response = client.put(
+        "/api/care_logs/2025-07-01",
+        json={"fed_morning": True},
+        headers={"Authorization": "Bearer test-token"},
+    )
+
+    assert response.status_code == 404
+    assert "Care setting not found" in response.json()["detail"]
+    mock_prisma.query_first.assert_not_awaited()
+
+
+# ======================
+#  TC-LOG-020
+# ======================
+# 異常系（DB例外）
+def test_put_upsert_db_error(mock_prisma):
+    """
+    異常系：保存時にDB例外が発生した場合
+    """
+    mock_prisma.query_first.side_effect = RuntimeError("DB down")
+
+    response = client.put(
+        "/api/care_logs/2025-07-01",
+        json={"fed_morning": True},
+        headers={"Authorization": "Bearer test-token"},
+    )
+
+    assert response.status_code == 500
+    assert "お世話記録の保存中にエラーが発生しました" in response.json()["detail"]
+
+
+def saved_row(log_id, log_date, **fields):
+    """INSERT ... RETURNING が返す1行分の辞書を作る"""
+    row = {
+        "id": log_id,
+        "care_setting_id": 10,
+        "date": log_date,
+        "fed_morning": None,
+        "fed_night": None,
+        "walk_result": None,
+        "walk_total_distance_m": None,
+        "created_at": "2025-07-01T09:00:00+00:00",
+    }
+    row.update(fields)
+    return row
+
+
+# ======================
+#  TC-LOG-021
+# ======================
+# POST /api/care_logs/batch のテストコード
+# 正常系（同じ日付はマージして1文で保存）
+def test_batch_sync_success(mock_prisma):
+    """
+    正常系：複数日の差分を1文で保存し、項目ごとの結果を返す
+    """
+    mock_prisma.query_raw.return_value = [
+        saved_row(2, "2025-07-02", walk_result=True, walk_total_distance_m=900),
+        saved_row(1, "2025-07-01", fed_morning=True, fed_night=True),
+    ]
+
+    response = client.post(
+        "/api/care_logs/batch",
+        json={
+            "items": [
+                {"date": "2025-07-01", "fields": {"fed_morning": True}},
+                {"date": "2025-07-01", "fields": {"fed_night": True}},
+                {
+                    "date": "2025-07-02",
+                    "fields": {"walk_result": True, "walk_total_distance_m": 900},
+                },
+            ]
+        },
+        headers={"Authorization": "Bearer test-token"},
+    )
+
+    assert response.status_code == 200
+    results = response.json()["results"]
+    assert [r["index"] for r in results] == [0, 1, 2]
+    assert all(r["status"] == "applied" for r in results)
+    assert results[0]["care_log"]["id"] == 1
+    assert results[1]["care_log"]["fed_night"] is True
+    assert results[2]["care_log"]["id"] == 2
+
+    # 同じ日付は1行にまとめ、2日分を1クエリで保存する
+    mock_prisma.query_raw.assert_awaited_once()
+    args = mock_prisma.query_raw.await_args.args
+    assert args[1:] == (
+        10,
+        "2025-07-01",
+        True,
+        True,
+        None,
+        None,
+        10,
+        "2025-07-02",
+        None,
+        None,
+        True,
+        900,
+    )
+
+
+# ======================
+#  TC-LOG-022
+# ======================
+# 異常系（items が空）
+def test_batch_sync_empty_items_error(mock_prisma):
+    """
+    異常系：items が空の場合はバリデーションエラー
+    """
+    response = client.post(
+        "/api/care_logs/batch",
+        json={"items": []},
+        headers={"Authorization": "Bearer test-token"},
+    )
+
+    assert response.status_code == 422
+    mock_prisma.query_raw.assert_not_awaited()
+
+
+# ======================
+#  TC-LOG-023
+# ======================
+# 異常系（ユーザー未登録）
+def test_batch_sync_user_not_found_error(mock_prisma, mock_identity):
+    """
+    異常系：Firebase UIDに対応するユーザーが存在しない場合
+    """
+    mock_identity.identity = None
+
+    response = client.post(
+        "/api/care_logs/batch",
+        json={"items": [{"date": "2025-07-01", "fields": {"fed_morning": True}}]},
+        headers={"Authorization": "Bearer test-token"},
+    )
+
+    assert response.status_code == 401
+    mock_prisma.query_raw.assert_not_awaited()
+
+
+# ======================
+#  TC-LOG-024
+# ======================
+# 異常系（DB例外 → どの日付も保存されない）
+def test_batch_sync_db_error(mock_prisma):
+    """
+    異常系：保存時にDB例外が発生した場合
+    """
+    mock_prisma.query_raw.side_effect = RuntimeError("DB down")
+
+    response = client.post(
+        "/api/care_logs/batch",
+        json={"items": [{"date": "2025-07-01", "fields": {"fed_morning": True}}]},
+        headers={"Authorization": "Bearer test-token"},
+    )
+
+    assert response.status_code == 500
+    assert "お世話記録の一括保存中にエラーが発生しました" in response.json()["detail"]
+
+
+# ======================
+#  TC-LOG-025
+# ======================
+# GET /api/care_logs/list のキーセットページング
+# 正常系（limit を超える分があれば next_cursor を返す）
+def test_get_list_keyset_pagination(mock_prisma):
+    """
+    正常系：1ページ目の next_cursor で2ページ目を (date, id) の続きから取得できる
+    """
+    mock_prisma.query_raw.return_value = [
+        {"id": 1, "date": "2025-07-01", "walk_result": True, "care_setting_id": 10},
+        {"id": 2, "date": "2025-07-02", "walk_result": False, "care_setting_id": 10},
+        {"id": 3, "date": "2025-07-03", "walk_result": True, "care_setting_id": 10},
+    ]
+
+    first = client.get(
+        "/api/care_logs/list",
+        params={"care_setting_id": 10, "limit": 2, "from": "2025-07-01"},
+        headers={"Authorization": "Bearer test-token"},
+    )
+
+    assert first.status_code == 200
+    first_data = first.json()
+    assert [log["id"] for log in first_data["care_logs"]] == [1, 2]
+    assert first_data["next_cursor"]
+    # 続きの判定のため limit + 1 件読む
+    args = mock_prisma.query_raw.await_args.args
+    assert args[1:] == (10, "2025-07-01", 3)
+
+    mock_prisma.query_raw.return_value = [
+        {"id": 3, "date": "2025-07-03", "walk_result": True, "care_setting_id": 10},
+    ]
+    second = client.get(
+        "/api/care_logs/list",
+        params={
+            "care_setting_id": 10,
+            "limit": 2,
+            "cursor": first_data["next_cursor"],
+        },
+        headers={"Authorization": "Bearer test-token"},
+    )
+
+    assert second.status_code == 200
+    assert [log["id"] for log in second.json()["care_logs"]] == [3]
+    assert second.json()["next_cursor"] is None
+    query, *params = mock_prisma.query_raw.await_args.args
+    assert '("date", "id") >' in query
+    assert params == [10, "2025-07-02", 2, 3]
+
+
+# ======================
+#  TC-LOG-026
+# ======================
+# 正常系（fields= で指定した列だけを読む）
+def test_get_list_fields_projection(mock_prisma):
+    """
+    正常系：fields で指定した列だけをSELECTし、その列だけを返す
+    """
+    mock_prisma.query_raw.return_value = [
+        {"id": 1, "date": "2025-07-01", "walk_result": True},
+    ]
+
+    response = client.get(
+        "/api/care_logs/list",
+        params={"care_setting_id": 10, "fields": "date,walk_result"},
+        headers={"Authorization": "Bearer test-token"},
+    )
+
+    assert response.status_code == 200
+    assert response.json()["care_logs"] == [{"date": "2025-07-01", "walk_result": True}]
+    query = mock_prisma.query_raw.await_args.args[0]
+    assert query.startswith('SELECT "id", "date", "walk_result" FROM')
+
+
+# ======================
+#  TC-LOG-027
+# ======================
+# 異常系（不正な fields / cursor）
+@pytest.mark.parametrize(
+    "params, detail",
+    [
+        ({"fields": "date,password"}, "不正な fields です: password"),
+        ({"cursor": "not-a-cursor"}, "cursor の形式が不正です"),
+        ({"from": "2025-07-31", "to": "2025-07-01"}, "from は to 以前の日付"),
+    ],
+)
+def test_get_list_invalid_params_error(mock_prisma, params, detail):
+    """
+    異常系：fields / cursor / from・to が不正な場合は400
+    """
+    response = client.get(
+        "/api/care_logs/list",
+        params={"care_setting_id": 10, **params},
+        headers={"Authorization": "Bearer test-token"},
+    )
+
+    assert response.status_code == 400
+    assert detail in response.json()["detail"]
+    mock_prisma.query_raw.assert_not_awaited()
@@ -1,4 +1,5 @@
 # pylint: disable=redefined-outer-name
+# pylint: disable=unused-argument
 
 import pytest
 from fastapi.testclient import TestClient
@@ -6,8 +7,14 @@ from unittest.mock import AsyncMock
 from datetime import datetime
 from types import SimpleNamespace
 
+from fastapi import HTTPException
+
 from app.main import app
-from app.dependencies import verify_firebase_token
+from app.dependencies import (
+    RequestIdentity,
+    get_request_identity,
+    verify_firebase_token,
+)
 
 # ======================
 #  TestClientセットアップ
@@ -21,7 +28,32 @@ client = TestClient(app)
 
 
 @pytest.fixture
-def mock_prisma(monkeypatch):
+def mock_identity():
+    """
+    get_request_identityをモックするフィクスチャ
+    - identityをNoneにするとユーザー未登録を再現できる
+    - care_settingは各テストで上書きする
+    """
+    holder = SimpleNamespace(
+        identity=RequestIdentity(
+            firebase_uid="test-uid",
+            user_id="1",
+            current_plan="free",
+            care_setting_id=None,
+        )
+    )
+    app.dependency_overrides[get_request_identity] = lambda: holder.identity
+    return holder
+
+
+def set_care_setting(mock_prisma, mock_identity, care_setting):
+    """identityにお世話設定を紐づけ、主キーで取得するレコードを返すヘルパー"""
+    mock_identity.identity.care_setting_id = getattr(care_setting, "id", 10)
+    mock_prisma.care_settings.find_unique.return_value = care_setting
+
+
+@pytest.fixture
+def mock_prisma(monkeypatch, mock_identity):
     """
     prisma_clientをモックするフィクスチャ
     - prisma_clientの全メソッドをAsyncMockに差し替え
@@ -57,9 +89,7 @@ def test_create_care_setting_success(mock_prisma):
     お世話設定を新規登録できる
     """
 
-    # --- users.find_uniqueをモック ---
-    # awaitすると「id属性を持つオブジェクト」が返る
-    mock_prisma.users.find_unique = AsyncMock(return_value=SimpleNamespace(id="1"))
+    # --- ユーザーはmock_identityで解決済み（user_id="1"） ---
 
     # --- care_settings.createをモック ---
     # awaitすると「Prismaが返す想定のレコードオブジェクト」を再現
@@ -116,8 +146,9 @@ def test_create_care_setting_success(mock_prisma):
     assert data.get("care_clear_status") is None
 
     # --- モック呼び出しの確認 ---
-    mock_prisma.users.find_unique.assert_awaited_once()
+    mock_prisma.users.find_unique.assert_not_awaited()
     mock_prisma.care_settings.create.assert_awaited_once()
+    assert mock_prisma.care_settings.create.await_args.kwargs["data"]["user_id"] == "1"
 
 
 # ======================
@@ -128,15 +159,14 @@ def test_create_care_setting_success(mock_prisma):
 # ======================
 
 
-def test_create_care_setting_user_not_found(mock_prisma):
+def test_create_care_setting_user_not_found(mock_prisma, mock_identity):
     """
     異常系：
     Firebase認証済みだが、ユーザーが存在しない場合 → 404
     """
 
-    # --- users.find_uniqueをモック ---
-    # awaitするとNoneを返す → ユーザーが見つからないケースを再現
-    mock_prisma.users.find_unique = AsyncMock(return_value=None)
+    # --- identityをNoneにする → ユーザーが見つからないケースを再現 ---
+    mock_identity.identity = None
 
     # --- APIリクエストのペイロード ---
     payload = {
@@ -168,7 +198,6 @@ def test_create_care_setting_user_not_found(mock_prisma):
     assert data["detail"] == "User not found"
 
     # --- モック呼び出し確認 ---
-    mock_prisma.users.find_unique.assert_awaited_once()
     # care_settings.createは呼ばれない
     mock_prisma.care_settings.create.assert_not_awaited()
 
@@ -187,8 +216,7 @@ def test_create_care_setting_prisma_error(mock_prisma):
     Prismaのcreateで例外発生 → 500エラー
     """
 
-    # --- users.find_uniqueは正常にユーザーを返す ---
-    mock_prisma.users.find_unique = AsyncMock(return_value=SimpleNamespace(id="1"))
+    # --- ユーザーはmock_identityで解決済み ---
 
     # --- care_settings.createをawaitすると例外を投げる ---
     mock_prisma.care_settings.create = AsyncMock(
@@ -225,7 +253,6 @@ def test_create_care_setting_prisma_error(mock_prisma):
     assert data["detail"] == "お世話設定の登録中にエラーが発生しました"
 
     # --- モック呼び出し確認 ---
-    mock_prisma.users.find_unique.assert_awaited_once()
     mock_prisma.care_settings.create.assert_awaited_once()
 
 
@@ -237,20 +264,18 @@ def test_create_care_setting_prisma_error(mock_prisma):
 # ======================
 
 
-def test_get_my_care_setting_success(mock_prisma):
+def test_get_my_care_setting_success(mock_prisma, mock_identity):
     """
     正常系：
     ログインユーザーのケア設定を取得できる
     """
 
-    # --- users.find_uniqueをモック ---
-    # awaitすると「id属性を持つオブジェクト」を返す
-    mock_prisma.users.find_unique = AsyncMock(return_value=SimpleNamespace(id="1"))
-
-    # --- care_settings.find_firstをモック ---
-    # Prismaが返すレコードを再現
-    mock_prisma.care_settings.find_first = AsyncMock(
-        return_value=SimpleNamespace(
+    # --- identityにケア設定を紐づける ---
+    # 主キーで取得するレコードを再現
+    set_care_setting(
+        mock_prisma,
+        mock_identity,
+        SimpleNamespace(
             id=10,
             parent_name="まゆみ",
             child_name="さき",
@@ -260,7 +285,7 @@ def test_get_my_care_setting_success(mock_prisma):
             morning_meal_time=datetime(2025, 7, 1, 7, 30),
             night_meal_time=datetime(2025, 7, 1, 19, 0),
             walk_time=datetime(2025, 7, 1, 17, 0),
-        )
+        ),
     )
 
     # --- テスト用クライアントでGET ---
@@ -284,9 +309,9 @@ def test_get_my_care_setting_success(mock_prisma):
     assert data["night_meal_time"] == "19:00:00"
     assert data["walk_time"] == "17:00:00"
 
-    # --- モック呼び出し確認 ---
-    mock_prisma.users.find_unique.assert_awaited_once()
-    mock_prisma.care_settings.find_first.assert_awaited_once()
+    # --- モック呼び出し確認（依存関係で解決済みのため追加のDBアクセスなし） ---
+    mock_prisma.users.find_unique.assert_not_awaited()
+    mock_prisma.care_settings.find_first.assert_not_awaited()
 
 
 # ======================
@@ -297,15 +322,14 @@ def test_get_my_care_setting_success(mock_prisma):
 # ======================
 
 
-def test_get_my_care_setting_user_not_found(mock_prisma):
+def test_get_my_care_setting_user_not_found(mock_prisma, mock_identity):
     """
     異常系：
     Firebase認証済みだが、ユーザーが存在しない場合 → 404
     """
 
-    # --- users.find_uniqueをモック ---
-    # awaitするとNoneを返す → ユーザーが見つからないケース
-    mock_prisma.users.find_unique = AsyncMock(return_value=None)
+    # --- identityをNoneにする → ユーザーが見つからないケース ---
+    mock_identity.identity = None
 
     # --- care_settings.find_firstは呼ばれないので確認用にモック ---
     mock_prisma.care_settings.find_first = AsyncMock()
@@ -325,7 +349,6 @@ def test_get_my_care_setting_user_not_found(mock_prisma):
     assert data["detail"] == "User not found"
 
     # --- モック呼び出し確認 ---
-    mock_prisma.users.find_unique.assert_awaited_once()
     mock_prisma.care_settings.find_first.assert_not_awaited()
 
 
@@ -343,13 +366,7 @@ def test_get_my_care_setting_care_setting_not_found(mock_prisma):
     ユーザーは存在するが、CareSettingが存在しない場合 → 404
     """
 
-    # --- users.find_uniqueをモック ---
-    # awaitすると「idを持つオブジェクト」を返す → ユーザーは正常に見つかる
-    mock_prisma.users.find_unique = AsyncMock(return_value=SimpleNamespace(id="1"))
-
-    # --- care_settings.find_firstをモック ---
-    # awaitするとNoneを返す → CareSettingが見つからないケース
-    mock_prisma.care_settings.find_first = AsyncMock(return_value=None)
+    # --- identityはユーザーのみ（care_setting=None） → CareSettingが見つからないケース ---
 
     # --- テスト用クライアントでGET ---
     response = client.get(
@@ -365,9 +382,45 @@ def test_get_my_care_setting_care_setting_not_found(mock_prisma):
     data = response.json()
     assert data["detail"] == "Care setting not found"
 
-    # --- モック呼び出し確認 ---
-    mock_prisma.users.find_unique.assert_awaited_once()
-    mock_prisma.care_settings.find_first.assert_awaited_once()
+
+# ======================
+#  TC-CARE-006-2
+# ======================
+# ======================
+#  GET /api/care_settings/me 正常系テスト（identityがRedisキャッシュから解決された場合）
+# ======================
+
+
+def test_get_my_care_setting_loads_record_by_id(mock_prisma, mock_identity):
+    """
+    正常系：
+    identityがcare_setting_idのみを持つ場合、主キーでレコードを取得する
+    """
+
+    # --- キャッシュ解決時はレコードを持たない ---
+    mock_identity.identity.care_setting_id = 10
+    mock_prisma.care_settings.find_unique = AsyncMock(
+        return_value=SimpleNamespace(
+            id=10,
+            parent_name="まゆみ",
+            child_name="さき",
+            dog_name="ころん",
+            care_start_date=datetime(2025, 7, 1),
+            care_end_date=datetime(2025, 8, 1),
+            morning_meal_time=datetime(2025, 7, 1, 7, 30),
+            night_meal_time=datetime(2025, 7, 1, 19, 0),
+            walk_time=datetime(2025, 7, 1, 17, 0),
+        )
+    )
+
+    response = client.get(
+        "/api/care_settings/me",
+        headers={"Authorization": "Bearer test-token"},
+    )
+
+    assert response.status_code == 200
+    assert response.json()["dog_name"] == "ころん"
+    mock_prisma.care_settings.find_unique.assert_awaited_once_with(where={"id": 10})
 
 
 # ======================
@@ -378,18 +431,15 @@ def test_get_my_care_setting_care_setting_not_found(mock_prisma):
 # ======================
 
 
-def test_verify_pin_success(mock_prisma):
+def test_verify_pin_success(mock_prisma, mock_identity):
     """
     正常系：
     入力PINと登録PINが一致 → verified: True
     """
 
-    # --- users.find_uniqueをモック ---
-    mock_prisma.users.find_unique = AsyncMock(return_value=SimpleNamespace(id="1"))
-
-    # --- care_settings.find_firstをモック（PIN一致） ---
-    mock_prisma.care_settings.find_first = AsyncMock(
-        return_value=SimpleNamespace(care_password="1234")
+    # --- identityにケア設定を紐づける（PIN一致） ---
+    set_care_setting(
+        mock_prisma, mock_identity, SimpleNamespace(id=10, care_password="1234")
     )
 
     # --- テスト用クライアントでPOST ---
@@ -408,8 +458,7 @@ def test_verify_pin_success(mock_prisma):
     assert data["verified"] is True
 
     # --- モック呼び出し確認 ---
-    mock_prisma.users.find_unique.assert_awaited_once()
-    mock_prisma.care_settings.find_first.assert_awaited_once()
+    mock_prisma.care_settings.find_first.assert_not_awaited()
 
 
 # ======================
@@ -420,18 +469,15 @@ def test_verify_pin_success(mock_prisma):
 # ======================
 
 
-def test_verify_pin_not_matched(mock_prisma):
+def test_verify_pin_not_matched(mock_prisma, mock_identity):
     """
     正常系：
     入力PINと登録PINが一致しない → verified: False
     """
 
-    # --- users.find_uniqueをモック ---
-    mock_prisma.users.find_unique = AsyncMock(return_value=SimpleNamespace(id="1"))
-
-    # --- care_settings.find_firstをモック（PINは"1234"） ---
-    mock_prisma.care_settings.find_first = AsyncMock(
-        return_value=SimpleNamespace(care_password="1234")
+    # --- identityにケア設定を紐づける（PINは"1234"） ---
+    set_care_setting(
+        mock_prisma, mock_identity, SimpleNamespace(id=10, care_password="1234")
     )
 
     # --- テスト用クライアントでPOST（異なるPINを送る） ---
@@ -449,10 +495,6 @@ def test_verify_pin_not_matched(mock_prisma):
     data = response.json()
     assert data["verified"] is False
 
-    # --- モック呼び出し確認 ---
-    mock_prisma.users.find_unique.assert_awaited_once()
-    mock_prisma.care_settings.find_first.assert_awaited_once()
-
 
 # ======================
 #  TC-CARE-009
@@ -462,14 +504,14 @@ def test_verify_pin_not_matched(mock_prisma):
 # ======================
 
 
-def test_verify_pin_user_not_found(mock_prisma):
+def test_verify_pin_user_not_found(mock_prisma, mock_identity):
     """
     異常系：
     Firebase認証済みだが、ユーザーが存在しない場合 → 404
     """
 
-    # --- users.find_uniqueをモック（Noneを返す） ---
-    mock_prisma.users.find_unique = AsyncMock(return_value=None)
+    # --- identityをNoneにする ---
+    mock_identity.identity = None
 
     # --- テスト用クライアントでPOST ---
     response = client.post(
@@ -487,7 +529,6 @@ def test_verify_pin_user_not_found(mock_prisma):
     assert data["detail"] == "User not found"
 
     # --- モック呼び出し確認 ---
-    mock_prisma.users.find_unique.assert_awaited_once()
     mock_prisma.care_settings.find_first.assert_not_awaited()
 
 
@@ -495,23 +536,23 @@ def test_verify_pin_user_not_found(mock_prisma):
 #  TC-CARE-0010
 # ======================
 # ======================
-#  POST /api/care_settings/verify_pin 異常系テスト（Prisma例外 → 500）
+#  POST /api/care_settings/verify_pin 異常系テスト（identity解決時のDB例外 → 500）
 # ======================
 
 
 def test_verify_pin_prisma_error(mock_prisma):
     """
     異常系：
-    care_settings.find_firstで例外発生 → 500
+    ユーザー・ケア設定の解決時に例外発生 → 500
     """
 
-    # --- users.find_uniqueをモック（正常） ---
-    mock_prisma.users.find_unique = AsyncMock(return_value=SimpleNamespace(id="1"))
+    # --- get_request_identityがDBエラーで500を投げるモック ---
+    def raise_identity_error():
+        raise HTTPException(
+            status_code=500, detail="ユーザー情報取得時にエラーが発生しました"
+        )
 
-    # --- care_settings.find_firstを例外を投げるモック ---
-    mock_prisma.care_settings.find_first = AsyncMock(
-        side_effect=Exception("DB error simulated")
-    )
+    app.dependency_overrides[get_request_identity] = raise_identity_error
 
     # --- テスト用クライアントでPOST ---
     response = client.post(
@@ -526,8 +567,4 @@ def test_verify_pin_prisma_error(mock_prisma):
     # --- レスポンス検証 ---
     assert response.status_code == 500
     data = response.json()
-    assert data["detail"] == "PIN認証中にエラーが発生しました"
-
-    # --- モック呼び出し確認 ---
-    mock_prisma.users.find_unique.assert_awaited_once()
-    mock_prisma.care_settings.find_first.assert_awaited_once()
+    assert data["detail"] == "ユーザー情報取得時にエラーが発生しました"
@@ -0,0 +1,194 @@
+# pylint: disable=redefined-outer-name
+# pylint: disable=unused-argument
+
+import pytest
+from datetime import datetime, timezone
+from fastapi.testclient import TestClient
+from types import SimpleNamespace
+from unittest.mock import AsyncMock
+from app.main import app
+from app.dependencies import (
+    RequestIdentity,
+    get_request_identity,
+    verify_firebase_token,
+)
+from app.routers.message_logs import FREE_PLAN_MESSAGES
+
+# FastAPIアプリをTestClientに渡す
+client = TestClient(app)
+
+
+def make_care_setting():
+    """お世話設定レコードのダミー"""
+    return SimpleNamespace(
+        id=10,
+        parent_name="田中花子",
+        child_name="田中太郎",
+        dog_name="ポチ",
+        care_start_date=datetime(2025, 7, 1),
+        care_end_date=datetime(2025, 7, 31),
+        morning_meal_time=datetime(2025, 7, 1, 8, 0),
+        night_meal_time=datetime(2025, 7, 1, 18, 0),
+        walk_time=datetime(2025, 7, 1, 16, 0),
+    )
+
+
+@pytest.fixture
+def mock_identity():
+    """
+    get_request_identityをモックする
+    - identityをNoneにするとユーザー未登録を再現できる
+    """
+    holder = SimpleNamespace(
+        identity=RequestIdentity(
+            firebase_uid="test-uid",
+            user_id="1",
+            current_plan="free",
+            care_setting_id=10,
+            care_setting_ids=[10],
+        )
+    )
+    app.dependency_overrides[get_request_identity] = lambda: holder.identity
+    return holder
+
+
+@pytest.fixture
+def mock_prisma(monkeypatch, mock_identity):
+    """
+    ダッシュボードが使う各ルーターの prisma_client をモックする
+    """
+    mock_client = AsyncMock()
+    mock_client.care_logs.find_first.return_value = None
+    mock_client.care_settings.find_unique.return_value = make_care_setting()
+    monkeypatch.setattr("app.routers.care_logs.prisma_client", mock_client)
+    monkeypatch.setattr("app.routers.care_settings.prisma_client", mock_client)
+
+    # Firebase認証をモック
+    app.dependency_overrides[verify_firebase_token] = lambda: "test-uid"
+
+    return mock_client
+
+
+# ======================
+#  TC-DASH-001
+# ======================
+# GET /api/dashboard のテストコード
+# 正常系（設定・今日・昨日・ひとことをまとめて返す）
+def test_get_dashboard_success(mock_prisma):
+    """
+    正常系：1リクエストでダッシュボードの初期表示に必要な情報を返す
+    """
+
+    async def find_first(where):
+        # 今日（7/15）だけ記録がある
+        if where["date"] == datetime(2025, 7, 15, tzinfo=timezone.utc):
+            return SimpleNamespace(
+                id=123, fed_morning=True, fed_night=False, walk_result=False
+            )
+        return None
+
+    mock_prisma.care_logs.find_first.side_effect = find_first
+
+    response = client.get(
+        "/api/dashboard",
+        params={"date": "2025-07-15"},
+        headers={"Authorization": "Bearer test-token"},
+    )
+
+    assert response.status_code == 200
+    data = response.json()
+    assert data["date"] == "2025-07-15"
+    assert data["care_setting"]["id"] == 10
+    assert data["care_setting"]["dog_name"] == "ポチ"
+    assert data["today"] == {
+        "care_log_id": 123,
+        "fed_morning": True,
+        "fed_night": False,
+        "walked": False,
+    }
+    assert data["yesterday"]["care_log_id"] is None
+    assert data["message"] in FREE_PLAN_MESSAGES
+
+    # 今日と昨日の記録とお世話設定を並行して取得する
+    assert mock_prisma.care_logs.find_first.await_count == 2
+    mock_prisma.care_settings.find_unique.assert_awaited_once_with(where={"id": 10})
+
+
+# ======================
+#  TC-DASH-002
+# ======================
+# 正常系（プレミアムプラン → OpenAIのひとこと）
+def test_get_dashboard_premium_message(mock_prisma, mock_identity, monkeypatch):
+    """
+    正常系：プレミアムプランの場合はOpenAIで生成したひとことを返す
+    """
+    mock_identity.identity.current_plan = "premium"
+
+    async def fake_openai_message():
+        return "おすわりするわん！"
+
+    monkeypatch.setattr(
+        "app.routers.message_logs.get_openai_message", fake_openai_message
+    )
+
+    response = client.get(
+        "/api/dashboard",
+        headers={"Authorization": "Bearer test-token"},
+    )
+
+    assert response.status_code == 200
+    assert response.json()["message"] == "おすわりするわん！"
+
+
+# ======================
+#  TC-DASH-003
+# ======================
+# 異常系（ユーザー未登録 / お世話設定なし → 404）
+@pytest.mark.parametrize(
+    "identity, detail",
+    [
+        (None, "User not found"),
+        (
+            RequestIdentity(
+                firebase_uid="test-uid",
+                user_id="1",
+                current_plan="free",
+                care_setting_id=None,
+            ),
+            "Care setting not found",
+        ),
+    ],
+)
+def test_get_dashboard_not_found(mock_prisma, mock_identity, identity, detail):
+    """
+    異常系：ユーザーまたはお世話設定が存在しない場合（フロントはオンボーディングへ遷移）
+    """
+    mock_identity.identity = identity
+
+    response = client.get(
+        "/api/dashboard",
+        headers={"Authorization": "Bearer test-token"},
+    )
+
+    assert response.status_code == 404
+    assert detail in response.json()["detail"]
+    mock_prisma.care_logs.find_first.assert_not_awaited()
+
+
+# ======================
+#  TC-DASH-004
+# ======================
+# 異常系（DB例外 → 500）
+def test_get_dashboard_db_error(mock_prisma):
+    """
+    異常系：記録の取得中にDB例外が発生した場合
+    """
+    mock_prisma.care_logs.find_first.side_effect = RuntimeError("DB down")
+
+    response = client.get(
+        "/api/dashboard",
+        headers={"Authorization": "Bearer test-token"},
+    )
+
+    assert response.status_code == 500
+    assert "ダッシュボード情報の取得中にエラーが発生しました" in response.json()["detail"]
@@ -1,11 +1,13 @@
 # pylint: disable=redefined-outer-name
 
+import asyncio
 import pytest
 from fastapi.testclient import TestClient
-from unittest.mock import AsyncMock
+from fastapi import HTTPException
 from app.main import app
-from app.dependencies import verify_firebase_token
+from app.dependencies import RequestIdentity, get_request_identity
 from types import SimpleNamespace
+from app.routers import message_logs
 from app.routers.message_logs import get_openai_message
 
 # FastAPIアプリをTestClientに渡す
@@ -13,22 +15,24 @@ client = TestClient(app)
 
 
 @pytest.fixture
-def mock_prisma(monkeypatch):
+def mock_identity():
     """
-    prisma_clientをモックする
+    get_request_identityをモックする
+    - identityをNoneにするとユーザー未登録を再現できる
     """
-    mock_client = AsyncMock()
-
-    # user.find_unique デフォルトのモック動作（テスト内で上書き）
-    mock_client.users.find_unique.return_value = None
-
-    # prisma_clientを実際のappに差し替える
-    monkeypatch.setattr("app.routers.message_logs.prisma_client", mock_client)
-
-    # Firebase認証をモック
-    app.dependency_overrides[verify_firebase_token] = lambda: "test-uid"
-
-    return mock_client
+    holder = SimpleNamespace(identity=None)
+    app.dependency_overrides[get_request_identity] = lambda: holder.identity
+    return holder
+
+
+def make_identity(current_plan):
+    """指定プランのRequestIdentityを作るヘルパー"""
+    return RequestIdentity(
+        firebase_uid="test-uid",
+        user_id="1",
+        current_plan=current_plan,
+        care_setting_id=10,
+    )
 
 
 # ======================
@@ -37,14 +41,12 @@ def mock_prisma(monkeypatch):
 # POST /api/message_logs/generateのテストコード
 # 正常系（無料プラン→固定メッセージ返却）
 # ランダムメッセージから取ってくるためmonkeypatchも引数にとる
-def test_generate_message_free_plan(mock_prisma, monkeypatch):
+def test_generate_message_free_plan(mock_identity, monkeypatch):
     """
     正常系：ユーザーが無料プランの場合、固定メッセージを返す
     """
-    # users.find_uniqueをモック
-    mock_prisma.users.find_unique.return_value = SimpleNamespace(
-        id=1, current_plan="free"
-    )
+    # 無料プランのユーザーとして解決済み
+    mock_identity.identity = make_identity("free")
 
     # random.choiceを強制的に「わん！」にする
     monkeypatch.setattr("app.routers.message_logs.random.choice", lambda x: "わん！")
@@ -59,25 +61,24 @@ def test_generate_message_free_plan(mock_prisma, monkeypatch):
     data = response.json()
     assert data["message"] == "わん！"
 
-    mock_prisma.users.find_unique.assert_awaited_once()
-
 
 # ======================
 #  TC-MSG-002
 # ======================
 # 正常系（プレミアムプラン→get_openai_messageの戻り値を使う）
-def test_generate_message_premium_plan(mock_prisma, monkeypatch):
+def test_generate_message_premium_plan(mock_identity, monkeypatch):
     """
     正常系：ユーザーがプレミアムプランの場合、get_openai_messageの戻り値を返す
     """
-    # users.find_uniqueをモック
-    mock_prisma.users.find_unique.return_value = SimpleNamespace(
-        id=1, current_plan="premium"
-    )
+    # プレミアムプランのユーザーとして解決済み
+    mock_identity.identity = make_identity("premium")
 
     # get_openai_messageを強制モック
+    async def fake_openai_message():
+        return "おべんきょうするわん！"
+
     monkeypatch.setattr(
-        "app.routers.message_logs.get_openai_message", lambda: "おべんきょうするわん！"
+        "app.routers.message_logs.get_openai_message", fake_openai_message
     )
 
     # テストクライアントでPOST
@@ -91,26 +92,21 @@ def test_generate_message_premium_plan(mock_prisma, monkeypatch):
     data = response.json()
     assert data["message"] == "おべんきょうするわん！"
 
-    # モック呼び出しを確認
-    mock_prisma.users.find_unique.assert_awaited_once()
-
 
 # ======================
 #  TC-MSG-003
 # ======================
 # 正常系（プレミアムプランだが、get_openai_message側エラー→固定メッセージ返却）
-def test_generate_message_premium_plan_fallback_on_error(mock_prisma, monkeypatch):
+def test_generate_message_premium_plan_fallback_on_error(mock_identity, monkeypatch):
     """
     正常系：ユーザーがプレミアムプランだがget_openai_messageがエラーを起こす場合、
     固定メッセージからフォールバックメッセージを返す
     """
-    # users.find_uniqueをモック
-    mock_prisma.users.find_unique.return_value = SimpleNamespace(
-        id=1, current_plan="premium"
-    )
+    # プレミアムプランのユーザーとして解決済み
+    mock_identity.identity = make_identity("premium")
 
     # get_openai_messageを例外を投げるモックにする
-    def raise_error():
+    async def raise_error():
         raise TypeError("OpenAI側で予期しないTypeError")
 
     monkeypatch.setattr("app.routers.message_logs.get_openai_message", raise_error)
@@ -129,22 +125,19 @@ def test_generate_message_premium_plan_fallback_on_error(mock_prisma, monkeypatc
     data = response.json()
     assert data["message"] == "わん！"
 
-    # モック呼び出しを確認
-    mock_prisma.users.find_unique.assert_awaited_once()
-
 
 # ======================
 #  TC-MSG-004
 # ======================
 # 異常系（ユーザーが存在しない場合 → 400エラー）
-def test_generate_message_user_not_found(mock_prisma):
+def test_generate_message_user_not_found(mock_identity):
     """
     異常系：
     Firebase UIDに対応するユーザーが存在しない場合、
     400エラーとエラーメッセージを返す
     """
-    # users.find_unique → None（ユーザー見つからない想定）
-    mock_prisma.users.find_unique.return_value = None
+    # identity → None（ユーザー見つからない想定）
+    mock_identity.identity = None
 
     # テストクライアントでPOST
     response = client.post(
@@ -157,31 +150,24 @@ def test_generate_message_user_not_found(mock_prisma):
     data = response.json()
     assert "Firebase UIDのユーザーが存在しません" in data["detail"]
 
-    # find_unique が1回だけ呼ばれていることを検証
-    mock_prisma.users.find_unique.assert_awaited_once()
-
 
 # ======================
 #  TC-MSG-005
 # ======================
-# 異常系（prisma_client例外発生 → フォールバック固定メッセージを返す）
-def test_generate_message_prisma_client_error_returns_fallback(
-    mock_prisma, monkeypatch
-):
+# 異常系（ユーザー情報の解決時にDB例外発生 → 500エラー）
+def test_generate_message_identity_error_returns_500():
     """
     異常系：
-    prisma_clientのusers.find_uniqueが例外を投げた場合、
-    サーバーエラー扱いで固定メッセージを返す
+    get_request_identityがDBエラーで例外を投げた場合、
+    500エラーを返す（ルーター側ではDBにアクセスしない）
     """
 
-    # users.find_uniqueを例外を投げるようにモック
-    async def raise_error(*args, **kwargs):
-        raise AttributeError("DBアクセス失敗")
-
-    mock_prisma.users.find_unique.side_effect = raise_error
+    def raise_identity_error():
+        raise HTTPException(
+            status_code=500, detail="ユーザー情報取得時にエラーが発生しました"
+        )
 
-    # random.choiceを固定に
-    monkeypatch.setattr("app.routers.message_logs.random.choice", lambda x: "わん！")
+    app.dependency_overrides[get_request_identity] = raise_identity_error
 
     # リクエスト
     response = client.post(
@@ -189,13 +175,9 @@ def test_generate_message_prisma_client_error_returns_fallback(
         headers={"Authorization": "Bearer test-token"},
     )
 
-    # 200 OK（フォールバック動作なので200で固定メッセージを返す）
-    assert response.status_code == 200
+    assert response.status_code == 500
     data = response.json()
-    assert data["message"] == "わん！"
-
-    # prisma呼び出しは試みている
-    mock_prisma.users.find_unique.assert_awaited_once()
+    assert data["detail"] == "ユーザー情報取得時にエラーが発生しました"
 
 
 # ======================
@@ -218,9 +200,9 @@ def test_get_openai_message_empty_response(monkeypatch):
     class DummyCompletionResponse:
         choices = [DummyChoices()]
 
-    # .completions.create() の構造
+    # .completions.create() の構造（AsyncOpenAI のため await で呼ばれる）
     class DummyCompletions:
-        def create(self, **_kwargs):
+        async def create(self, **_kwargs):
             return DummyCompletionResponse()
 
     # .chat の構造
@@ -231,9 +213,9 @@ def test_get_openai_message_empty_response(monkeypatch):
     class DummyClient:
         chat = DummyChat()
 
-    # OpenAIクラスを強制的にこのモッククライアントに差し替える
+    # lifespan で作成する共有クライアントをこのモッククライアントに差し替える
     monkeypatch.setattr(
-        "app.routers.message_logs.OpenAI", lambda api_key: DummyClient()
+        "app.routers.message_logs.get_openai_client", lambda: DummyClient()
     )
 
     # random.choiceも強制的に「わん！」を返すようにする
@@ -241,7 +223,66 @@ def test_get_openai_message_empty_response(monkeypatch):
     monkeypatch.setattr("app.routers.message_logs.random.choice", lambda x: "わん！")
 
     # テスト対象実行
-    result = get_openai_message()
+    result = asyncio.run(get_openai_message())
 
     # 期待通りfallbackメッセージになることを確認
     assert result == "わん！"
+
+
+# ======================
+#  TC-MSG-007
+# ======================
+# 正常系（プレミアムプラン→生成済みのメッセージがあればOpenAIを呼ばない）
+def test_generate_message_premium_plan_from_pool(mock_identity, monkeypatch):
+    """
+    正常系：プールに生成済みのメッセージがある場合、get_openai_messageを呼ばずに返す
+    """
+    mock_identity.identity = make_identity("premium")
+
+    async def pop():
+        return "まてをおぼえるわん！"
+
+    async def raise_error():
+        raise AssertionError("プールから返せる場合はOpenAIを呼ばない")
+
+    monkeypatch.setattr("app.routers.message_logs.message_pool.pop", pop)
+    monkeypatch.setattr("app.routers.message_logs.get_openai_message", raise_error)
+
+    response = client.post(
+        "/api/message_logs/generate",
+        headers={"Authorization": "Bearer test-token"},
+    )
+
+    assert response.status_code == 200
+    assert response.json()["message"] == "まてをおぼえるわん！"
+
+
+# ======================
+#  TC-MSG-008
+# ======================
+# 異常系（OpenAIの応答が期限内に返らない場合は待たずに固定メッセージ）
+def test_get_openai_message_deadline_exceeded(monkeypatch):
+    async def slow_request(_category):
+        await asyncio.sleep(1)
+        return "まにあわないわん！"
+
+    monkeypatch.setattr(message_logs, "request_openai_message", slow_request)
+    monkeypatch.setattr(message_logs, "OPENAI_MESSAGE_DEADLINE", 0.01)
+    monkeypatch.setattr("app.routers.message_logs.random.choice", lambda x: "わん！")
+
+    assert asyncio.run(get_openai_message(category=1)) == "わん！"
+
+
+# ======================
+#  TC-MSG-009
+# ======================
+# 異常系（同時実行数の上限に達している場合はOpenAIを呼ばずに固定メッセージ）
+def test_get_openai_message_concurrency_limit(monkeypatch):
+    async def unexpected_request(_category):
+        raise AssertionError("上限に達している場合はOpenAIを呼ばない")
+
+    monkeypatch.setattr(message_logs, "request_openai_message", unexpected_request)
+    monkeypatch.setattr(message_logs, "openai_semaphore", asyncio.Semaphore(0))
+    monkeypatch.setattr("app.routers.message_logs.random.choice", lambda x: "わん！")
+
+    assert asyncio.run(get_openai_message(category=1)) == "わん！"
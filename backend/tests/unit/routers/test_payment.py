@@ -1,29 +1,40 @@
 # pylint: disable=redefined-outer-name
 
 import pytest
+from fastapi import HTTPException
 from fastapi.testclient import TestClient
-from unittest.mock import AsyncMock
+from types import SimpleNamespace
 from app.main import app
-from app.dependencies import verify_firebase_token
+from app.dependencies import (
+    RequestIdentity,
+    get_request_identity,
+    verify_firebase_token,
+)
 
 # FastAPIアプリをTestClientに渡す
 client = TestClient(app)
 
 
+def make_identity(current_plan):
+    """指定プランのRequestIdentityを作るヘルパー"""
+    return RequestIdentity(
+        firebase_uid="test-uid",
+        user_id="1",
+        current_plan=current_plan,
+        care_setting_id=None,
+    )
+
+
 @pytest.fixture
-def mock_prisma_and_stripe(monkeypatch):
+def mock_identity_and_stripe(monkeypatch):
     """
-    prisma_clientとstripe_serviceをモックするfixture
+    get_request_identityとstripe_serviceをモックするfixture
+    - identityをテスト内で上書き可能（デフォルトNone）
     - stripe_service.create_checkout_sessionをテスト内で上書き可能
     """
-    # prisma_clientをモック
-    mock_prisma = AsyncMock()
-
-    # デフォルトNone（テストで上書き）
-    mock_prisma.users.find_unique.return_value = None
-
-    # 実際のapp内のprisma_clientをモックに差し替え
-    monkeypatch.setattr("app.routers.payment.prisma_client", mock_prisma)
+    # ユーザー識別情報をモック（デフォルトNone、テストで上書き）
+    holder = SimpleNamespace(identity=None)
+    app.dependency_overrides[get_request_identity] = lambda: holder.identity
 
     # stripe_serviceのcreate_checkout_sessionもモック
     # デフォルトは固定のダミーURLを返す
@@ -35,7 +46,7 @@ def mock_prisma_and_stripe(monkeypatch):
     # Firebase認証をモック
     app.dependency_overrides[verify_firebase_token] = lambda: "test-uid"
 
-    return mock_prisma
+    return holder
 
 
 # ======================
@@ -43,14 +54,12 @@ def mock_prisma_and_stripe(monkeypatch):
 # ======================
 # POST /api/payments/create-checkout-sessionのテストコード
 # 正常系（ユーザーが無料プラン→checkout_session作成が呼ばれる）
-def test_create_checkout_session_free_user_success(mock_prisma_and_stripe):
+def test_create_checkout_session_free_user_success(mock_identity_and_stripe):
     """
     正常系：ユーザーが無料プランならStripeセッションURLを返す
     """
     # ユーザーが「freeプラン」で存在するようモックする
-    mock_prisma_and_stripe.users.find_unique.return_value = AsyncMock(
-        id=1, current_plan="free"
-    )
+    mock_identity_and_stripe.identity = make_identity("free")
 
     # テストクライアントでPOSTリクエスト
     response = client.post(
@@ -64,22 +73,17 @@ def test_create_checkout_session_free_user_success(mock_prisma_and_stripe):
     assert "url" in data
     assert data["url"] == "https://dummy-stripe-session-url.com"
 
-    # Prisma呼び出し検証
-    mock_prisma_and_stripe.users.find_unique.assert_awaited_once()
-
 
 # ======================
 #  TC-PAY-002
 # ======================
 # 異常系（ユーザーがすでにpremiumプラン）
-def test_create_checkout_session_already_premium_user(mock_prisma_and_stripe):
+def test_create_checkout_session_already_premium_user(mock_identity_and_stripe):
     """
     異常系：すでにpremiumプランのユーザーの場合 → 400エラーを返す
     """
     # ユーザーが「premiumプラン」で存在するようモックする
-    mock_prisma_and_stripe.users.find_unique.return_value = AsyncMock(
-        id=1, current_plan="premium"
-    )
+    mock_identity_and_stripe.identity = make_identity("premium")
 
     # テストクライアントでPOSTリクエスト
     response = client.post(
@@ -92,24 +96,19 @@ def test_create_checkout_session_already_premium_user(mock_prisma_and_stripe):
     data = response.json()
     assert "すでにプレミアムプランです" in data["detail"]
 
-    # Prisma呼び出し検証
-    mock_prisma_and_stripe.users.find_unique.assert_awaited_once()
-
 
 # ======================
 #  TC-PAY-003
 # ======================
 # 異常系（Stripe Service側が例外を投げる）
 def test_create_checkout_session_stripe_service_error(
-    mock_prisma_and_stripe, monkeypatch
+    mock_identity_and_stripe, monkeypatch
 ):
     """
     異常系：Stripeサービス側で例外発生 → 500エラー
     """
     # ユーザーは無料プラン
-    mock_prisma_and_stripe.users.find_unique.return_value = AsyncMock(
-        id=1, current_plan="free"
-    )
+    mock_identity_and_stripe.identity = make_identity("free")
 
     # Stripeサービスを例外を投げるモックに差し替える
     def fake_create_checkout_session(_):
@@ -129,21 +128,23 @@ def test_create_checkout_session_stripe_service_error(
     # 検証
     assert response.status_code == 500
     assert "決済セッション生成中にサーバーエラーが発生しました" in response.text
-    mock_prisma_and_stripe.users.find_unique.assert_awaited_once()
 
 
 # ======================
 #  TC-PAY-004
 # ======================
-# 異常系（prisma_client.users.find_unique でDB例外）
-def test_create_checkout_session_prisma_error(mock_prisma_and_stripe):
+# 異常系（ユーザー情報の解決時にDB例外）
+def test_create_checkout_session_prisma_error(mock_identity_and_stripe):
     """
-    異常系：Prismaのusers.find_uniqueで例外 → 500エラー
+    異常系：get_request_identityでDB例外 → 500エラー
     """
-    # Prisma側が例外を投げるようにモック
-    mock_prisma_and_stripe.users.find_unique.side_effect = Exception(
-        "DB connection failure!"
-    )
+    # ユーザー情報の解決時にDB例外 → 依存関係が500を投げる
+    def raise_identity_error():
+        raise HTTPException(
+            status_code=500, detail="ユーザー情報取得時にエラーが発生しました"
+        )
+
+    app.dependency_overrides[get_request_identity] = raise_identity_error
 
     # テストリクエスト
     response = client.post(
@@ -153,5 +154,4 @@ def test_create_checkout_session_prisma_error(mock_prisma_and_stripe):
 
     # 検証
     assert response.status_code == 500
-    assert "決済セッション生成中にサーバーエラーが発生しました" in response.text
-    mock_prisma_and_stripe.users.find_unique.assert_awaited_once()
+    assert "ユーザー情報取得時にエラーが発生しました" in response.text
@@ -1,17 +1,41 @@
 # pylint: disable=redefined-outer-name
+# pylint: disable=unused-argument
 
 import pytest
 from fastapi.testclient import TestClient
+from types import SimpleNamespace
 from unittest.mock import AsyncMock
 from app.main import app
-from app.dependencies import verify_firebase_token
+from app.dependencies import (
+    RequestIdentity,
+    get_request_identity,
+    verify_firebase_token,
+)
 
 # FastAPIアプリをTestClientに渡す
 client = TestClient(app)
 
 
 @pytest.fixture
-def mock_prisma(monkeypatch):
+def mock_identity():
+    """
+    get_request_identityをモックする
+    - identityをNoneにするとユーザー未登録を再現できる
+    """
+    holder = SimpleNamespace(
+        identity=RequestIdentity(
+            firebase_uid="test-uid",
+            user_id="1",
+            current_plan="free",
+            care_setting_id=10,
+        )
+    )
+    app.dependency_overrides[get_request_identity] = lambda: holder.identity
+    return holder
+
+
+@pytest.fixture
+def mock_prisma(monkeypatch, mock_identity):
     """
     prisma_clientをモックする
     """
@@ -44,12 +68,6 @@ def test_create_reflection_note_success(mock_prisma):
     反省文を新規登録して201を返す
     """
 
-    # users.find_uniqueをモック
-    mock_prisma.users.find_unique.return_value = AsyncMock(id=1)
-
-    # care_settings.find_firstをモック
-    mock_prisma.care_settings.find_first.return_value = AsyncMock(id=10)
-
     # reflection_notes.createをモック
     mock_prisma.reflection_notes.create.return_value = AsyncMock(
         id=123,
@@ -79,8 +97,6 @@ def test_create_reflection_note_success(mock_prisma):
     assert data["approved_by_parent"] is False
 
     # モック呼び出しの確認
-    mock_prisma.users.find_unique.assert_awaited_once()
-    mock_prisma.care_settings.find_first.assert_awaited_once()
     mock_prisma.reflection_notes.create.assert_awaited_once()
 
 
@@ -88,12 +104,12 @@ def test_create_reflection_note_success(mock_prisma):
 #  TC-REFLECT-002
 # ======================
 # 異常系（ユーザーが存在しない）
-def test_create_reflection_note_user_not_found(mock_prisma):
+def test_create_reflection_note_user_not_found(mock_prisma, mock_identity):
     """
     異常系：ユーザーが存在しない場合 → 404
     """
-    # users.find_unique が None を返す
-    mock_prisma.users.find_unique.return_value = None
+    # identity が None（ユーザー未登録）
+    mock_identity.identity = None
 
     request_payload = {"content": "ごめんなさい"}
 
@@ -107,21 +123,18 @@ def test_create_reflection_note_user_not_found(mock_prisma):
     data = response.json()
     assert "ユーザーが見つかりません" in data["detail"]
 
-    mock_prisma.users.find_unique.assert_awaited_once()
 
 
 # ======================
 #  TC-REFLECT-003
 # ======================
 # 異常系（お世話設定が存在しない）
-def test_create_reflection_note_care_setting_not_found(mock_prisma):
+def test_create_reflection_note_care_setting_not_found(mock_prisma, mock_identity):
     """
     異常系：お世話設定が存在しない場合 → 404
     """
-    # ユーザーは存在
-    mock_prisma.users.find_unique.return_value = AsyncMock(id=1)
-    # care_settings.find_first は None
-    mock_prisma.care_settings.find_first.return_value = None
+    # ユーザーは存在するが care_setting は未登録
+    mock_identity.identity.care_setting_id = None
 
     request_payload = {"content": "ごめんなさい"}
 
@@ -135,8 +148,6 @@ def test_create_reflection_note_care_setting_not_found(mock_prisma):
     data = response.json()
     assert "お世話設定が見つかりません" in data["detail"]
 
-    mock_prisma.users.find_unique.assert_awaited_once()
-    mock_prisma.care_settings.find_first.assert_awaited_once()
 
 
 # ======================
@@ -147,9 +158,7 @@ def test_create_reflection_note_prisma_exception(mock_prisma):
     """
     異常系：Prisma例外発生 → 500
     """
-    # ユーザーもcare_settingも存在する
-    mock_prisma.users.find_unique.return_value = AsyncMock(id=1)
-    mock_prisma.care_settings.find_first.return_value = AsyncMock(id=10)
+    # ユーザーもcare_settingも存在する（mock_identityで解決済み）
     # create で例外を投げさせる
     mock_prisma.reflection_notes.create.side_effect = Exception("DB error")
 
@@ -165,8 +174,6 @@ def test_create_reflection_note_prisma_exception(mock_prisma):
     data = response.json()
     assert "DB登録時にエラーが発生しました" in data["detail"]
 
-    mock_prisma.users.find_unique.assert_awaited_once()
-    mock_prisma.care_settings.find_first.assert_awaited_once()
     mock_prisma.reflection_notes.create.assert_awaited_once()
 
 
@@ -179,11 +186,6 @@ def test_get_reflection_notes_success(mock_prisma):
     """
     正常系：care_settingに紐づく反省文一覧を返却
     """
-    # ユーザー取得モック
-    mock_prisma.users.find_unique.return_value = AsyncMock(id=1)
-
-    # care_setting取得モック
-    mock_prisma.care_settings.find_first.return_value = AsyncMock(id=10)
 
     # reflection_notes.find_manyモック → 2件返す
     mock_prisma.reflection_notes.find_many.return_value = [
@@ -217,8 +219,6 @@ def test_get_reflection_notes_success(mock_prisma):
     assert data[0]["content"] == "反省文1"
     assert data[1]["approved_by_parent"] is True
 
-    mock_prisma.users.find_unique.assert_awaited_once()
-    mock_prisma.care_settings.find_first.assert_awaited_once()
     mock_prisma.reflection_notes.find_many.assert_awaited_once()
 
 
@@ -230,8 +230,6 @@ def test_get_reflection_notes_empty_list(mock_prisma):
     """
     正常系：反省文が0件でも空リストを返す
     """
-    mock_prisma.users.find_unique.return_value = AsyncMock(id=1)
-    mock_prisma.care_settings.find_first.return_value = AsyncMock(id=10)
     mock_prisma.reflection_notes.find_many.return_value = []
 
     response = client.get(
@@ -244,8 +242,6 @@ def test_get_reflection_notes_empty_list(mock_prisma):
     assert isinstance(data, list)
     assert data == []
 
-    mock_prisma.users.find_unique.assert_awaited_once()
-    mock_prisma.care_settings.find_first.assert_awaited_once()
     mock_prisma.reflection_notes.find_many.assert_awaited_once()
 
 
@@ -253,12 +249,12 @@ def test_get_reflection_notes_empty_list(mock_prisma):
 #  TC-REFLECT-007
 # ======================
 # 異常系（ユーザーが存在しない）
-def test_get_reflection_notes_user_not_found(mock_prisma):
+def test_get_reflection_notes_user_not_found(mock_prisma, mock_identity):
     """
     異常系：ユーザーが見つからない場合は404
     """
     # ユーザーレコードなし
-    mock_prisma.users.find_unique.return_value = None
+    mock_identity.identity = None
 
     response = client.get(
         "/api/reflection_notes",
@@ -274,13 +270,12 @@ def test_get_reflection_notes_user_not_found(mock_prisma):
 #  TC-REFLECT-008
 # ======================
 # 異常系（お世話設定が存在しない）
-def test_get_reflection_notes_care_setting_not_found(mock_prisma):
+def test_get_reflection_notes_care_setting_not_found(mock_prisma, mock_identity):
     """
     異常系：お世話設定が見つからない場合は404
     """
     # ユーザーはいるけどcare_setting未登録
-    mock_prisma.users.find_unique.return_value = AsyncMock(id=1)
-    mock_prisma.care_settings.find_first.return_value = None
+    mock_identity.identity.care_setting_id = None
 
     response = client.get(
         "/api/reflection_notes",
@@ -301,7 +296,7 @@ def test_get_reflection_notes_prisma_error(mock_prisma):
     異常系：DB例外が発生した場合は500
     """
     # Prisma呼び出しでサーバー例外を再現
-    mock_prisma.users.find_unique.side_effect = Exception("DBエラー")
+    mock_prisma.reflection_notes.find_many.side_effect = Exception("DBエラー")
 
     response = client.get(
         "/api/reflection_notes",
@@ -322,11 +317,6 @@ def test_patch_reflection_note_success(mock_prisma):
     """
     正常系：保護者が承認状態を更新できる
     """
-    # ユーザー取得OK
-    mock_prisma.users.find_unique.return_value = AsyncMock(id=1)
-
-    # care_setting取得OK
-    mock_prisma.care_settings.find_first.return_value = AsyncMock(id=10)
 
     # 該当のreflection_note取得OK (権限確認)
     mock_prisma.reflection_notes.find_unique.return_value = AsyncMock(
@@ -357,8 +347,6 @@ def test_patch_reflection_note_success(mock_prisma):
     assert data["content"] == "がんばります"
 
     # モック呼び出し確認
-    mock_prisma.users.find_unique.assert_awaited_once()
-    mock_prisma.care_settings.find_first.assert_awaited_once()
     mock_prisma.reflection_notes.find_unique.assert_awaited_once()
     mock_prisma.reflection_notes.update.assert_awaited_once()
 
@@ -367,11 +355,11 @@ def test_patch_reflection_note_success(mock_prisma):
 #  TC-REFLECT-011
 # ======================
 # 異常系（ユーザーが存在しない）
-def test_patch_reflection_note_user_not_found(mock_prisma):
+def test_patch_reflection_note_user_not_found(mock_prisma, mock_identity):
     """
     異常系：ユーザーが存在しない場合 404
     """
-    mock_prisma.users.find_unique.return_value = None
+    mock_identity.identity = None
 
     payload = {"approved_by_parent": True}
     response = client.patch(
@@ -388,12 +376,11 @@ def test_patch_reflection_note_user_not_found(mock_prisma):
 #  TC-REFLECT-012
 # ======================
 # 異常系（お世話設定が存在しない）
-def test_patch_reflection_note_care_setting_not_found(mock_prisma):
+def test_patch_reflection_note_care_setting_not_found(mock_prisma, mock_identity):
     """
     異常系：お世話設定が存在しない場合 404
     """
-    mock_prisma.users.find_unique.return_value = AsyncMock(id=1)
-    mock_prisma.care_settings.find_first.return_value = None
+    mock_identity.identity.care_setting_id = None
 
     payload = {"approved_by_parent": True}
     response = client.patch(
@@ -414,8 +401,6 @@ def test_patch_reflection_note_note_not_found(mock_prisma):
     """
     異常系：指定noteが存在しない場合 403
     """
-    mock_prisma.users.find_unique.return_value = AsyncMock(id=1)
-    mock_prisma.care_settings.find_first.return_value = AsyncMock(id=10)
     mock_prisma.reflection_notes.find_unique.return_value = None
 
     payload = {"approved_by_parent": True}
@@ -437,8 +422,6 @@ def test_patch_reflection_note_forbidden_error(mock_prisma):
     """
     異常系：care_settingが一致しない場合 403
     """
-    mock_prisma.users.find_unique.return_value = AsyncMock(id=1)
-    mock_prisma.care_settings.find_first.return_value = AsyncMock(id=10)
     # noteのcare_setting_idが別のもの
     mock_prisma.reflection_notes.find_unique.return_value = AsyncMock(
         id=123, care_setting_id=99
@@ -463,7 +446,9 @@ def test_patch_reflection_note_prisma_error(mock_prisma):
     """
     異常系：Prismaクエリで予期せぬ例外発生 → 500
     """
-    mock_prisma.users.find_unique.side_effect = Exception("DB connection error")
+    mock_prisma.reflection_notes.find_unique.side_effect = Exception(
+        "DB connection error"
+    )
 
     payload = {"approved_by_parent": True}
     response = client.patch(
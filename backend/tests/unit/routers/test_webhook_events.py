@@ -1,12 +1,14 @@
 # pylint: disable=redefined-outer-name
 # pylint: disable=unused-argument
 
+import asyncio
 import pytest
 from fastapi.testclient import TestClient
-from unittest.mock import AsyncMock
+from unittest.mock import AsyncMock, MagicMock
 from app.main import app
 import json
-from app.routers.webhook_events import process_webhook_event
+from app.routers.webhook_events import process_claimed_webhook_events
+from app.services import webhook_handlers
 
 # テストクライアント
 client = TestClient(app)
@@ -23,24 +25,24 @@ def mock_prisma(monkeypatch):
 
     # usersテーブル
     mock_client.users.find_unique.return_value = None
-    mock_client.users.update.return_value = None
+    mock_client.users.find_many.return_value = []
 
     # webhook_eventsテーブル
-    mock_client.webhook_events.create.return_value = AsyncMock(
-        id="evt_test_123",
-        payload="{}",
-        firebase_uid="test-uid",
-        processed=False,
-        error_message=None,
-    )
+    # create_many(skip_duplicates=True) は保存した件数を返す
+    mock_client.webhook_events.create_many.return_value = 1
     mock_client.webhook_events.find_many.return_value = []
     mock_client.webhook_events.update.return_value = None
+    mock_client.webhook_events.update_many.return_value = 0
 
-    # paymentテーブル
-    mock_client.payment.create.return_value = None
+    # 支払いの適用（batch_ 内の呼び出しはコミット時にまとめて送られるため await されない）
+    batcher = MagicMock()
+    batcher.__aenter__.return_value = batcher
+    mock_client.batch_ = MagicMock(return_value=batcher)
+    mock_client.batcher = batcher
 
     # 実際のprisma_clientを差し替える
     monkeypatch.setattr("app.routers.webhook_events.prisma_client", mock_client)
+    monkeypatch.setattr("app.services.webhook_handlers.prisma_client", mock_client)
 
     return mock_client
 
@@ -57,12 +59,17 @@ def test_webhook_event_checkout_session_completed_triggers_processing(
     """
     正常系：
     - event_typeがcheckout.session.completedなら
-      webhook_events.createもprocess_webhook_eventも呼ばれる
+      webhook_events.create_manyが呼ばれ、ワーカーに通知される
+    - 処理自体はワーカーが行うため、process_claimed_webhook_eventsは待たない
     """
-    # process_webhook_eventをモック
+    # process_claimed_webhook_eventsをモック
     process_mock = AsyncMock()
     monkeypatch.setattr(
-        "app.routers.webhook_events.process_webhook_event", process_mock
+        "app.routers.webhook_events.process_claimed_webhook_events", process_mock
+    )
+    notify_mock = MagicMock()
+    monkeypatch.setattr(
+        "app.routers.webhook_events.webhook_worker.notify", notify_mock
     )
 
     payload = {
@@ -87,9 +94,10 @@ def test_webhook_event_checkout_session_completed_triggers_processing(
     assert "Webhook eventを保存しました" in response.text
 
     # DB保存
-    mock_prisma.webhook_events.create.assert_awaited_once()
-    # 自動処理
-    process_mock.assert_awaited_once()
+    mock_prisma.webhook_events.create_many.assert_awaited_once()
+    # ワーカーへの通知のみ（その場では処理しない）
+    notify_mock.assert_called_once()
+    process_mock.assert_not_awaited()
 
 
 # ======================
@@ -100,11 +108,11 @@ def test_webhook_event_other_type_does_not_trigger_processing(mock_prisma, monke
     """
     正常系：
     - 他のevent_typeなら
-      webhook_events.createは呼ばれるが、process_webhook_eventは呼ばれない
+      webhook_events.create_manyは呼ばれるが、process_claimed_webhook_eventsは呼ばれない
     """
     process_mock = AsyncMock()
     monkeypatch.setattr(
-        "app.routers.webhook_events.process_webhook_event", process_mock
+        "app.routers.webhook_events.process_claimed_webhook_events", process_mock
     )
 
     payload = {
@@ -127,7 +135,7 @@ def test_webhook_event_other_type_does_not_trigger_processing(mock_prisma, monke
     assert "Webhook eventを保存しました" in response.text
 
     # DB保存はされる
-    mock_prisma.webhook_events.create.assert_awaited_once()
+    mock_prisma.webhook_events.create_many.assert_awaited_once()
     # 自動処理は呼ばれない
     process_mock.assert_not_awaited()
 
@@ -135,15 +143,15 @@ def test_webhook_event_other_type_does_not_trigger_processing(mock_prisma, monke
 # ======================
 #  TC-WEBHOOK-003
 # ======================
-# 異常系（prisma_client.webhook_events.create が例外を投げる）
+# 異常系（prisma_client.webhook_events.create_many が例外を投げる）
 def test_webhook_event_db_create_error_returns_500(mock_prisma, monkeypatch):
     """
     異常系：
-    - prisma_client.webhook_events.create が例外を投げたら
+    - prisma_client.webhook_events.create_many が例外を投げたら
       HTTP 500 が返る
     """
     # DB createが例外を投げるようにする
-    mock_prisma.webhook_events.create.side_effect = RuntimeError("DB failure")
+    mock_prisma.webhook_events.create_many.side_effect = RuntimeError("DB failure")
 
     payload = {
         "id": "evt_test_500",
@@ -193,11 +201,12 @@ def test_webhook_event_invalid_json_returns_500(mock_prisma):
 # ======================
 # POST /api/webhook_events/processのテストコード
 # 正常系（未処理イベントがある → paymentテーブルに書き込む)
-def test_process_webhook_events_with_unprocessed_events(mock_prisma):
+def test_process_claimed_webhook_eventss_with_unprocessed_events(mock_prisma):
     """
     正常系：
     - 未処理のcheckout.session.completedイベントがある場合
-    - payment.create、users.update、webhook_events.updateが呼ばれる
+    - ユーザーはfirebase_uid IN (...)の1クエリで取得する
+    - payment.create_many、users.update_many、webhook_events.update_manyが1回のバッチで呼ばれる
     - 200 + 件数メッセージを返す
     """
 
@@ -216,37 +225,46 @@ def test_process_webhook_events_with_unprocessed_events(mock_prisma):
 
     # 未処理イベントをモック
     mock_event = AsyncMock(
-        id="evt_123", payload=json.dumps(sample_payload), firebase_uid="user-uid"
+        id="evt_123",
+        event_type="checkout.session.completed",
+        payload=json.dumps(sample_payload),
+        firebase_uid="user-uid",
     )
 
     mock_prisma.webhook_events.find_many.return_value = [mock_event]
-    mock_prisma.users.find_unique.return_value = AsyncMock(id=1)
-    mock_prisma.payment.create.return_value = AsyncMock()
-    mock_prisma.users.update.return_value = AsyncMock()
-    mock_prisma.webhook_events.update.return_value = AsyncMock()
+    mock_prisma.users.find_many.return_value = [
+        AsyncMock(id=1, firebase_uid="user-uid")
+    ]
 
     response = client.post("/api/webhook_events/process")
 
     assert response.status_code == 200
     data = response.json()
     assert "1 件のイベントを処理してpaymentテーブルに保存しました" in data["message"]
+    assert data["processed"] == 1
+    assert data["failed"] == 0
 
     # 各呼び出しが行われたことを確認
     mock_prisma.webhook_events.find_many.assert_awaited_once()
-    mock_prisma.payment.create.assert_awaited_once()
-    mock_prisma.users.update.assert_awaited_once()
-    mock_prisma.webhook_events.update.assert_awaited()
+    mock_prisma.users.find_many.assert_awaited_once_with(
+        where={"firebase_uid": {"in": ["user-uid"]}}
+    )
+    mock_prisma.users.find_unique.assert_not_awaited()
+    mock_prisma.batch_.assert_called_once()
+    mock_prisma.batcher.payment.create_many.assert_called_once()
+    mock_prisma.batcher.users.update_many.assert_called_once()
+    mock_prisma.batcher.webhook_events.update_many.assert_called_once()
 
 
 # ======================
 #  TC-WEBHOOK-006
 # ======================
 # 正常系(未処理イベントが0件の場合)
-def test_process_webhook_events_no_unprocessed_events(mock_prisma):
+def test_process_claimed_webhook_eventss_no_unprocessed_events(mock_prisma):
     """
     正常系：
     - 未処理のイベントがない場合
-    - payment.createなどは呼ばれない
+    - payment.create_manyなどは呼ばれない
     - 200 + メッセージを返す
     """
     # 未処理イベント0件
@@ -259,8 +277,7 @@ def test_process_webhook_events_no_unprocessed_events(mock_prisma):
     assert "未処理のWebhookイベントはありません" in data["message"]
 
     # 他のDB操作は呼ばれない
-    mock_prisma.payment.create.assert_not_awaited()
-    mock_prisma.users.update.assert_not_awaited()
+    mock_prisma.batch_.assert_not_called()
     mock_prisma.webhook_events.update.assert_not_awaited()
 
 
@@ -268,7 +285,7 @@ def test_process_webhook_events_no_unprocessed_events(mock_prisma):
 #  TC-WEBHOOK-007
 # ======================
 # 異常系（prisma_client.webhook_events.find_manyが例外を投げる）
-def test_process_webhook_events_find_many_raises_500(mock_prisma):
+def test_process_claimed_webhook_eventss_find_many_raises_500(mock_prisma):
     """
     異常系：
     - find_manyが例外を投げた場合
@@ -288,11 +305,11 @@ def test_process_webhook_events_find_many_raises_500(mock_prisma):
 # ======================
 #  TC-WEBHOOK-008
 # ======================
-# 異常系（process中のpayment.createやusers.updateが例外→エラーをwebhook_events.updateに保存）
-def test_process_webhook_events_partial_processing_error_returns_500(mock_prisma):
+# 異常系（process中のpayment.create_manyやusers.update_manyが例外→エラーをwebhook_events.update_manyに保存）
+def test_process_claimed_webhook_eventss_partial_processing_error_returns_500(mock_prisma):
     """
     異常系：
-    - payment.createなど途中のDB処理で例外発生
+    - payment.create_manyなど途中のDB処理で例外発生
     - 500エラーを返す
     """
     sample_payload = {
@@ -308,12 +325,18 @@ def test_process_webhook_events_partial_processing_error_returns_500(mock_prisma
     }
 
     mock_event = AsyncMock(
-        id="evt_123", payload=json.dumps(sample_payload), firebase_uid="user-uid"
+        id="evt_123",
+        event_type="checkout.session.completed",
+        payload=json.dumps(sample_payload),
+        firebase_uid="user-uid",
     )
     mock_prisma.webhook_events.find_many.return_value = [mock_event]
 
-    mock_prisma.users.find_unique.return_value = AsyncMock(id=1)
-    mock_prisma.payment.create.side_effect = RuntimeError("Simulated Insert Failure")
+    mock_prisma.users.find_many.return_value = [
+        AsyncMock(id=1, firebase_uid="user-uid")
+    ]
+    # コミット時にINSERTが失敗する
+    mock_prisma.batcher.__aexit__.side_effect = RuntimeError("Simulated Insert Failure")
 
     response = client.post("/api/webhook_events/process")
 
@@ -323,10 +346,14 @@ def test_process_webhook_events_partial_processing_error_returns_500(mock_prisma
     assert data["detail"] == "Webhook event processing failed"
 
     mock_prisma.webhook_events.find_many.assert_awaited_once()
-    mock_prisma.payment.create.assert_awaited_once()
+    mock_prisma.batcher.payment.create_many.assert_called_once()
+    mock_prisma.webhook_events.update_many.assert_awaited_once_with(
+        where={"id": {"in": ["evt_123"]}},
+        data={"error_message": "Simulated Insert Failure"},
+    )
 
 
-# process_webhook_event関数の単体テスト
+# process_claimed_webhook_events関数の単体テスト
 # ======================
 #  TC-WEBHOOK-009
 # ======================
@@ -346,18 +373,21 @@ async def test_process_event_with_string_payload(mock_prisma):
     }
     event = AsyncMock(
         id="evt_123",
+        event_type="checkout.session.completed",
         payload=json.dumps(payload_dict),
         firebase_uid="user-uid",
     )
 
-    mock_prisma.users.find_unique.return_value = AsyncMock(id=1)
+    mock_prisma.users.find_many.return_value = [
+        AsyncMock(id=1, firebase_uid="user-uid")
+    ]
 
-    await process_webhook_event(event)
+    await process_claimed_webhook_events([event])
 
-    mock_prisma.payment.create.assert_awaited_once()
-    mock_prisma.users.update.assert_awaited_once()
-    mock_prisma.webhook_events.update.assert_awaited_with(
-        where={"id": event.id}, data={"processed": True}
+    mock_prisma.batcher.payment.create_many.assert_called_once()
+    mock_prisma.batcher.users.update_many.assert_called_once()
+    mock_prisma.batcher.webhook_events.update_many.assert_called_once_with(
+        where={"id": {"in": [event.id]}}, data={"processed": True}
     )
 
 
@@ -380,18 +410,21 @@ async def test_process_event_with_dict_payload(mock_prisma):
     }
     event = AsyncMock(
         id="evt_456",
+        event_type="checkout.session.completed",
         payload=payload_dict,
         firebase_uid="user-uid",
     )
 
-    mock_prisma.users.find_unique.return_value = AsyncMock(id=1)
+    mock_prisma.users.find_many.return_value = [
+        AsyncMock(id=1, firebase_uid="user-uid")
+    ]
 
-    await process_webhook_event(event)
+    await process_claimed_webhook_events([event])
 
-    mock_prisma.payment.create.assert_awaited_once()
-    mock_prisma.users.update.assert_awaited_once()
-    mock_prisma.webhook_events.update.assert_awaited_with(
-        where={"id": event.id}, data={"processed": True}
+    mock_prisma.batcher.payment.create_many.assert_called_once()
+    mock_prisma.batcher.users.update_many.assert_called_once()
+    mock_prisma.batcher.webhook_events.update_many.assert_called_once_with(
+        where={"id": {"in": [event.id]}}, data={"processed": True}
     )
 
 
@@ -414,17 +447,20 @@ async def test_process_event_db_error_logs_error_message(mock_prisma):
     }
     event = AsyncMock(
         id="evt_error",
+        event_type="checkout.session.completed",
         payload=json.dumps(payload_dict),
         firebase_uid="user-uid",
     )
 
-    mock_prisma.users.find_unique.return_value = AsyncMock(id=1)
-    mock_prisma.payment.create.side_effect = RuntimeError("DB Insert Failure")
+    mock_prisma.users.find_many.return_value = [
+        AsyncMock(id=1, firebase_uid="user-uid")
+    ]
+    mock_prisma.batcher.__aexit__.side_effect = RuntimeError("DB Insert Failure")
 
-    await process_webhook_event(event)
+    await process_claimed_webhook_events([event])
 
-    mock_prisma.webhook_events.update.assert_any_await(
-        where={"id": event.id}, data={"error_message": "DB Insert Failure"}
+    mock_prisma.webhook_events.update_many.assert_awaited_once_with(
+        where={"id": {"in": [event.id]}}, data={"error_message": "DB Insert Failure"}
     )
 
 
@@ -438,14 +474,14 @@ async def test_process_event_missing_stripe_session_id_skips(mock_prisma):
     payload_dict = {"data": {"object": {}}}
     event = AsyncMock(
         id="evt_no_session",
+        event_type="checkout.session.completed",
         payload=json.dumps(payload_dict),
         firebase_uid="user-uid",
     )
 
-    await process_webhook_event(event)
+    await process_claimed_webhook_events([event])
 
-    mock_prisma.payment.create.assert_not_awaited()
-    mock_prisma.users.update.assert_not_awaited()
+    mock_prisma.batch_.assert_not_called()
 
 
 # ======================
@@ -457,32 +493,288 @@ async def test_process_event_missing_firebase_uid_skips(mock_prisma):
     payload_dict = {"data": {"object": {"id": "cs_test"}}}
     event = AsyncMock(
         id="evt_no_uid",
+        event_type="checkout.session.completed",
         payload=json.dumps(payload_dict),
         firebase_uid=None,
     )
 
-    await process_webhook_event(event)
+    await process_claimed_webhook_events([event])
 
-    mock_prisma.payment.create.assert_not_awaited()
-    mock_prisma.users.update.assert_not_awaited()
+    mock_prisma.batch_.assert_not_called()
 
 
 # ======================
 #  TC-WEBHOOK-014
 # ======================
-# ③users.find_uniqueがNone
+# ③firebase_uidに対応するユーザーがいない
 @pytest.mark.asyncio
 async def test_process_event_user_not_found_skips(mock_prisma):
     payload_dict = {"data": {"object": {"id": "cs_test"}}}
     event = AsyncMock(
         id="evt_user_not_found",
+        event_type="checkout.session.completed",
         payload=json.dumps(payload_dict),
         firebase_uid="user-uid",
     )
 
-    mock_prisma.users.find_unique.return_value = None
+    mock_prisma.users.find_many.return_value = []
+
+    await process_claimed_webhook_events([event])
 
-    await process_webhook_event(event)
+    mock_prisma.batch_.assert_not_called()
 
-    mock_prisma.payment.create.assert_not_awaited()
+
+# ======================
+#  TC-WEBHOOK-015
+# ======================
+# 正常系（プラン更新後に identity キャッシュを破棄）
+@pytest.mark.asyncio
+async def test_process_event_invalidates_identity_cache(mock_prisma, monkeypatch):
+    payload_dict = {"data": {"object": {"id": "cs_test"}}}
+    event = AsyncMock(
+        id="evt_invalidate",
+        event_type="checkout.session.completed",
+        payload=json.dumps(payload_dict),
+        firebase_uid="user-uid",
+    )
+    mock_prisma.users.find_many.return_value = [
+        AsyncMock(id=1, firebase_uid="user-uid")
+    ]
+
+    invalidate_mock = AsyncMock()
+    monkeypatch.setattr(
+        "app.routers.webhook_events.invalidate_identity", invalidate_mock
+    )
+
+    await process_claimed_webhook_events([event])
+
+    invalidate_mock.assert_awaited_once_with("user-uid")
+
+
+# ======================
+#  TC-WEBHOOK-016
+# ======================
+# 正常系（再送された受信済みのイベントは例外にせず200を返す）
+def test_webhook_event_duplicate_is_ignored(mock_prisma, monkeypatch):
+    """
+    正常系：
+    - 同じidのイベントが再送された場合（create_manyが0件）
+    - 500にせず200を返し、ワーカーにも通知しない
+    """
+    mock_prisma.webhook_events.create_many.return_value = 0
+    notify_mock = MagicMock()
+    monkeypatch.setattr(
+        "app.routers.webhook_events.webhook_worker.notify", notify_mock
+    )
+
+    payload = {
+        "id": "evt_test_123",
+        "type": "checkout.session.completed",
+        "data": {
+            "object": {
+                "id": "cs_test_abc",
+                "metadata": {"firebase_uid": "test-uid"},
+            }
+        },
+    }
+
+    response = client.post(
+        "/api/webhook_events/",
+        data=json.dumps(payload),
+        headers={"Content-Type": "application/json"},
+    )
+
+    assert response.status_code == 200
+    assert "Webhook eventは受信済みです" in response.text
+    assert mock_prisma.webhook_events.create_many.await_args.kwargs[
+        "skip_duplicates"
+    ]
+    notify_mock.assert_not_called()
+
+
+# ======================
+#  TC-WEBHOOK-017
+# ======================
+# 正常系（支払いの登録・プラン更新・処理済みへの更新を1回のバッチでコミットする）
+@pytest.mark.asyncio
+async def test_process_event_applies_in_single_batch(mock_prisma):
+    payload_dict = {"data": {"object": {"id": "cs_test"}}}
+    event = AsyncMock(
+        id="evt_applied",
+        event_type="checkout.session.completed",
+        payload=json.dumps(payload_dict),
+        firebase_uid="user-uid",
+    )
+    mock_prisma.users.find_many.return_value = [
+        AsyncMock(id=1, firebase_uid="user-uid")
+    ]
+
+    await process_claimed_webhook_events([event])
+
+    mock_prisma.batch_.assert_called_once()
+    batcher = mock_prisma.batcher
+    # 適用済みのセッションは ON CONFLICT DO NOTHING で何もしない
+    assert batcher.payment.create_many.call_args.kwargs["skip_duplicates"]
+    batcher.users.update_many.assert_called_once_with(
+        where={"id": {"in": [1]}}, data={"current_plan": "premium"}
+    )
+    batcher.webhook_events.update_many.assert_called_once_with(
+        where={"id": {"in": [event.id]}}, data={"processed": True}
+    )
+    # バッチの外では書き込まない
+    mock_prisma.payment.create_many.assert_not_awaited()
     mock_prisma.users.update.assert_not_awaited()
+    mock_prisma.webhook_events.update.assert_not_awaited()
+
+
+# ======================
+#  TC-WEBHOOK-018
+# ======================
+# 異常系（コミットに失敗した場合はキャッシュを破棄しない）
+@pytest.mark.asyncio
+async def test_process_event_commit_failure_keeps_cache(mock_prisma, monkeypatch):
+    payload_dict = {"data": {"object": {"id": "cs_test"}}}
+    event = AsyncMock(
+        id="evt_rollback",
+        event_type="checkout.session.completed",
+        payload=json.dumps(payload_dict),
+        firebase_uid="user-uid",
+    )
+    mock_prisma.users.find_many.return_value = [
+        AsyncMock(id=1, firebase_uid="user-uid")
+    ]
+    mock_prisma.batcher.__aexit__.side_effect = RuntimeError("Commit Failure")
+    invalidate_mock = AsyncMock()
+    monkeypatch.setattr(
+        "app.routers.webhook_events.invalidate_identity", invalidate_mock
+    )
+
+    await process_claimed_webhook_events([event])
+
+    invalidate_mock.assert_not_awaited()
+    mock_prisma.webhook_events.update_many.assert_awaited_once_with(
+        where={"id": {"in": [event.id]}}, data={"error_message": "Commit Failure"}
+    )
+
+
+def _checkout_event(event_id, firebase_uid):
+    payload = {"data": {"object": {"id": f"cs_{event_id}"}}}
+    return AsyncMock(
+        id=event_id,
+        event_type="checkout.session.completed",
+        payload=json.dumps(payload),
+        firebase_uid=firebase_uid,
+    )
+
+
+# ======================
+#  TC-WEBHOOK-018-2
+# ======================
+# 正常系（ワーカーが取得したバッチは、ユーザーの取得もトランザクションも1回にまとめる）
+@pytest.mark.asyncio
+async def test_process_claimed_events_applies_batch_once(mock_prisma):
+    events = [
+        _checkout_event("evt_1", "uid-a"),
+        _checkout_event("evt_2", "uid-b"),
+    ]
+    mock_prisma.users.find_many.return_value = [
+        AsyncMock(id=1, firebase_uid="uid-a"),
+        AsyncMock(id=2, firebase_uid="uid-b"),
+    ]
+
+    await process_claimed_webhook_events(events)
+
+    mock_prisma.users.find_many.assert_awaited_once()
+    mock_prisma.batch_.assert_called_once()
+    mock_prisma.batcher.webhook_events.update_many.assert_called_once_with(
+        where={"id": {"in": ["evt_1", "evt_2"]}}, data={"processed": True}
+    )
+
+
+# ======================
+#  TC-WEBHOOK-019
+# ======================
+# 正常系（ユーザーをまとめて取得し、チャンクごとに1トランザクションで適用する）
+def test_process_claimed_webhook_eventss_applies_in_chunks(mock_prisma, monkeypatch):
+    monkeypatch.setattr("app.routers.webhook_events.WEBHOOK_PROCESS_CHUNK_SIZE", 2)
+    mock_prisma.webhook_events.find_many.return_value = [
+        _checkout_event("evt_1", "uid-a"),
+        _checkout_event("evt_2", "uid-b"),
+        _checkout_event("evt_3", "uid-a"),
+        _checkout_event("evt_4", "uid-unknown"),
+    ]
+    mock_prisma.users.find_many.return_value = [
+        AsyncMock(id=1, firebase_uid="uid-a"),
+        AsyncMock(id=2, firebase_uid="uid-b"),
+    ]
+
+    response = client.post("/api/webhook_events/process")
+
+    assert response.status_code == 200
+    data = response.json()
+    assert data["processed"] == 3
+    # ユーザーが見つからないイベントはスキップ
+    assert data["skipped"] == 1
+    # ユーザーはイベントごとではなく1回で取得する
+    mock_prisma.users.find_many.assert_awaited_once()
+    assert sorted(
+        mock_prisma.users.find_many.call_args.kwargs["where"]["firebase_uid"]["in"]
+    ) == ["uid-a", "uid-b", "uid-unknown"]
+    mock_prisma.users.find_unique.assert_not_awaited()
+    # 3件を2件ずつのチャンクに分けて適用する
+    assert mock_prisma.batch_.call_count == 2
+
+
+# ======================
+#  TC-WEBHOOK-020
+# ======================
+# 正常系（stream=trueの場合はチャンクごとの進捗をNDJSONで返す）
+def test_process_claimed_webhook_eventss_streams_progress(mock_prisma, monkeypatch):
+    monkeypatch.setattr("app.routers.webhook_events.WEBHOOK_PROCESS_CHUNK_SIZE", 1)
+    mock_prisma.webhook_events.find_many.return_value = [
+        _checkout_event("evt_1", "uid-a"),
+        _checkout_event("evt_2", "uid-a"),
+    ]
+    mock_prisma.users.find_many.return_value = [AsyncMock(id=1, firebase_uid="uid-a")]
+
+    response = client.post("/api/webhook_events/process?stream=true")
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    lines = [json.loads(line) for line in response.text.splitlines()]
+    assert [line["processed"] for line in lines] == [1, 2]
+    assert lines[-1] == {"total": 2, "processed": 2, "failed": 0, "skipped": 0}
+
+
+# ======================
+#  TC-WEBHOOK-021
+# ======================
+# 正常系（登録した処理がワーカーと/processの両方から呼ばれる）
+def test_registered_handler_is_used_by_both_paths(mock_prisma, monkeypatch):
+    monkeypatch.setattr(webhook_handlers, "_handlers", dict(webhook_handlers._handlers))
+    refunded = []
+
+    @webhook_handlers.register_webhook_handler(
+        "charge.refunded", fields=("id", "amount_refunded"), required=("id",)
+    )
+    async def apply_refunds(items):
+        refunded.extend(fields for _, fields in items)
+
+    payload = {"data": {"object": {"id": "ch_test", "amount_refunded": 300}}}
+    refund_event = AsyncMock(
+        id="evt_refund", event_type="charge.refunded", payload=json.dumps(payload)
+    )
+
+    # ワーカーから取得したバッチごとに呼ばれる場合
+    asyncio.run(process_claimed_webhook_events([refund_event]))
+    # /processからまとめて呼ばれる場合
+    mock_prisma.webhook_events.find_many.return_value = [refund_event]
+    response = client.post("/api/webhook_events/process")
+
+    assert response.status_code == 200
+    assert response.json()["processed"] == 1
+    assert refunded == [{"id": "ch_test", "amount_refunded": 300}] * 2
+    # 登録済みの種類だけを取得する
+    where = mock_prisma.webhook_events.find_many.await_args.kwargs["where"]
+    assert "charge.refunded" in where["event_type"]["in"]
+    mock_prisma.batch_.assert_not_called()
@@ -0,0 +1,177 @@
+# pylint: disable=redefined-outer-name
+
+import asyncio
+import datetime
+import time
+
+import httpx
+import pytest
+from cryptography import x509
+from cryptography.hazmat.primitives import hashes, serialization
+from cryptography.hazmat.primitives.asymmetric import rsa
+from cryptography.x509.oid import NameOID
+from google.auth import crypt
+from google.auth import jwt as google_jwt
+
+from app.services.firebase_auth import AsyncFirebaseTokenVerifier
+
+PROJECT_ID = "test-project"
+
+
+def make_key_and_cert():
+    """テスト用のRSA鍵と自己署名証明書（PEM）を作る"""
+    key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+    name = x509.Name([x509.NameAttribute(NameOID.COMMON_NAME, "test")])
+    now = datetime.datetime.now(datetime.timezone.utc)
+    cert = (
+        x509.CertificateBuilder()
+        .subject_name(name)
+        .issuer_name(name)
+        .public_key(key.public_key())
+        .serial_number(x509.random_serial_number())
+        .not_valid_before(now - datetime.timedelta(days=1))
+        .not_valid_after(now + datetime.timedelta(days=1))
+        .sign(key, hashes.SHA256())
+    )
+    key_pem = key.private_bytes(
+        serialization.Encoding.PEM,
+        serialization.PrivateFormat.PKCS8,
+        serialization.NoEncryption(),
+    )
+    cert_pem = cert.public_bytes(serialization.Encoding.PEM).decode()
+    return key_pem, cert_pem
+
+
+@pytest.fixture(scope="module")
+def key_and_cert():
+    return make_key_and_cert()
+
+
+def make_token(key_pem, kid="kid-1", **overrides):
+    """Firebase IDトークンと同じ形式のJWTを作る"""
+    now = int(time.time())
+    payload = {
+        "iss": f"https://securetoken.google.com/{PROJECT_ID}",
+        "aud": PROJECT_ID,
+        "sub": "firebase-uid-1",
+        "iat": now,
+        "exp": now + 3600,
+    }
+    payload.update(overrides)
+    signer = crypt.RSASigner.from_string(key_pem, key_id=kid)
+    return google_jwt.encode(signer, payload).decode()
+
+
+def make_verifier(certs, calls):
+    """証明書エンドポイントをモックした検証器を作る"""
+
+    def handler(request):
+        calls.append(request.url)
+        return httpx.Response(
+            200, json=certs, headers={"Cache-Control": "public, max-age=600"}
+        )
+
+    client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    return AsyncFirebaseTokenVerifier(project_id=PROJECT_ID, http_client=client)
+
+
+# ======================
+#  TC-AUTH-001
+# ======================
+# 正常系（署名・クレームが正しいトークン）
+@pytest.mark.asyncio
+async def test_verify_valid_token(key_and_cert):
+    key_pem, cert_pem = key_and_cert
+    calls = []
+    verifier = make_verifier({"kid-1": cert_pem}, calls)
+
+    claims = await verifier.verify(make_token(key_pem))
+    # 2回目は鍵を再取得しない
+    await verifier.verify(make_token(key_pem))
+
+    assert claims["uid"] == "firebase-uid-1"
+    assert len(calls) == 1
+
+
+# ======================
+#  TC-AUTH-002
+# ======================
+# 異常系（audience が別プロジェクト）
+@pytest.mark.asyncio
+async def test_verify_rejects_wrong_audience(key_and_cert):
+    key_pem, cert_pem = key_and_cert
+    verifier = make_verifier({"kid-1": cert_pem}, [])
+
+    with pytest.raises(ValueError):
+        await verifier.verify(make_token(key_pem, aud="other-project"))
+
+
+# ======================
+#  TC-AUTH-003
+# ======================
+# 異常系（issuer が不正）
+@pytest.mark.asyncio
+async def test_verify_rejects_wrong_issuer(key_and_cert):
+    key_pem, cert_pem = key_and_cert
+    verifier = make_verifier({"kid-1": cert_pem}, [])
+
+    with pytest.raises(ValueError):
+        await verifier.verify(make_token(key_pem, iss="https://example.com"))
+
+
+# ======================
+#  TC-AUTH-004
+# ======================
+# 異常系（未知の kid → 鍵を1回だけ取り直しても見つからない）
+@pytest.mark.asyncio
+async def test_verify_unknown_kid_refetches_once(key_and_cert):
+    key_pem, cert_pem = key_and_cert
+    calls = []
+    verifier = make_verifier({"kid-1": cert_pem}, calls)
+
+    with pytest.raises(ValueError):
+        await verifier.verify(make_token(key_pem, kid="kid-rotated"))
+
+    assert len(calls) == 2
+
+
+# ======================
+#  TC-AUTH-005
+# ======================
+# 正常系（start/stop でバックグラウンド更新タスクを管理）
+@pytest.mark.asyncio
+async def test_start_prefetches_keys_and_stop_cancels_task(key_and_cert):
+    _, cert_pem = key_and_cert
+    calls = []
+    verifier = make_verifier({"kid-1": cert_pem}, calls)
+
+    await verifier.start()
+    assert len(calls) == 1
+    assert verifier._refresh_task is not None  # pylint: disable=protected-access
+
+    await verifier.stop()
+    assert verifier._refresh_task is None  # pylint: disable=protected-access
+
+
+# ======================
+#  TC-AUTH-006
+# ======================
+# 異常系（未知の kid が続いても、間隔内は鍵を取り直さずに拒否する）
+@pytest.mark.asyncio
+async def test_verify_unknown_kid_refetch_is_rate_limited(key_and_cert):
+    key_pem, cert_pem = key_and_cert
+    calls = []
+    verifier = make_verifier({"kid-1": cert_pem}, calls)
+    forged = make_token(key_pem, kid="kid-forged")
+
+    results = await asyncio.gather(
+        *(verifier.verify(forged) for _ in range(5)), return_exceptions=True
+    )
+    with pytest.raises(ValueError):
+        await verifier.verify(forged)
+
+    assert all(isinstance(result, ValueError) for result in results)
+    # 初回の取得 + 未知の kid による取り直し1回だけ
+    assert len(calls) == 2
+    # 正しいトークンはそのまま検証できる
+    assert (await verifier.verify(make_token(key_pem)))["uid"] == "firebase-uid-1"
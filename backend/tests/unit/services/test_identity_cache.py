@@ -0,0 +1,154 @@
+# pylint: disable=redefined-outer-name
+
+import json
+
+import pytest
+from unittest.mock import AsyncMock
+from redis.exceptions import ConnectionError as RedisConnectionError
+
+from app.redis_client import set_redis_client
+from app.services import identity_cache
+
+
+@pytest.fixture
+def mock_redis(monkeypatch):
+    """
+    共有Redisクライアントをモックに差し替える
+    """
+    mock_client = AsyncMock()
+    mock_client.mget.return_value = [None, None]
+    monkeypatch.setattr(identity_cache, "ENABLE_CACHE", True)
+    set_redis_client(mock_client)
+    yield mock_client
+    set_redis_client(None)
+
+
+# ======================
+#  TC-IDCACHE-001
+# ======================
+# 正常系（キャッシュヒット → バージョン番号と合わせて MGET 1回で解決）
+@pytest.mark.asyncio
+async def test_get_cached_identity_hit(mock_redis):
+    value = {
+        "user_id": "1",
+        "current_plan": "premium",
+        "care_setting_id": 10,
+        "care_setting_ids": [10],
+        "version": "3",
+    }
+    mock_redis.mget.return_value = [json.dumps(value), "3"]
+
+    cached, version = await identity_cache.get_cached_identity("test-uid")
+
+    assert cached == value
+    assert version == "3"
+    mock_redis.mget.assert_awaited_once_with(
+        ["identity:test-uid", "route_cache:version:user:test-uid"]
+    )
+
+
+# ======================
+#  TC-IDCACHE-002
+# ======================
+# 正常系（set は TTL 付きで保存）
+@pytest.mark.asyncio
+async def test_set_cached_identity_uses_ttl(mock_redis):
+    await identity_cache.set_cached_identity("test-uid", "0", "1", "free", None, [])
+
+    args, kwargs = mock_redis.set.await_args
+    assert args[0] == "identity:test-uid"
+    assert json.loads(args[1])["current_plan"] == "free"
+    assert json.loads(args[1])["version"] == "0"
+    assert kwargs["ex"] == identity_cache.IDENTITY_CACHE_TTL
+
+
+# ======================
+#  TC-IDCACHE-003
+# ======================
+# 正常系（書き込み後の無効化）
+@pytest.mark.asyncio
+async def test_invalidate_identity_deletes_key(mock_redis):
+    await identity_cache.invalidate_identity("test-uid")
+
+    mock_redis.delete.assert_awaited_once_with("identity:test-uid")
+
+
+# ======================
+#  TC-IDCACHE-004
+# ======================
+# 異常系（Redis障害時はNoneを返してDBにフォールバック）
+@pytest.mark.asyncio
+async def test_get_cached_identity_redis_error_returns_none(mock_redis):
+    mock_redis.mget.side_effect = RedisConnectionError("down")
+
+    assert await identity_cache.get_cached_identity("test-uid") == (None, None)
+    # バージョン番号が取れない場合は保存しない
+    await identity_cache.set_cached_identity("test-uid", None, "1", "free", None, [])
+    mock_redis.set.assert_not_awaited()
+
+
+# ======================
+#  TC-IDCACHE-005
+# ======================
+# 正常系（Redis未初期化なら何もしない）
+@pytest.mark.asyncio
+async def test_identity_cache_noop_without_client():
+    set_redis_client(None)
+
+    assert await identity_cache.get_cached_identity("test-uid") == (None, None)
+    await identity_cache.invalidate_identity("test-uid")
+
+
+# ======================
+#  TC-IDCACHE-006
+# ======================
+# 正常系（無効化の後に古いプランがSETされても、バージョンが古いため使われない）
+@pytest.mark.asyncio
+async def test_get_cached_identity_ignores_stale_version(mock_redis):
+    # DBを読む前のバージョン "1" で、アップグレード前のプランが保存された
+    stale = {
+        "user_id": "1",
+        "current_plan": "free",
+        "care_setting_id": 10,
+        "care_setting_ids": [10],
+        "version": "1",
+    }
+    # その間に webhook が bump_versions() でバージョンを "2" に進めた
+    mock_redis.mget.return_value = [json.dumps(stale), "2"]
+
+    cached, version = await identity_cache.get_cached_identity("test-uid")
+
+    assert cached is None
+    assert version == "2"
+
+
+# ======================
+#  TC-IDCACHE-007
+# ======================
+# 正常系（care_setting_ids を持たない古い形式の値はミスとして扱う）
+@pytest.mark.asyncio
+async def test_get_cached_identity_ignores_value_without_care_setting_ids(mock_redis):
+    old = {
+        "user_id": "1",
+        "current_plan": "free",
+        "care_setting_id": 10,
+        "version": "0",
+    }
+    mock_redis.mget.return_value = [json.dumps(old), None]
+
+    cached, version = await identity_cache.get_cached_identity("test-uid")
+
+    assert cached is None
+    assert version == "0"
+
+
+# ======================
+#  TC-IDCACHE-008
+# ======================
+# 異常系（バージョン更新を再送待ちの間は、キャッシュを読まず保存もしない）
+@pytest.mark.asyncio
+async def test_get_cached_identity_skips_pending_invalidation(mock_redis, monkeypatch):
+    monkeypatch.setattr(identity_cache, "has_pending_invalidation", lambda names: True)
+
+    assert await identity_cache.get_cached_identity("test-uid") == (None, None)
+    mock_redis.mget.assert_not_awaited()
@@ -0,0 +1,83 @@
+from app.services.local_route_cache import LocalRouteCache
+
+
+class FakeClock:
+    """テスト用に時刻を進められる時計"""
+
+    def __init__(self, now=1000.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+# ======================
+#  TC-L1CACHE-001
+# ======================
+# 正常系（TTL 内はヒット、過ぎたらミス）
+def test_local_cache_hit_until_ttl():
+    clock = FakeClock()
+    cache = LocalRouteCache(ttl=5, clock=clock)
+    cache.set("key-a", {"done": True}, ["care_setting:10"])
+
+    clock.now = 1004.9
+    assert cache.get("key-a") == {"done": True}
+    clock.now = 1005
+    assert cache.get("key-a") is None
+    assert len(cache) == 0
+
+
+# ======================
+#  TC-L1CACHE-002
+# ======================
+# 正常系（上限を超えたら最も古く参照されたものから追い出す）
+def test_local_cache_evicts_least_recently_used():
+    cache = LocalRouteCache(max_size=2, clock=FakeClock())
+    cache.set("key-a", 1, [])
+    cache.set("key-b", 2, [])
+    cache.get("key-a")
+    cache.set("key-c", 3, [])
+
+    assert cache.get("key-a") == 1
+    assert cache.get("key-b") is None
+    assert cache.get("key-c") == 3
+
+
+# ======================
+#  TC-L1CACHE-003
+# ======================
+# 正常系（タグ単位で破棄）
+def test_local_cache_evict_tags():
+    cache = LocalRouteCache(clock=FakeClock())
+    cache.set("key-a", 1, ["user:uid-a", "care_setting:10"])
+    cache.set("key-b", 2, ["user:uid-b"])
+
+    cache.evict_tags(["care_setting:10"])
+
+    assert cache.get("key-a") is None
+    assert cache.get("key-b") == 2
+
+
+# ======================
+#  TC-L1CACHE-004
+# ======================
+# 正常系（読み込み中に無効化された値は登録しない）
+def test_local_cache_skips_stale_generation():
+    cache = LocalRouteCache(clock=FakeClock())
+    generation = cache.generation
+
+    cache.evict_tags(["care_setting:10"])
+    cache.set("key-a", 1, ["care_setting:10"], generation)
+
+    assert cache.get("key-a") is None
+
+
+# ======================
+#  TC-L1CACHE-005
+# ======================
+# 正常系（TTL 0 なら L1 を使わない）
+def test_local_cache_disabled_with_zero_ttl():
+    cache = LocalRouteCache(ttl=0, clock=FakeClock())
+    cache.set("key-a", 1, [])
+
+    assert cache.get("key-a") is None
@@ -0,0 +1,115 @@
+# pylint: disable=redefined-outer-name
+
+import pytest
+from unittest.mock import AsyncMock, MagicMock
+from redis.exceptions import ConnectionError as RedisConnectionError
+
+from app.redis_client import set_redis_client
+from app.services import message_pool as message_pool_module
+from app.services.message_pool import MessagePool, pool_key
+
+
+@pytest.fixture
+def mock_redis():
+    """
+    共有Redisクライアントをモックに差し替える
+    """
+    mock_client = AsyncMock()
+    mock_client.pipeline = MagicMock(return_value=MagicMock(execute=AsyncMock()))
+    mock_client.lock = MagicMock(
+        return_value=MagicMock(
+            acquire=AsyncMock(return_value=True), release=AsyncMock()
+        )
+    )
+    set_redis_client(mock_client)
+    yield mock_client
+    set_redis_client(None)
+
+
+def make_pool(categories=(1,), generate=None):
+    """補充タスクを起動せずに設定だけ済ませたプール"""
+    pool = MessagePool()
+    pool.categories = list(categories)
+    pool._generate = generate  # pylint: disable=protected-access
+    return pool
+
+
+# ======================
+#  TC-MPOOL-001
+# ======================
+# 正常系（生成済みのメッセージを1件取り出す）
+@pytest.mark.asyncio
+async def test_pop_returns_pooled_message(mock_redis):
+    pipe = mock_redis.pipeline.return_value
+    pipe.execute.return_value = ["おすわりするわん！", 20]
+    pool = make_pool()
+
+    assert await pool.pop() == "おすわりするわん！"
+    pipe.lpop.assert_called_once_with(pool_key(1))
+    assert not pool._wake.is_set()  # pylint: disable=protected-access
+
+
+# ======================
+#  TC-MPOOL-002
+# ======================
+# 正常系（空なら None を返し、補充を起こす）
+@pytest.mark.asyncio
+async def test_pop_empty_wakes_refill(mock_redis):
+    mock_redis.pipeline.return_value.execute.return_value = [None, 0]
+    pool = make_pool(categories=(1, 2))
+
+    assert await pool.pop() is None
+    assert pool._wake.is_set()  # pylint: disable=protected-access
+    # すべてのカテゴリを確認してから諦める
+    assert mock_redis.pipeline.call_count == 2
+
+
+# ======================
+#  TC-MPOOL-003
+# ======================
+# 異常系（Redis 未接続・障害時は None）
+@pytest.mark.asyncio
+async def test_pop_without_redis(mock_redis):
+    mock_redis.pipeline.return_value.execute.side_effect = RedisConnectionError("down")
+    assert await make_pool().pop() is None
+
+    set_redis_client(None)
+    assert await make_pool().pop() is None
+
+
+# ======================
+#  TC-MPOOL-004
+# ======================
+# 正常系（下限を下回ったカテゴリだけ目標件数まで補充し、失敗した分は積まない）
+@pytest.mark.asyncio
+async def test_refill_tops_up_low_categories(mock_redis, monkeypatch):
+    monkeypatch.setattr(message_pool_module, "MESSAGE_POOL_LOW_WATER", 3)
+    monkeypatch.setattr(message_pool_module, "MESSAGE_POOL_TARGET", 5)
+    mock_redis.llen.side_effect = lambda key: {pool_key(1): 1, pool_key(2): 4}[key]
+    results = iter(["いち", RuntimeError("rate limit"), "さん", "よん"])
+
+    async def generate(category):
+        result = next(results)
+        if isinstance(result, Exception):
+            raise result
+        return f"{category}:{result}"
+
+    await make_pool(categories=(1, 2), generate=generate).refill()
+
+    mock_redis.rpush.assert_awaited_once_with(pool_key(1), "1:いち", "1:さん", "1:よん")
+    mock_redis.lock.return_value.release.assert_awaited_once()
+
+
+# ======================
+#  TC-MPOOL-005
+# ======================
+# 正常系（他のワーカーが補充中なら何もしない）
+@pytest.mark.asyncio
+async def test_refill_skips_when_locked(mock_redis):
+    mock_redis.lock.return_value.acquire.return_value = False
+    generate = AsyncMock(return_value="わん")
+
+    await make_pool(generate=generate).refill()
+
+    generate.assert_not_awaited()
+    mock_redis.rpush.assert_not_awaited()
@@ -0,0 +1,707 @@
+# pylint: disable=redefined-outer-name
+
+import asyncio
+import inspect
+import json
+import time
+from datetime import date
+from types import SimpleNamespace
+
+import pytest
+from fastapi import Response
+from prometheus_client import REGISTRY
+from unittest.mock import AsyncMock, MagicMock
+from redis.exceptions import ConnectionError as RedisConnectionError
+
+from app.redis_client import set_redis_client
+from app.services import route_cache
+from app.services.local_route_cache import LocalRouteCache
+from app.services.route_cache import (
+    InvalidationListener,
+    cached_route,
+    care_setting_tag,
+    etag_of,
+    invalidate_tags,
+    route_cache_key,
+    user_tag,
+)
+
+
+def make_identity(firebase_uid="test-uid", care_setting_id=10):
+    """get_request_identity が返す RequestIdentity と同じ属性を持つダミー"""
+    return SimpleNamespace(firebase_uid=firebase_uid, care_setting_id=care_setting_id)
+
+
+@pytest.fixture
+def mock_redis(monkeypatch):
+    """
+    共有Redisクライアントをモックに差し替える（pipeline は送信内容を記録する）
+    - タグの世代番号は未設定（"0"）
+    """
+    mock_client = AsyncMock()
+    mock_client.get.return_value = None
+    mock_client.mget.return_value = [None]
+    mock_client.pipeline = MagicMock(
+        return_value=MagicMock(
+            execute=AsyncMock(),
+            watch=AsyncMock(),
+            mget=AsyncMock(return_value=[None]),
+            reset=AsyncMock(),
+        )
+    )
+    mock_client.lock = MagicMock(
+        return_value=MagicMock(
+            acquire=AsyncMock(return_value=True), release=AsyncMock()
+        )
+    )
+    monkeypatch.setattr(route_cache, "ENABLE_CACHE", True)
+    set_redis_client(mock_client)
+    yield mock_client
+    set_redis_client(None)
+
+
+def make_entry(value, expires_in=60, load_time=0.01):
+    """Redis に保存されるエントリの形式"""
+    return json.dumps(
+        {
+            "v": value,
+            "h": etag_of(value),
+            "d": load_time,
+            "e": time.time() + expires_in,
+        }
+    )
+
+
+def make_route(loader):
+    """テスト用のキャッシュ付きルーター関数"""
+
+    @cached_route(
+        "test_route",
+        expire=60,
+        tags=lambda identity, **_: [care_setting_tag(identity.care_setting_id)],
+    )
+    async def route(target_date: date, identity=None):
+        return await loader(target_date)
+
+    return route
+
+
+# ======================
+#  TC-RCACHE-001
+# ======================
+# 正常系（キャッシュミス → ルーターを実行し、タグ付きで保存）
+@pytest.mark.asyncio
+async def test_cached_route_miss_stores_with_tags(mock_redis):
+    loader = AsyncMock(return_value={"date": date(2026, 10, 18), "done": True})
+    route = make_route(loader)
+
+    result = await route(target_date=date(2026, 10, 18), identity=make_identity())
+
+    assert result == {"date": date(2026, 10, 18), "done": True}
+    loader.assert_awaited_once()
+
+    pipe = mock_redis.pipeline.return_value
+    key, value = pipe.set.call_args.args
+    assert key.startswith("route_cache:test_route:test-uid:")
+    assert json.loads(value)["v"] == {"date": "2026-10-18", "done": True}
+    assert pipe.set.call_args.kwargs["ex"] == 60
+    pipe.sadd.assert_called_once_with("route_cache:tag:care_setting:10", key)
+    # 世代番号を WATCH し、読み込み前と変わっていないことを確認してから保存する
+    pipe.watch.assert_awaited_once_with("route_cache:version:care_setting:10")
+    pipe.execute.assert_awaited_once()
+
+
+# ======================
+#  TC-RCACHE-002
+# ======================
+# 正常系（キャッシュヒット → ルーターを実行しない）
+@pytest.mark.asyncio
+async def test_cached_route_hit_skips_loader(mock_redis):
+    mock_redis.get.return_value = make_entry({"done": True})
+    loader = AsyncMock()
+    route = make_route(loader)
+
+    result = await route(target_date=date(2026, 10, 18), identity=make_identity())
+
+    assert result == {"done": True}
+    loader.assert_not_awaited()
+    mock_redis.pipeline.assert_not_called()
+
+
+# ======================
+#  TC-RCACHE-003
+# ======================
+# 正常系（キーはユーザーとルートパラメータごとに分かれる）
+def test_route_cache_key_varies_by_user_and_params():
+    identity = make_identity()
+    base = route_cache_key(
+        "test_route", "uid-a", {"target_date": date(2026, 10, 18), "identity": identity}
+    )
+
+    assert base == route_cache_key(
+        "test_route", "uid-a", {"target_date": date(2026, 10, 18)}
+    )
+    assert base != route_cache_key(
+        "test_route", "uid-b", {"target_date": date(2026, 10, 18)}
+    )
+    assert base != route_cache_key(
+        "test_route", "uid-a", {"target_date": date(2026, 10, 19)}
+    )
+
+
+# ======================
+#  TC-RCACHE-004
+# ======================
+# 正常系（ユーザー未登録・例外はキャッシュしない）
+@pytest.mark.asyncio
+async def test_cached_route_skips_unresolved_user_and_errors(mock_redis):
+    loader = AsyncMock(return_value={"done": False})
+    route = make_route(loader)
+
+    await route(target_date=date(2026, 10, 18), identity=None)
+    mock_redis.get.assert_not_awaited()
+
+    loader.side_effect = RuntimeError("DB down")
+    with pytest.raises(RuntimeError):
+        await route(target_date=date(2026, 10, 18), identity=make_identity())
+    mock_redis.pipeline.assert_not_called()
+
+
+# ======================
+#  TC-RCACHE-005
+# ======================
+# 正常系（タグに属するキーとタグ集合をまとめて削除）
+@pytest.mark.asyncio
+async def test_invalidate_tags_deletes_members(mock_redis):
+    mock_redis.smembers.return_value = {"route_cache:a", "route_cache:b"}
+
+    await invalidate_tags(user_tag("test-uid"))
+
+    # 削除の前にタグの世代番号を進める
+    pipe = mock_redis.pipeline.return_value
+    pipe.incr.assert_called_once_with("route_cache:version:user:test-uid")
+    mock_redis.smembers.assert_awaited_once_with("route_cache:tag:user:test-uid")
+    args = mock_redis.delete.await_args.args
+    assert set(args) == {
+        "route_cache:a",
+        "route_cache:b",
+        "route_cache:tag:user:test-uid",
+    }
+
+
+# ======================
+#  TC-RCACHE-005-2
+# ======================
+# 正常系（読み込み中に無効化された場合 → 結果は返すが、古い値は保存しない）
+@pytest.mark.asyncio
+async def test_cached_route_skips_store_when_invalidated_during_load(mock_redis):
+    pipe = mock_redis.pipeline.return_value
+
+    async def load_then_invalidate(_):
+        # DB を読んだ後、保存する前に書き込み側が invalidate_tags() した
+        pipe.mget.return_value = ["1"]
+        return {"done": False}
+
+    route = make_route(AsyncMock(side_effect=load_then_invalidate))
+
+    result = await route(target_date=date(2026, 10, 18), identity=make_identity())
+
+    assert result == {"done": False}
+    mock_redis.mget.assert_awaited_once_with(["route_cache:version:care_setting:10"])
+    pipe.set.assert_not_called()
+    pipe.execute.assert_not_awaited()
+    pipe.reset.assert_awaited_once()
+
+
+# ======================
+#  TC-RCACHE-006
+# ======================
+# 異常系（Redis障害時はルーターをそのまま実行する）
+@pytest.mark.asyncio
+async def test_cached_route_redis_error_falls_back(mock_redis):
+    mock_redis.get.side_effect = RedisConnectionError("down")
+    loader = AsyncMock(return_value={"done": True})
+    route = make_route(loader)
+
+    result = await route(target_date=date(2026, 10, 18), identity=make_identity())
+
+    assert result == {"done": True}
+    loader.assert_awaited_once()
+
+
+# ======================
+#  TC-RCACHE-007
+# ======================
+# 異常系（タグ集合より長い expire は指定できない）
+def test_cached_route_rejects_expire_longer_than_tag_ttl():
+    with pytest.raises(ValueError):
+        cached_route(
+            "test_route",
+            expire=route_cache.ROUTE_CACHE_TAG_TTL + 1,
+            tags=lambda **_: [],
+        )
+
+
+@pytest.fixture
+def local_cache(monkeypatch):
+    """
+    L1 キャッシュを新しいインスタンスにし、無効化通知を購読中の状態にする
+    """
+    cache = LocalRouteCache(max_size=16, ttl=5)
+    monkeypatch.setattr(route_cache, "local_cache", cache)
+    monkeypatch.setattr(route_cache.invalidation_listener, "subscribed", True)
+    return cache
+
+
+# ======================
+#  TC-RCACHE-008
+# ======================
+# 正常系（L1 ヒット → Redis にアクセスしない）
+@pytest.mark.asyncio
+async def test_cached_route_serves_from_local_cache(mock_redis, local_cache):
+    loader = AsyncMock(return_value={"done": True})
+    route = make_route(loader)
+
+    await route(target_date=date(2026, 10, 18), identity=make_identity())
+    result = await route(target_date=date(2026, 10, 18), identity=make_identity())
+
+    assert result == {"done": True}
+    loader.assert_awaited_once()
+    mock_redis.get.assert_awaited_once()
+    assert len(local_cache) == 1
+
+
+# ======================
+#  TC-RCACHE-009
+# ======================
+# 正常系（無効化は自プロセスの L1 を消し、他ワーカーへ通知する）
+@pytest.mark.asyncio
+async def test_invalidate_tags_evicts_local_and_publishes(mock_redis, local_cache):
+    mock_redis.smembers.return_value = set()
+    local_cache.set("route_cache:a", {"done": True}, [care_setting_tag(10)])
+
+    await invalidate_tags(care_setting_tag(10))
+
+    assert local_cache.get("route_cache:a") is None
+    mock_redis.publish.assert_awaited_once_with(
+        route_cache.INVALIDATION_CHANNEL, json.dumps(["care_setting:10"])
+    )
+
+
+# ======================
+#  TC-RCACHE-010
+# ======================
+# 正常系（他ワーカーからの通知を受け取って L1 から破棄する）
+@pytest.mark.asyncio
+async def test_invalidation_listener_evicts_on_message():
+    cache = LocalRouteCache(max_size=16, ttl=5)
+    listener = InvalidationListener(cache)
+    received = asyncio.Event()
+    messages = [{"type": "message", "data": json.dumps(["care_setting:10"])}]
+
+    async def get_message(**_):
+        if messages:
+            # 購読開始後に登録されたエントリのうち、通知されたタグのものだけ消える
+            cache.set("route_cache:a", {"done": True}, ["care_setting:10"])
+            cache.set("route_cache:b", {"done": True}, ["care_setting:11"])
+            return messages.pop()
+        received.set()
+        await asyncio.sleep(0.01)
+        return None
+
+    pubsub = MagicMock(
+        subscribe=AsyncMock(), aclose=AsyncMock(), get_message=get_message
+    )
+    client = MagicMock(pubsub=MagicMock(return_value=pubsub))
+
+    listener._task = asyncio.create_task(  # pylint: disable=protected-access
+        listener._listen(client)  # pylint: disable=protected-access
+    )
+    await asyncio.wait_for(received.wait(), timeout=1)
+
+    assert listener.subscribed
+    assert cache.get("route_cache:a") is None
+    assert cache.get("route_cache:b") == {"done": True}
+    pubsub.subscribe.assert_awaited_once_with(route_cache.INVALIDATION_CHANNEL)
+
+    await listener.stop()
+    assert not listener.subscribed
+    assert len(cache) == 0
+
+
+# ======================
+#  TC-RCACHE-011
+# ======================
+# 正常系（同じキーの同時ミスは1回の読み込みにまとめる）
+@pytest.mark.asyncio
+async def test_cached_route_single_flight(mock_redis):
+    async def slow_load(_):
+        await asyncio.sleep(0.01)
+        return {"done": True}
+
+    loader = AsyncMock(side_effect=slow_load)
+    route = make_route(loader)
+
+    results = await asyncio.gather(
+        *[
+            route(target_date=date(2026, 10, 18), identity=make_identity())
+            for _ in range(5)
+        ]
+    )
+
+    assert results == [{"done": True}] * 5
+    loader.assert_awaited_once()
+    mock_redis.lock.return_value.release.assert_awaited_once()
+
+
+# ======================
+#  TC-RCACHE-012
+# ======================
+# 正常系（他プロセスがロック中 → 保存されるのを待って読み込まない）
+@pytest.mark.asyncio
+async def test_cached_route_waits_for_other_process(mock_redis, monkeypatch):
+    monkeypatch.setattr(route_cache, "ROUTE_CACHE_LOCK_POLL_INTERVAL", 0)
+    mock_redis.lock.return_value.acquire.return_value = False
+    mock_redis.get.side_effect = [None, None, make_entry({"done": True})]
+    loader = AsyncMock()
+    route = make_route(loader)
+
+    result = await route(target_date=date(2026, 10, 18), identity=make_identity())
+
+    assert result == {"done": True}
+    loader.assert_not_awaited()
+
+
+# ======================
+#  TC-RCACHE-013
+# ======================
+# 正常系（期限間近のエントリは期限前に再計算し、他プロセスが再計算中なら今の値を返す）
+@pytest.mark.asyncio
+async def test_cached_route_early_refresh(mock_redis, monkeypatch):
+    # 乱数を極端な値に固定して、必ず期限前の再計算が選ばれるようにする
+    monkeypatch.setattr(route_cache.random, "random", lambda: 1.0 - 1e-9)
+    mock_redis.get.return_value = make_entry({"done": False}, 1, load_time=1)
+    loader = AsyncMock(return_value={"done": True})
+    route = make_route(loader)
+
+    refreshed = await route(target_date=date(2026, 10, 18), identity=make_identity())
+
+    assert refreshed == {"done": True}
+    loader.assert_awaited_once()
+
+    mock_redis.lock.return_value.acquire.return_value = False
+    current = await route(target_date=date(2026, 10, 18), identity=make_identity())
+
+    assert current == {"done": False}
+    loader.assert_awaited_once()
+
+
+# ======================
+#  TC-RCACHE-014
+# ======================
+# 正常系（バージョン番号をキーに含め、bump_versions で次の読み込みから別キーになる）
+@pytest.mark.asyncio
+async def test_cached_route_versioned_key(mock_redis):
+    loader = AsyncMock(return_value={"plan": "free"})
+
+    @cached_route(
+        "users_me",
+        expire=60,
+        versions=lambda firebase_uid, **_: [user_tag(firebase_uid)],
+    )
+    async def route(firebase_uid: str):
+        return await loader()
+
+    mock_redis.mget.return_value = ["3"]
+    await route(firebase_uid="test-uid")
+
+    mock_redis.mget.assert_awaited_once_with(["route_cache:version:user:test-uid"])
+    key = mock_redis.get.await_args.args[0]
+    assert key.startswith("route_cache:users_me:test-uid:")
+    assert key.endswith(":v3")
+
+    mock_redis.mget.return_value = ["4"]
+    await route(firebase_uid="test-uid")
+
+    assert mock_redis.get.await_args.args[0] == key.removesuffix("3") + "4"
+
+
+# ======================
+#  TC-RCACHE-015
+# ======================
+# 正常系（bump_versions はバージョン番号を INCR する）
+@pytest.mark.asyncio
+async def test_bump_versions_increments_counter(mock_redis):
+    await route_cache.bump_versions(user_tag("test-uid"))
+
+    pipe = mock_redis.pipeline.return_value
+    pipe.incr.assert_called_once_with("route_cache:version:user:test-uid")
+    pipe.execute.assert_awaited_once()
+
+
+# ======================
+#  TC-RCACHE-016
+# ======================
+# 異常系（バージョンが取得できない場合はキャッシュを使わない）
+@pytest.mark.asyncio
+async def test_cached_route_version_error_bypasses_cache(mock_redis):
+    mock_redis.mget.side_effect = RedisConnectionError("down")
+    loader = AsyncMock(return_value={"plan": "free"})
+
+    @cached_route("users_me", expire=60, versions=lambda **_: ["user:test-uid"])
+    async def route(firebase_uid: str):
+        return await loader()
+
+    assert await route(firebase_uid="test-uid") == {"plan": "free"}
+    mock_redis.get.assert_not_awaited()
+
+
+def make_etag_route(loader):
+    """ETag 付きのテスト用ルーター関数"""
+
+    @cached_route(
+        "test_route",
+        expire=60,
+        tags=lambda identity, **_: [care_setting_tag(identity.care_setting_id)],
+        etag=True,
+    )
+    async def route(target_date: date, identity=None):
+        return await loader(target_date)
+
+    return route
+
+
+def make_request(if_none_match=None):
+    headers = {"if-none-match": if_none_match} if if_none_match else {}
+    return SimpleNamespace(headers=headers)
+
+
+# ======================
+#  TC-RCACHE-017
+# ======================
+# 正常系（etag=True → request/response をシグネチャに追加し、ETag を付ける）
+@pytest.mark.asyncio
+async def test_cached_route_sets_etag(mock_redis):
+    loader = AsyncMock(return_value={"done": True})
+    route = make_etag_route(loader)
+    response = Response()
+
+    assert {"request", "response"} <= inspect.signature(route).parameters.keys()
+
+    result = await route(
+        target_date=date(2026, 10, 18),
+        identity=make_identity(),
+        request=make_request(),
+        response=response,
+    )
+
+    assert result == {"done": True}
+    assert response.headers["etag"] == etag_of({"done": True})
+    # request / response はキャッシュキーに含めない
+    loader.assert_awaited_once_with(date(2026, 10, 18))
+
+
+# ======================
+#  TC-RCACHE-018
+# ======================
+# 正常系（If-None-Match が一致 → 304 を返す）
+@pytest.mark.asyncio
+async def test_cached_route_not_modified(mock_redis):
+    mock_redis.get.return_value = make_entry({"done": True})
+    loader = AsyncMock()
+    route = make_etag_route(loader)
+
+    result = await route(
+        target_date=date(2026, 10, 18),
+        identity=make_identity(),
+        request=make_request(f'"x", {etag_of({"done": True})}'),
+        response=Response(),
+    )
+
+    assert result.status_code == 304
+    assert result.headers["etag"] == etag_of({"done": True})
+    loader.assert_not_awaited()
+
+
+# ======================
+#  TC-RCACHE-019
+# ======================
+# 正常系（キャッシュを使えない場合は ETag を付けずにそのまま返す）
+@pytest.mark.asyncio
+async def test_cached_route_etag_without_cache():
+    loader = AsyncMock(return_value={"done": True})
+    route = make_etag_route(loader)
+    response = Response()
+
+    result = await route(
+        target_date=date(2026, 10, 18),
+        identity=make_identity(),
+        request=make_request(etag_of({"done": True})),
+        response=response,
+    )
+
+    assert result == {"done": True}
+    assert "etag" not in response.headers
+    loader.assert_awaited_once()
+
+
+def sample(name, **labels):
+    """Prometheus の既定レジストリから現在の値を取得する（未計測なら 0）"""
+    return REGISTRY.get_sample_value(name, labels) or 0
+
+
+# ======================
+#  TC-RCACHE-020
+# ======================
+# 正常系（ミス・ヒット・読み込み時間・サイズを名前空間ごとに記録する）
+@pytest.mark.asyncio
+async def test_cached_route_records_metrics(mock_redis):
+    before = {
+        "miss": sample("route_cache_misses_total", namespace="test_route"),
+        "hit": sample("route_cache_hits_total", namespace="test_route", layer="redis"),
+        "load": sample("route_cache_load_seconds_count", namespace="test_route"),
+        "size": sample("route_cache_value_bytes_count", namespace="test_route"),
+    }
+    route = make_route(AsyncMock(return_value={"count": 1}))
+
+    await route(target_date=date(2025, 7, 1), identity=make_identity())
+    mock_redis.get.return_value = make_entry({"count": 1})
+    await route(target_date=date(2025, 7, 1), identity=make_identity())
+
+    assert sample("route_cache_misses_total", namespace="test_route") == (
+        before["miss"] + 1
+    )
+    assert sample("route_cache_hits_total", namespace="test_route", layer="redis") == (
+        before["hit"] + 1
+    )
+    assert sample("route_cache_load_seconds_count", namespace="test_route") == (
+        before["load"] + 1
+    )
+    assert sample("route_cache_value_bytes_count", namespace="test_route") == (
+        before["size"] + 1
+    )
+
+
+# ======================
+#  TC-RCACHE-021
+# ======================
+# 正常系（無効化したキーの数を名前空間ごとに記録する）
+@pytest.mark.asyncio
+async def test_invalidate_tags_records_metrics(mock_redis):
+    before = sample("route_cache_invalidations_total", namespace="care_logs_today")
+    mock_redis.smembers.return_value = {
+        "route_cache:care_logs_today:uid-1:abc",
+        "route_cache:care_logs_today:uid-2:def",
+    }
+
+    await invalidate_tags(care_setting_tag(10))
+
+    assert sample("route_cache_invalidations_total", namespace="care_logs_today") == (
+        before + 2
+    )
+
+
+# ======================
+#  TC-RCACHE-022
+# ======================
+# 正常系（サイズの大きい順に返し、タグ・バージョンのキーは除く）
+@pytest.mark.asyncio
+async def test_top_keys_by_size(mock_redis):
+    keys = [
+        "route_cache:a:uid:1",
+        "route_cache:tag:care_setting:10",
+        "route_cache:b:uid:2",
+        "route_cache:version:user:uid",
+        "route_cache:a:uid:3",
+    ]
+
+    async def scan_iter(**_):
+        for key in keys:
+            yield key
+
+    mock_redis.scan_iter = MagicMock(side_effect=scan_iter)
+    # STRLEN, TTL の順（route_cache:a:uid:3 は走査中に期限切れ）
+    mock_redis.pipeline.return_value.execute.return_value = [100, 30, 500, 60, 0, -2]
+
+    result = await route_cache.top_keys_by_size(limit=5)
+
+    assert result == [
+        {"key": "route_cache:b:uid:2", "namespace": "b", "bytes": 500, "ttl": 60},
+        {"key": "route_cache:a:uid:1", "namespace": "a", "bytes": 100, "ttl": 30},
+    ]
+    mock_redis.scan_iter.assert_called_once_with(match="route_cache:*", count=500)
+
+
+@pytest.fixture
+def pending_invalidations(monkeypatch):
+    """
+    送れなかった無効化の記録を空にし、再送は flush_pending_invalidations() で明示的に行う
+    """
+    monkeypatch.setattr(route_cache, "_pending_versions", set())
+    monkeypatch.setattr(route_cache, "_pending_tags", set())
+    monkeypatch.setattr(route_cache, "_resend_task", None)
+    monkeypatch.setattr(route_cache, "INVALIDATION_RESEND_SECONDS", 3600)
+    yield
+    if route_cache._resend_task is not None:  # pylint: disable=protected-access
+        route_cache._resend_task.cancel()  # pylint: disable=protected-access
+
+
+# ======================
+#  TC-RCACHE-023
+# ======================
+# 異常系（INCR に失敗 → 再送するまでそのバージョンのキャッシュを使わず、復旧後に再送する）
+@pytest.mark.asyncio
+async def test_bump_versions_failure_is_resent(mock_redis, pending_invalidations):
+    pipe = mock_redis.pipeline.return_value
+    pipe.execute.side_effect = RedisConnectionError("down")
+
+    await route_cache.bump_versions(user_tag("test-uid"))
+
+    assert route_cache.has_pending_invalidation([user_tag("test-uid")])
+    assert not route_cache.has_pending_invalidation([user_tag("other-uid")])
+
+    # 再送待ちの間は Redis のエントリを読まない
+    loader = AsyncMock(return_value={"plan": "premium"})
+
+    @cached_route(
+        "users_me",
+        expire=60,
+        versions=lambda firebase_uid, **_: [user_tag(firebase_uid)],
+    )
+    async def route(firebase_uid: str):
+        return await loader()
+
+    assert await route(firebase_uid="test-uid") == {"plan": "premium"}
+    mock_redis.get.assert_not_awaited()
+
+    # 復旧後の再送で INCR し、記録を消す
+    pipe.execute.side_effect = None
+    pipe.incr.reset_mock()
+
+    assert await route_cache.flush_pending_invalidations() is True
+    pipe.incr.assert_called_once_with("route_cache:version:user:test-uid")
+    assert not route_cache.has_pending_invalidation([user_tag("test-uid")])
+
+
+# ======================
+#  TC-RCACHE-024
+# ======================
+# 異常系（タグの削除に失敗 → 再送が失敗する間は記録を残し、復旧後に削除する）
+@pytest.mark.asyncio
+async def test_invalidate_tags_failure_is_resent(mock_redis, pending_invalidations):
+    mock_redis.smembers.side_effect = RedisConnectionError("down")
+
+    await invalidate_tags(care_setting_tag(10))
+
+    assert route_cache.has_pending_invalidation([care_setting_tag(10)])
+    assert await route_cache.flush_pending_invalidations() is False
+    assert route_cache.has_pending_invalidation([care_setting_tag(10)])
+
+    mock_redis.smembers.side_effect = None
+    mock_redis.smembers.return_value = {"route_cache:care_logs_today:uid:abc"}
+
+    assert await route_cache.flush_pending_invalidations() is True
+    mock_redis.delete.assert_awaited_once_with(
+        "route_cache:care_logs_today:uid:abc", "route_cache:tag:care_setting:10"
+    )
+    assert not route_cache.has_pending_invalidation([care_setting_tag(10)])
@@ -0,0 +1,84 @@
+from app.services.token_cache import VerifiedTokenCache
+
+
+class FakeClock:
+    """テスト用に時刻を進められる時計"""
+
+    def __init__(self, now=1000.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+# ======================
+#  TC-TOKEN-001
+# ======================
+# 正常系（2回目以降はキャッシュヒット）
+def test_token_cache_hit_and_miss():
+    cache = VerifiedTokenCache(clock=FakeClock())
+
+    assert cache.get("token-a") is None
+    cache.set("token-a", {"uid": "user-a", "exp": 2000})
+
+    assert cache.get("token-a") == {"uid": "user-a", "exp": 2000}
+    assert cache.stats() == {"hits": 1, "misses": 1, "size": 1}
+
+
+# ======================
+#  TC-TOKEN-002
+# ======================
+# 正常系（exp を過ぎたらミス扱い）
+def test_token_cache_expires_at_token_exp():
+    clock = FakeClock()
+    cache = VerifiedTokenCache(clock=clock)
+    cache.set("token-a", {"uid": "user-a", "exp": 1100})
+
+    clock.now = 1100
+    assert cache.get("token-a") is None
+    assert cache.stats()["size"] == 0
+
+
+# ======================
+#  TC-TOKEN-003
+# ======================
+# 正常系（max_age を指定した場合は exp より先に期限切れ）
+def test_token_cache_max_age_caps_lifetime():
+    clock = FakeClock()
+    cache = VerifiedTokenCache(max_age=60, clock=clock)
+    cache.set("token-a", {"uid": "user-a", "exp": 5000})
+
+    clock.now = 1059
+    assert cache.get("token-a") is not None
+    clock.now = 1060
+    assert cache.get("token-a") is None
+
+
+# ======================
+#  TC-TOKEN-004
+# ======================
+# 正常系（上限を超えたら最も古く参照されたものから追い出す）
+def test_token_cache_evicts_least_recently_used():
+    cache = VerifiedTokenCache(max_size=2, clock=FakeClock())
+    cache.set("token-a", {"uid": "a", "exp": 2000})
+    cache.set("token-b", {"uid": "b", "exp": 2000})
+
+    # a を参照して b を最古にする
+    cache.get("token-a")
+    cache.set("token-c", {"uid": "c", "exp": 2000})
+
+    assert cache.get("token-b") is None
+    assert cache.get("token-a") is not None
+    assert cache.get("token-c") is not None
+
+
+# ======================
+#  TC-TOKEN-005
+# ======================
+# 異常系（exp のないトークンはキャッシュしない）
+def test_token_cache_skips_token_without_exp():
+    cache = VerifiedTokenCache(clock=FakeClock())
+    cache.set("token-a", {"uid": "a"})
+
+    assert cache.get("token-a") is None
+    assert cache.stats()["size"] == 0
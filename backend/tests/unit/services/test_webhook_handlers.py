@@ -0,0 +1,118 @@
+# pylint: disable=redefined-outer-name
+
+import json
+
+import pytest
+from types import SimpleNamespace
+from unittest.mock import AsyncMock
+
+from app.services import webhook_handlers
+from app.services.webhook_handlers import (
+    apply_webhook_chunks,
+    prepare_webhook_chunks,
+    register_webhook_handler,
+)
+
+
+@pytest.fixture
+def handlers(monkeypatch):
+    """
+    登録済みの処理を空にし、prisma_clientをモックする
+    """
+    monkeypatch.setattr(webhook_handlers, "_handlers", {})
+    mock_client = AsyncMock()
+    monkeypatch.setattr(webhook_handlers, "prisma_client", mock_client)
+    return mock_client
+
+
+def make_event(event_id, event_type, data_object):
+    """webhook_eventsレコードのダミー"""
+    payload = json.dumps({"data": {"object": data_object}})
+    return SimpleNamespace(id=event_id, event_type=event_type, payload=payload)
+
+
+async def collect(chunks, concurrency=2):
+    return [result async for result in apply_webhook_chunks(chunks, concurrency)]
+
+
+# ======================
+#  TC-WHANDLER-001
+# ======================
+# 正常系（種類ごとに登録した処理へ、宣言した項目だけを渡す）
+@pytest.mark.asyncio
+async def test_dispatches_declared_fields_by_event_type(handlers):
+    handled = []
+
+    @register_webhook_handler("charge.refunded", fields=("id", "amount_refunded"))
+    async def apply_refunds(items):
+        handled.extend(fields for _, fields in items)
+
+    events = [
+        make_event("evt_1", "charge.refunded", {"id": "ch_1", "amount_refunded": 100}),
+        make_event("evt_2", "charge.refunded", {"id": "ch_2", "currency": "jpy"}),
+    ]
+
+    chunks, skipped = await prepare_webhook_chunks(events, chunk_size=10)
+
+    assert skipped == 0
+    assert await collect(chunks) == [(2, 0)]
+    assert handled == [
+        {"id": "ch_1", "amount_refunded": 100},
+        {"id": "ch_2", "amount_refunded": None},
+    ]
+
+
+# ======================
+#  TC-WHANDLER-002
+# ======================
+# スキップ系（未登録の種類・required が欠けたイベント・prepare で除いたイベント）
+@pytest.mark.asyncio
+async def test_skips_unhandled_and_incomplete_events(handlers):
+    async def drop_second(items):
+        return items[:1]
+
+    @register_webhook_handler(
+        "payment_intent.succeeded",
+        fields=("id",),
+        required=("id",),
+        prepare=drop_second,
+    )
+    async def apply_payment_intents(items):
+        pass
+
+    events = [
+        make_event("evt_1", "payment_intent.succeeded", {"id": "pi_1"}),
+        make_event("evt_2", "payment_intent.succeeded", {"id": "pi_2"}),
+        make_event("evt_3", "payment_intent.succeeded", {}),
+        make_event("evt_4", "customer.created", {"id": "cus_1"}),
+    ]
+
+    chunks, skipped = await prepare_webhook_chunks(events, chunk_size=10)
+
+    assert skipped == 3
+    assert [[event.id for event, _ in items] for _, items in chunks] == [["evt_1"]]
+
+
+# ======================
+#  TC-WHANDLER-003
+# ======================
+# 異常系（失敗したチャンクだけ error_message を記録し、残りは続ける）
+@pytest.mark.asyncio
+async def test_failed_chunk_records_error(handlers):
+    @register_webhook_handler("charge.refunded", fields=("id",))
+    async def apply_refunds(items):
+        if items[0][0].id == "evt_1":
+            raise RuntimeError("Commit Failure")
+
+    events = [
+        make_event("evt_1", "charge.refunded", {"id": "ch_1"}),
+        make_event("evt_2", "charge.refunded", {"id": "ch_2"}),
+    ]
+
+    chunks, _ = await prepare_webhook_chunks(events, chunk_size=1)
+    results = await collect(chunks)
+
+    assert sorted(results) == [(0, 1), (1, 0)]
+    handlers.webhook_events.update_many.assert_awaited_once_with(
+        where={"id": {"in": ["evt_1"]}}, data={"error_message": "Commit Failure"}
+    )
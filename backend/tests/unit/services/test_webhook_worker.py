@@ -0,0 +1,104 @@
+# pylint: disable=redefined-outer-name
+
+import asyncio
+
+import pytest
+from types import SimpleNamespace
+from unittest.mock import AsyncMock
+
+from app.services import webhook_worker as webhook_worker_module
+from app.services.webhook_worker import WebhookWorkerPool, claim_webhook_events
+
+
+@pytest.fixture
+def mock_prisma(monkeypatch):
+    """
+    prisma_clientをモックする
+    """
+    mock_client = AsyncMock()
+    mock_client.query_raw.return_value = []
+    mock_client.webhook_events.find_many.return_value = []
+    monkeypatch.setattr(webhook_worker_module, "prisma_client", mock_client)
+    return mock_client
+
+
+def make_event(event_id):
+    """webhook_eventsレコードのダミー"""
+    return SimpleNamespace(id=event_id, firebase_uid="user-uid", payload="{}")
+
+
+# ======================
+#  TC-WWORKER-001
+# ======================
+# 正常系（SKIP LOCKED で取得済みにしたイベントだけを読み込む）
+@pytest.mark.asyncio
+async def test_claim_webhook_events(mock_prisma):
+    mock_prisma.query_raw.return_value = [{"id": "evt_1"}, {"id": "evt_2"}]
+    events = [make_event("evt_1"), make_event("evt_2")]
+    mock_prisma.webhook_events.find_many.return_value = events
+
+    result = await claim_webhook_events(10)
+
+    assert result == events
+    query, *params = mock_prisma.query_raw.await_args.args
+    assert "FOR UPDATE SKIP LOCKED" in query
+    assert params[-1] == 10
+    mock_prisma.webhook_events.find_many.assert_awaited_once_with(
+        where={"id": {"in": ["evt_1", "evt_2"]}},
+        order={"received_at": "asc"},
+    )
+
+
+# ======================
+#  TC-WWORKER-002
+# ======================
+# 正常系（取得できるイベントがなければ読み込まない）
+@pytest.mark.asyncio
+async def test_claim_webhook_events_empty(mock_prisma):
+    assert await claim_webhook_events(10) == []
+    mock_prisma.webhook_events.find_many.assert_not_awaited()
+
+
+# ======================
+#  TC-WWORKER-003
+# ======================
+# 正常系（取得したイベントをまとめて1回で渡し、失敗してもワーカーは止まらない）
+@pytest.mark.asyncio
+async def test_run_once_passes_claimed_batch(mock_prisma):
+    mock_prisma.query_raw.return_value = [{"id": "evt_1"}, {"id": "evt_2"}]
+    mock_prisma.webhook_events.find_many.return_value = [
+        make_event("evt_1"),
+        make_event("evt_2"),
+    ]
+    handler = AsyncMock(side_effect=RuntimeError("DB failure"))
+    pool = WebhookWorkerPool()
+    pool.start(handler, workers=0)
+
+    assert await pool.run_once() == 2
+    handler.assert_awaited_once()
+    assert [event.id for event in handler.await_args.args[0]] == ["evt_1", "evt_2"]
+
+
+# ======================
+#  TC-WWORKER-004
+# ======================
+# 正常系（起動したワーカーが通知を受けて処理し、停止できる）
+@pytest.mark.asyncio
+async def test_worker_processes_after_notify(mock_prisma, monkeypatch):
+    monkeypatch.setattr(webhook_worker_module, "WEBHOOK_WORKER_POLL_INTERVAL", 60)
+    event = make_event("evt_1")
+    claimed = [[{"id": "evt_1"}]]
+    mock_prisma.query_raw.side_effect = lambda *_: claimed.pop() if claimed else []
+    mock_prisma.webhook_events.find_many.return_value = [event]
+    handled = AsyncMock()
+    pool = WebhookWorkerPool()
+
+    pool.start(handled, workers=1)
+    pool.notify()
+    for _ in range(10):
+        if handled.await_count:
+            break
+        await asyncio.sleep(0)
+    await pool.stop()
+
+    handled.assert_awaited_once_with([event])
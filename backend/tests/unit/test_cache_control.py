@@ -0,0 +1,103 @@
+# pylint: disable=redefined-outer-name
+
+import pytest
+from fastapi import FastAPI, Response
+from fastapi.testclient import TestClient
+
+from app.cache_control import (
+    CACHE_POLICIES,
+    CacheControlMiddleware,
+    CachePolicy,
+    resolve_cache_policy,
+)
+
+
+@pytest.fixture
+def client(monkeypatch):
+    """
+    方針表を差し替えたテスト用アプリ（app.main は Prisma を必要とするため使わない）
+    """
+    monkeypatch.setitem(
+        CACHE_POLICIES,
+        ("GET", "/public"),
+        CachePolicy("public", max_age=60, stale_while_revalidate=300),
+    )
+    monkeypatch.setitem(
+        CACHE_POLICIES,
+        ("GET", "/items/{item_id}"),
+        CachePolicy("private", no_cache=True, vary_authorization=True),
+    )
+
+    test_app = FastAPI()
+
+    @test_app.get("/public")
+    async def public():
+        return {"ok": True}
+
+    @test_app.get("/items/{item_id}")
+    async def item(item_id: int):
+        return {"id": item_id}
+
+    @test_app.post("/items")
+    async def create_item():
+        return {"ok": True}
+
+    @test_app.get("/custom")
+    async def custom(response: Response):
+        response.headers["Cache-Control"] = "max-age=5"
+        return {"ok": True}
+
+    test_app.add_middleware(CacheControlMiddleware)
+    return TestClient(test_app)
+
+
+# ======================
+#  TC-CC-001
+# ======================
+# 正常系（public の方針を付与、Vary は付けない）
+def test_public_policy(client):
+    response = client.get("/public")
+
+    assert response.headers["cache-control"] == (
+        "public, max-age=60, stale-while-revalidate=300"
+    )
+    assert "vary" not in response.headers
+
+
+# ======================
+#  TC-CC-002
+# ======================
+# 正常系（パスパラメータを含むルートもルートのパスで引く）
+def test_private_policy_with_path_params(client):
+    response = client.get("/items/1", headers={"Authorization": "Bearer x"})
+
+    assert response.headers["cache-control"] == "private, no-cache"
+    assert response.headers["vary"] == "Authorization"
+
+
+# ======================
+#  TC-CC-003
+# ======================
+# 正常系（表にないルート・404 は no-store）
+def test_default_policy_is_no_store(client):
+    assert client.post("/items").headers["cache-control"] == "no-store"
+    assert client.get("/unknown").headers["cache-control"] == "no-store"
+
+
+# ======================
+#  TC-CC-004
+# ======================
+# 正常系（ルーターで設定した Cache-Control は上書きしない）
+def test_route_header_is_kept(client):
+    assert client.get("/custom").headers["cache-control"] == "max-age=5"
+
+
+# ======================
+#  TC-CC-005
+# ======================
+# 正常系（本番の方針表: HEAD は GET と同じ、ユーザーごとのGETは再検証必須）
+def test_resolve_cache_policy_table():
+    assert resolve_cache_policy("HEAD", "/health").header_value() == "no-store"
+    policy = resolve_cache_policy("GET", "/api/care_logs/today")
+    assert policy.header_value() == "private, no-cache"
+    assert policy.vary_authorization
@@ -0,0 +1,164 @@
+# pylint: disable=redefined-outer-name
+# pylint: disable=unused-argument
+
+import pytest
+from fastapi import HTTPException
+from types import SimpleNamespace
+from unittest.mock import AsyncMock
+from app.dependencies import RESOLVE_IDENTITY_SQL, get_request_identity
+
+
+@pytest.fixture
+def mock_identity_cache(monkeypatch):
+    """
+    identity キャッシュ（Redis）をモックする（デフォルトはミス）
+    """
+    mock_cache = SimpleNamespace(
+        get=AsyncMock(return_value=(None, "0")),
+        set=AsyncMock(),
+    )
+    monkeypatch.setattr("app.dependencies.get_cached_identity", mock_cache.get)
+    monkeypatch.setattr("app.dependencies.set_cached_identity", mock_cache.set)
+    return mock_cache
+
+
+@pytest.fixture
+def mock_prisma(monkeypatch, mock_identity_cache):
+    """
+    app.dependencies の prisma_client をモックする
+    """
+    mock_client = AsyncMock()
+    mock_client.query_first.return_value = None
+    monkeypatch.setattr("app.dependencies.prisma_client", mock_client)
+    return mock_client
+
+
+def make_request():
+    """request.state だけを持つダミーのRequest"""
+    return SimpleNamespace(state=SimpleNamespace())
+
+
+# ======================
+#  TC-DEP-001
+# ======================
+# 正常系（users と care_settings を1クエリで解決）
+@pytest.mark.asyncio
+async def test_get_request_identity_resolves_in_one_query(mock_prisma):
+    mock_prisma.query_first.return_value = {
+        "user_id": "user-1",
+        "current_plan": "premium",
+        "care_setting_id": 10,
+        "care_setting_ids": [10, 11],
+    }
+
+    identity = await get_request_identity(make_request(), firebase_uid="test-uid")
+
+    assert identity.user_id == "user-1"
+    assert identity.current_plan == "premium"
+    assert identity.care_setting_id == 10
+    # 2件目以降のお世話設定も本人のものとして扱う
+    assert identity.owns_care_setting(11)
+    assert not identity.owns_care_setting(12)
+
+    # users と care_settings は結合クエリ1回で取得する
+    mock_prisma.query_first.assert_awaited_once_with(RESOLVE_IDENTITY_SQL, "test-uid")
+    mock_prisma.users.find_unique.assert_not_awaited()
+    mock_prisma.care_settings.find_first.assert_not_awaited()
+
+
+# ======================
+#  TC-DEP-002
+# ======================
+# 正常系（同一リクエスト内ではメモ化される）
+@pytest.mark.asyncio
+async def test_get_request_identity_is_memoized_per_request(mock_prisma):
+    mock_prisma.query_first.return_value = {
+        "user_id": "user-1",
+        "current_plan": "free",
+        "care_setting_id": None,
+        "care_setting_ids": [],
+    }
+    request = make_request()
+
+    first = await get_request_identity(request, firebase_uid="test-uid")
+    second = await get_request_identity(request, firebase_uid="test-uid")
+
+    assert first is second
+    assert first.care_setting_id is None
+    assert not first.owns_care_setting(None)
+    mock_prisma.query_first.assert_awaited_once()
+
+
+# ======================
+#  TC-DEP-003
+# ======================
+# 正常系（ユーザー未登録 → None、キャッシュもしない）
+@pytest.mark.asyncio
+async def test_get_request_identity_user_not_found(mock_prisma, mock_identity_cache):
+    identity = await get_request_identity(make_request(), firebase_uid="unknown")
+
+    assert identity is None
+    mock_identity_cache.set.assert_not_awaited()
+
+
+# ======================
+#  TC-DEP-003-2
+# ======================
+# 正常系（Redisキャッシュヒット → DBにアクセスしない）
+@pytest.mark.asyncio
+async def test_get_request_identity_uses_redis_cache(mock_prisma, mock_identity_cache):
+    mock_identity_cache.get.return_value = (
+        {
+            "user_id": "user-1",
+            "current_plan": "premium",
+            "care_setting_id": 10,
+            "care_setting_ids": [10, 11],
+            "version": "0",
+        },
+        "0",
+    )
+
+    identity = await get_request_identity(make_request(), firebase_uid="test-uid")
+
+    assert identity.current_plan == "premium"
+    assert identity.care_setting_id == 10
+    assert identity.owns_care_setting(11)
+    mock_prisma.query_first.assert_not_awaited()
+
+
+# ======================
+#  TC-DEP-003-3
+# ======================
+# 正常系（キャッシュミス → DBで解決した結果をキャッシュ）
+@pytest.mark.asyncio
+async def test_get_request_identity_populates_redis_cache(
+    mock_prisma, mock_identity_cache
+):
+    mock_identity_cache.get.return_value = (None, "4")
+    mock_prisma.query_first.return_value = {
+        "user_id": "user-1",
+        "current_plan": "free",
+        "care_setting_id": 10,
+        "care_setting_ids": [10],
+    }
+
+    await get_request_identity(make_request(), firebase_uid="test-uid")
+
+    # DBを読む前に取得したバージョンで保存する
+    mock_identity_cache.set.assert_awaited_once_with(
+        "test-uid", "4", "user-1", "free", 10, [10]
+    )
+
+
+# ======================
+#  TC-DEP-004
+# ======================
+# 異常系（DB例外 → 500）
+@pytest.mark.asyncio
+async def test_get_request_identity_db_error(mock_prisma):
+    mock_prisma.query_first.side_effect = RuntimeError("DB down")
+
+    with pytest.raises(HTTPException) as exc_info:
+        await get_request_identity(make_request(), firebase_uid="test-uid")
+
+    assert exc_info.value.status_code == 500
@@ -0,0 +1,136 @@
+# pylint: disable=redefined-outer-name
+
+import pytest
+import redis.asyncio as redis
+from redis.exceptions import ConnectionError as RedisConnectionError
+
+from app.redis_client import (
+    CircuitBreaker,
+    CircuitOpenError,
+    GuardedRedis,
+    create_redis_client,
+    get_redis_client,
+    set_redis_client,
+)
+
+
+class FakeClock:
+    """テスト用に時刻を進められる時計"""
+
+    def __init__(self, now=1000.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def guarded_client(monkeypatch):
+    """
+    実際には接続せず、execute_command の結果だけを差し替えた GuardedRedis
+    """
+    results = []
+
+    async def fake_execute_command(self, *args, **options):
+        result = results.pop(0)
+        if isinstance(result, Exception):
+            raise result
+        return result
+
+    monkeypatch.setattr(redis.Redis, "execute_command", fake_execute_command)
+    clock = FakeClock()
+    client = GuardedRedis(
+        breaker=CircuitBreaker(failure_threshold=2, reset_timeout=10, clock=clock)
+    )
+    set_redis_client(client)
+    yield client, results, clock
+    set_redis_client(None)
+
+
+# ======================
+#  TC-REDIS-001
+# ======================
+# 正常系（連続失敗で遮断 → 遮断中は get_redis_client が None を返す）
+@pytest.mark.asyncio
+async def test_breaker_opens_after_consecutive_failures(guarded_client):
+    client, results, _ = guarded_client
+    results.extend([RedisConnectionError("down"), RedisConnectionError("down")])
+
+    for _ in range(2):
+        with pytest.raises(RedisConnectionError):
+            await client.get("key")
+
+    assert client.breaker.state == "open"
+    assert get_redis_client() is None
+    # 遮断中は Redis に送らずに失敗する
+    with pytest.raises(CircuitOpenError):
+        await client.get("key")
+
+
+# ======================
+#  TC-REDIS-002
+# ======================
+# 正常系（reset_timeout 経過後の試行が成功すれば復旧）
+@pytest.mark.asyncio
+async def test_breaker_recovers_after_reset_timeout(guarded_client):
+    client, results, clock = guarded_client
+    results.extend([RedisConnectionError("down")] * 2 + ["value"])
+    for _ in range(2):
+        with pytest.raises(RedisConnectionError):
+            await client.get("key")
+
+    clock.now += 10
+    assert get_redis_client() is client
+    assert client.breaker.state == "half_open"
+    assert await client.get("key") == "value"
+    assert client.breaker.state == "closed"
+
+
+# ======================
+#  TC-REDIS-003
+# ======================
+# 異常系（half_open の試行が失敗すれば再び遮断）
+def test_breaker_reopens_on_half_open_failure():
+    clock = FakeClock()
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=10, clock=clock)
+    breaker.record_failure()
+
+    clock.now += 10
+    assert breaker.allow()
+    breaker.record_failure()
+
+    assert breaker.state == "open"
+    assert not breaker.allow()
+
+
+# ======================
+#  TC-REDIS-004
+# ======================
+# 正常系（force=True はブレーカーを通さないクライアントを返す）
+@pytest.mark.asyncio
+async def test_force_returns_unguarded_client(guarded_client):
+    client, _, _ = guarded_client
+    client.breaker.record_failure()
+    client.breaker.record_failure()
+
+    assert get_redis_client() is None
+    assert get_redis_client(force=True) is client.unguarded
+    assert client.unguarded.connection_pool is client.connection_pool
+
+
+# ======================
+#  TC-REDIS-005
+# ======================
+# 正常系（環境変数の設定で接続プールを作る）
+@pytest.mark.asyncio
+async def test_create_redis_client_uses_pool_settings(monkeypatch):
+    monkeypatch.setattr("app.redis_client.REDIS_MAX_CONNECTIONS", 7)
+    monkeypatch.setattr("app.redis_client.REDIS_SOCKET_TIMEOUT", 0.2)
+
+    client = create_redis_client()
+
+    pool = client.connection_pool
+    assert isinstance(pool, redis.BlockingConnectionPool)
+    assert pool.max_connections == 7
+    assert pool.connection_kwargs["socket_timeout"] == 0.2
+    await client.aclose(close_connection_pool=True)